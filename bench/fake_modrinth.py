@@ -0,0 +1,266 @@
+"""A local stand-in for the parts of the Modrinth API the benchmarks touch.
+
+Serves synthetic, deterministic search hits, projects, versions, teams,
+icons and mod files with a configurable latency per request, so runs are
+comparable between machines and do not depend on the network.
+
+Project i has 4 + i % 12 versions, oldest first, the older ones for older
+game versions. Some projects have two loaders, alternating between their
+versions. Dependencies, the same on every version:
+
+* i % 4 == 1 requires project i // 2;
+* i % 10 == 0 requires project i + EXTRA_OFFSET, which is never on a
+  benchmark board;
+* i % 25 == 3 declares project i + 1 incompatible.
+"""
+import json
+import time
+import hashlib
+import zlib
+import struct
+import threading
+import http.server
+from urllib.parse import parse_qs, urlsplit
+
+LOADERS = ["fabric", "forge", "quilt", "neoforge"]
+GAME_VERSIONS = ["1.21.1", "1.20.4", "1.20.1", "1.19.2", "1.18.2", "1.16.5", "1.12.2"]
+# dependencies outside the board start at this project number
+EXTRA_OFFSET = 1_000_000
+SIDES = ["required", "optional", "unsupported"]
+FILE_SIZE = 4096
+
+
+def _png(size: int = 64) -> bytes:
+    """A flat grey RGB PNG, built without Qt."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(b"\x00" + b"\x80\x80\x80" * size for _ in range(size))
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+def make_hit(i: int, base_url: str = "") -> dict:
+    return {
+        "project_id": f"P{i:07d}",
+        "slug": f"bench-mod-{i}",
+        "title": f"Bench Mod {i}",
+        "description": f"Synthetic mod number {i} used by the benchmark suite.",
+        "author": f"author{i % 500}",
+        "icon_url": f"{base_url}/icons/{i}.png" if base_url else None,
+        "downloads": 10_000_000 // (i + 1),
+        "follows": i % 1000,
+        "versions": GAME_VERSIONS[: 1 + i % len(GAME_VERSIONS)],
+        "categories": [LOADERS[i % len(LOADERS)]],
+        "latest_version": f"1.{i % 20}.{i % 7}",
+        "date_modified": "2024-01-01T00:00:00Z",
+    }
+
+
+def _number(key: str) -> int | None:
+    """Project number of an id (P0000012), slug (bench-mod-12), version (V0000012-3) or team id."""
+    if key.startswith("bench-mod-"):
+        digits = key[len("bench-mod-") :]
+    else:
+        digits = key[1:].split("-")[0]
+    return int(digits) if digits.isdigit() else None
+
+
+def project_loaders(i: int) -> list[str]:
+    loader = LOADERS[i % len(LOADERS)]
+    if i % 6 == 0 and loader != "quilt":
+        return [loader, "quilt"]
+    return [loader]
+
+
+def version_count(i: int) -> int:
+    return 4 + i % 12
+
+
+def file_content(vid: str) -> bytes:
+    return (vid.encode() * (FILE_SIZE // len(vid) + 1))[:FILE_SIZE]
+
+
+def make_version(vid: str, base_url: str = "") -> dict | None:
+    i = _number(vid)
+    if i is None or "-" not in vid:
+        return None
+    k = int(vid.rsplit("-", 1)[1])
+    count = version_count(i)
+    if not 0 <= k < count:
+        return None
+    game_versions = GAME_VERSIONS[: 1 + i % len(GAME_VERSIONS)]
+    loaders = project_loaders(i)
+    # the newest versions are for the newest game version, every third one older a step back
+    game_version = game_versions[min(len(game_versions) - 1, (count - 1 - k) // 3)]
+    dependencies = []
+    if i % 4 == 1:
+        dependencies.append({"project_id": f"P{i // 2:07d}", "dependency_type": "required"})
+    if i % 10 == 0 and i < EXTRA_OFFSET:
+        dependencies.append({"project_id": f"P{i + EXTRA_OFFSET:07d}", "dependency_type": "required"})
+    if i % 25 == 3:
+        dependencies.append({"project_id": f"P{i + 1:07d}", "dependency_type": "incompatible"})
+    content = file_content(vid)
+    return {
+        "id": vid,
+        "project_id": f"P{i:07d}",
+        "version_number": f"{i % 20}.{k}",
+        "version_type": "release",
+        "date_published": f"2024-01-{1 + k:02d}T00:00:00Z",
+        "game_versions": [game_version],
+        "loaders": [loaders[k % len(loaders)]],
+        "dependencies": dependencies,
+        "files": [
+            {
+                "primary": True,
+                "filename": f"bench-mod-{i}-{k}.jar",
+                "url": f"{base_url}/files/{vid}.jar",
+                "size": len(content),
+                "hashes": {
+                    "sha1": hashlib.sha1(content).hexdigest(),
+                    "sha512": hashlib.sha512(content).hexdigest(),
+                },
+            }
+        ],
+    }
+
+
+class FakeModrinth:
+    def __init__(self, latency: float = 0.0, total_hits: int = 10_000):
+        self.latency = latency
+        self.total_hits = total_hits
+        self.requests = 0
+        self._icon = _png()
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> str:
+        """Start serving and point modrinth_api at the server; returns its API base URL."""
+        import modrinth_api
+
+        fake = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with fake._lock:
+                    fake.requests += 1
+                if fake.latency:
+                    time.sleep(fake.latency)
+                parts = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                path = parts.path
+                ids = json.loads(query.get("ids", "[]"))
+                if path.startswith("/icons/"):
+                    self._send(fake._icon, "image/png")
+                elif path.startswith("/files/") and path.endswith(".jar"):
+                    self._send(file_content(path[len("/files/") : -len(".jar")]), "application/java-archive")
+                elif path == "/v2/search":
+                    self._send_json(fake.search(query))
+                elif path == "/v2/projects":
+                    # like Modrinth, unknown ids are left out rather than failing the request
+                    self._send_json([p for p in map(fake.project, ids) if p is not None])
+                elif path == "/v2/versions":
+                    self._send_json([v for v in map(fake.version, ids) if v is not None])
+                elif path == "/v2/teams":
+                    self._send_json([fake.team(tid) for tid in ids])
+                elif path.startswith("/v2/project/") and path.endswith("/version"):
+                    versions = fake.project_versions(
+                        path.split("/")[3],
+                        json.loads(query.get("game_versions", "[]")),
+                        json.loads(query.get("loaders", "[]")),
+                    )
+                    if versions is None:
+                        self.send_error(404)
+                    else:
+                        self._send_json(versions)
+                else:
+                    self.send_error(404)
+
+            def _send_json(self, data):
+                self._send(json.dumps(data).encode(), "application/json")
+
+            def _send(self, body: bytes, content_type: str):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        modrinth_api.BASE_URL = self.url + "/v2"
+        return modrinth_api.BASE_URL
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def search(self, query: dict) -> dict:
+        limit = int(query.get("limit", 10))
+        offset = int(query.get("offset", 0))
+        end = min(self.total_hits, offset + limit)
+        return {
+            "hits": [make_hit(i, self.url) for i in range(offset, end)],
+            "offset": offset,
+            "limit": limit,
+            "total_hits": self.total_hits,
+        }
+
+    def project(self, key: str) -> dict | None:
+        """Project by id or slug, None for a key that names no project."""
+        i = _number(key)
+        if i is None:
+            return None
+        hit = make_hit(i, self.url)
+        return {
+            "id": hit["project_id"],
+            "slug": hit["slug"],
+            "title": hit["title"],
+            "description": hit["description"],
+            "team": f"T{i:07d}",
+            "client_side": SIDES[i % len(SIDES)],
+            "server_side": SIDES[i // len(SIDES) % len(SIDES)],
+            "game_versions": hit["versions"],
+            "loaders": project_loaders(i),
+            "versions": [f"V{i:07d}-{k}" for k in range(version_count(i))],
+        }
+
+    def version(self, vid: str) -> dict | None:
+        return make_version(vid, self.url)
+
+    def team(self, tid: str) -> list[dict]:
+        i = _number(tid) or 0
+        return [
+            {"team_id": tid, "user": {"username": f"author{i % 500}"}, "role": "Owner", "is_owner": True}
+        ]
+
+    def project_versions(self, key: str, game_versions: list[str], loaders: list[str]) -> list[dict] | None:
+        """Versions of a project newest first, filtered like /project/{id}/version."""
+        project = self.project(key)
+        if project is None:
+            return None
+        versions = [self.version(vid) for vid in reversed(project["versions"])]
+        return [
+            v
+            for v in versions
+            if (not game_versions or set(game_versions) & set(v["game_versions"]))
+            and (not loaders or set(loaders) & set(v["loaders"]))
+        ]
@@ -0,0 +1,86 @@
+"""Memory held by 100k mods in the old dataclass layout, slotted Mod and ModTable.
+
+Run from the repository root: python -m bench.memory_models [count]
+"""
+import gc
+import sys
+import json
+import random
+import tracemalloc
+from dataclasses import dataclass
+
+from models import Mod, ModTable
+
+
+@dataclass
+class DictMod:
+    """The layout Mod had before it was slotted."""
+
+    slug: str
+    title: str
+    description: str
+    author: str
+    version: str
+    url: str
+    x: float = 0
+    y: float = 0
+    id: str = ""
+
+
+def make_payload(count: int) -> str:
+    rng = random.Random(1)
+    authors = [f"author{i}" for i in range(count // 50 or 1)]
+    versions = [f"1.{i}.{j}" for i in range(21) for j in range(5)]
+    mods = []
+    for i in range(count):
+        slug = f"some-mod-{i}"
+        mods.append(
+            {
+                "slug": slug,
+                "title": f"Some Mod {i}",
+                "description": "Adds a handful of blocks and items to the game.",
+                "author": rng.choice(authors),
+                "version": rng.choice(versions),
+                "url": f"https://modrinth.com/mod/{slug}",
+                "x": rng.random() * 5000,
+                "y": rng.random() * 5000,
+                "id": f"{i:032x}",
+            }
+        )
+    return json.dumps(mods)
+
+
+def measure(build, payload: str) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    # strings come fresh out of the parser for every mod, as when loading a schema
+    data = json.loads(payload)
+    result = build(data)
+    del data
+    gc.collect()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    payload = make_payload(count)
+    layouts = {
+        "dataclass": lambda data: [DictMod(**d) for d in data],
+        "slotted Mod": lambda data: [Mod(**d) for d in data],
+        "ModTable": lambda data: ModTable(Mod(**d) for d in data),
+    }
+    baseline = None
+    for name, build in layouts.items():
+        size, result = measure(build, payload)
+        baseline = baseline or size
+        print(
+            f"{name:12} {size / 1e6:8.1f} MB  {size / count:6.0f} B/mod"
+            f"  {size / baseline:5.2f}x"
+        )
+        del result
+
+
+if __name__ == "__main__":
+    main()
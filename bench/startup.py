@@ -0,0 +1,47 @@
+"""Time from process start to the first shown window, over several cold runs.
+
+Run from the repository root: python -m bench.startup [runs]
+Every run is a fresh interpreter running `main.py --startup-time`.
+"""
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+
+def measure(runs: int) -> list[float]:
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    times = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "main.py", "--startup-time"],
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=60,
+            check=True,
+        ).stdout
+        line = next(line for line in out.splitlines() if line.startswith("startup_ms "))
+        times.append(float(line.split()[1]))
+    return times
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    times = measure(runs)
+    print(
+        json.dumps(
+            {
+                "runs": runs,
+                "median_ms": round(statistics.median(times), 1),
+                "min_ms": round(min(times), 1),
+                "max_ms": round(max(times), 1),
+            }
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
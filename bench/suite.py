@@ -0,0 +1,422 @@
+"""Benchmarks of the app's hot paths against a local fake Modrinth.
+
+Run from the repository root:
+
+    python -m bench.suite --output results.json
+    python -m bench.suite --baseline results.json --threshold 0.25
+
+Every metric is a median wall time in milliseconds, lower is better. With
+--baseline the run exits with status 1 when any metric shared with the
+baseline got slower by more than the threshold (a fraction, 0.25 = 25%)
+and by at least --min-delta milliseconds.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import tempfile
+
+# before anything reads them at import time
+CACHE_DIR = tempfile.mkdtemp(prefix="modpack-bench-")
+os.environ["MODPACK_CACHE_DIR"] = CACHE_DIR
+os.environ.setdefault("MODPACK_TRANSLATOR", "offline")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from .fake_modrinth import FakeModrinth, make_hit
+
+SIZES = (100, 1000, 10_000)
+MODS_PER_CATEGORY = 50
+DROP_SIZES = (50, 500)
+REFINE_HITS = 3000
+# typed one character at a time into the refine box
+REFINE_QUERY = "synthetic mod 12"
+# board size for the resolver, refresh, compatibility and export cases
+PROJECT_MODS = 300
+TARGET = ("1.20.1", "fabric")
+GROUPS = [
+    "api",
+    "search_panel",
+    "board",
+    "storage",
+    "drop",
+    "refine",
+    "resolve",
+    "refresh",
+    "compat",
+    "export",
+    "startup",
+]
+
+
+def timed(fn, repeat: int, setup=None) -> float:
+    """Median milliseconds of `repeat` calls after one warm-up call.
+
+    `setup` runs untimed before each call.
+    """
+    samples = []
+    for run in range(repeat + 1):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        if run:
+            samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def make_board(count: int) -> list:
+    from models import Category, Mod
+
+    categories = []
+    for start in range(0, count, MODS_PER_CATEGORY):
+        index = len(categories)
+        x, y = (index % 10) * 900.0, (index // 10) * 700.0
+        mods = []
+        for i in range(start, min(count, start + MODS_PER_CATEGORY)):
+            hit = make_hit(i)
+            j = i - start
+            mods.append(
+                Mod(
+                    hit["slug"],
+                    hit["title"],
+                    hit["description"],
+                    hit["author"],
+                    hit["latest_version"],
+                    "",
+                    x + 10 + (j % 6) * 140,
+                    y + 30 + (j // 6) * 60,
+                    project_id=hit["project_id"],
+                )
+            )
+        categories.append(Category(f"Category {index}", mods, x, y, 860, 620))
+    return categories
+
+
+def wait_until(app, condition, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("benchmark condition not reached")
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def bench_api(metrics: dict, repeat: int):
+    from modrinth_api import ModrinthAPI, ResponseCache
+
+    queries = [f"query {i}" for i in range(repeat + 1)]
+    api = ModrinthAPI(cache=ResponseCache(path=os.path.join(CACHE_DIR, "api")))
+    pending = iter(queries)
+    # every call is a new query, so each one goes over HTTP
+    metrics["api.search_mods.cold"] = timed(lambda: api.search_mods(next(pending), 20), repeat)
+    metrics["api.search_mods.cached"] = timed(lambda: api.search_mods(queries[0], 20), repeat)
+
+
+def bench_search_panel(app, metrics: dict, repeat: int):
+    from ui.search_panel import SearchPanel
+
+    panel = SearchPanel()
+    # searches have to reach the fake server, not the local index
+    panel.api.index = None
+    panel.resize(420, 900)
+    panel.show()
+    queries = iter(f"panel {i}" for i in range(repeat + 1))
+
+    def first_page():
+        panel.search_edit.setText(next(queries))
+        panel.on_search()
+        wait_until(app, lambda: 0 in panel.model.pages)
+        panel.results_list.viewport().repaint()
+
+    metrics["search_panel.first_page"] = timed(first_page, repeat)
+    metrics["search_panel.repaint"] = timed(panel.results_list.viewport().repaint, repeat)
+
+    def next_page():
+        panel.next_page()
+        wait_until(app, lambda: panel.page in panel.model.pages)
+        panel.results_list.viewport().repaint()
+
+    metrics["search_panel.next_page"] = timed(next_page, repeat)
+
+    def clear():
+        panel.search_edit.blockSignals(True)
+        panel.search_edit.setText("")
+        panel.search_edit.blockSignals(False)
+        panel.on_search()
+
+    def keystroke(query: str):
+        # typed into the box: debounce or cache probe, request, first page painted
+        panel.search_edit.setText(query)
+        wait_until(
+            app,
+            lambda: panel.query_params is not None
+            and panel.query_params[0] == query
+            and 0 in panel.model.pages,
+        )
+        panel.results_list.viewport().repaint()
+
+    typed = [f"keystroke {i}" for i in range(repeat + 1)]
+    pending = iter(typed)
+    metrics["search_panel.keystroke.cold"] = timed(lambda: keystroke(next(pending)), repeat, setup=clear)
+    pending = iter(typed)
+    metrics["search_panel.keystroke.cached"] = timed(lambda: keystroke(next(pending)), repeat, setup=clear)
+    panel.close()
+
+
+def bench_board(app, metrics: dict, repeat: int, sizes):
+    from ui.board import BoardView
+
+    view = BoardView()
+    view.resize(1200, 800)
+    view.show()
+    for size in sizes:
+        board = make_board(size)
+        metrics[f"board.load_from_models.{size}"] = timed(
+            lambda: view.load_from_models(board), repeat, setup=lambda: view.load_from_models([])
+        )
+        view.load_from_models(board, lazy=False)
+        metrics[f"board.to_models.{size}"] = timed(view.to_models, repeat)
+    view.load_from_models([])
+    view.close()
+
+
+def bench_storage(metrics: dict, repeat: int, sizes):
+    from storage import load_schema, save_schema
+
+    for size in sizes:
+        board = make_board(size)
+        for fmt, ext in (("binary", "mpdb"), ("json", "json")):
+            path = os.path.join(CACHE_DIR, f"board-{size}.{ext}")
+            metrics[f"storage.save.{fmt}.{size}"] = timed(lambda: save_schema(board, path, fmt), repeat)
+            metrics[f"storage.load.{fmt}.{size}"] = timed(lambda: load_schema(path), repeat)
+
+
+class _DropEvent:
+    """What BoardScene.dropEvent reads from a drop; Qt has no setters for its own event."""
+
+    def __init__(self, mime, pos):
+        self._mime = mime
+        self._pos = pos
+
+    def mimeData(self):
+        return self._mime
+
+    def scenePos(self):
+        return self._pos
+
+    def acceptProposedAction(self):
+        pass
+
+
+def bench_drop(app, metrics: dict, repeat: int):
+    from PySide6 import QtCore
+    from ui.board import BoardView
+    from ui.mime import MOD_MIME, decode_mods, mods_mime
+
+    view = BoardView()
+    scene = view.scene()
+    for size in DROP_SIZES:
+        hits = [make_hit(i) for i in range(100_000, 100_000 + size)]
+        mime = mods_mime(hits)
+        data = mime.data(MOD_MIME).data()
+        metrics[f"drop.decode.{size}"] = timed(lambda: decode_mods(data), repeat)
+
+        def drop():
+            scene.dropEvent(_DropEvent(mime, QtCore.QPointF(0, 0)))
+
+        metrics[f"drop.event.{size}"] = timed(drop, repeat, setup=lambda: view.load_from_models([]))
+    view.load_from_models([])
+
+
+def bench_refine(metrics: dict, repeat: int):
+    from refine import DOWNLOADS, FOLLOWS, RefineIndex
+    from ui.search_panel import LOADERS
+
+    hits = [make_hit(i) for i in range(REFINE_HITS)]
+    index = RefineIndex(LOADERS)
+
+    def build():
+        index.clear()
+        for start in range(0, len(hits), 20):
+            index.add(hits[start : start + 20])
+
+    metrics[f"refine.build.{REFINE_HITS}"] = timed(build, repeat)
+    prefixes = [REFINE_QUERY[:n] for n in range(1, len(REFINE_QUERY) + 1)]
+
+    def typing():
+        for text in prefixes:
+            index.refine(text, sort=(DOWNLOADS,), loaders=("fabric",))
+
+    # per keystroke
+    metrics[f"refine.keystroke.{REFINE_HITS}"] = round(timed(typing, repeat) / len(prefixes), 3)
+    metrics[f"refine.sort.{REFINE_HITS}"] = timed(lambda: index.refine(sort=(FOLLOWS, DOWNLOADS)), repeat)
+
+
+def _fresh_api():
+    """An API client with an empty response cache, so every request goes over HTTP."""
+    from modrinth_api import ModrinthAPI, ResponseCache
+
+    return ModrinthAPI(cache=ResponseCache(path=tempfile.mkdtemp(dir=CACHE_DIR)))
+
+
+def _timed_cold_warm(metrics: dict, name: str, repeat: int, fn):
+    """`fn(api)` with an empty response cache (`name`.cold) and a filled one (`name`.cached)."""
+    apis = []
+    metrics[f"{name}.cold"] = timed(lambda: fn(apis[-1]), repeat, setup=lambda: apis.append(_fresh_api()))
+    api = apis[-1]
+    metrics[f"{name}.cached"] = timed(lambda: fn(api), repeat)
+
+
+def bench_resolve(metrics: dict, repeat: int):
+    from resolver import Resolver
+
+    mods = [mod for cat in make_board(PROJECT_MODS) for mod in cat.mods]
+
+    def resolve(api):
+        graph = Resolver(api, *TARGET).resolve(mods)
+        # the fake's dependencies reach beyond the board
+        assert graph.missing(), "fake dependencies were not followed"
+
+    _timed_cold_warm(metrics, f"resolve.{PROJECT_MODS}", repeat, resolve)
+
+
+def bench_refresh(metrics: dict, repeat: int):
+    from refresh import MetadataRefresher
+
+    board = make_board(PROJECT_MODS)
+    _timed_cold_warm(
+        metrics, f"refresh.latest.{PROJECT_MODS}", repeat, lambda api: MetadataRefresher(api).check(board)
+    )
+    _timed_cold_warm(
+        metrics,
+        f"refresh.target.{PROJECT_MODS}",
+        repeat,
+        lambda api: MetadataRefresher(api, *TARGET).check(board),
+    )
+
+
+def bench_compat(metrics: dict, repeat: int):
+    from compat import CompatSource
+    from resolver import mod_key
+
+    keys = [mod_key(mod) for cat in make_board(PROJECT_MODS) for mod in cat.mods]
+    _timed_cold_warm(metrics, f"compat.fetch.{PROJECT_MODS}", repeat, lambda api: CompatSource(api).fetch(keys))
+
+
+def bench_export(metrics: dict, repeat: int):
+    from mrpack import FileCache, export_mrpack
+
+    board = make_board(PROJECT_MODS)
+    path = os.path.join(CACHE_DIR, "bench.mrpack")
+    caches = []
+
+    def export(download: bool):
+        export_mrpack(path, board, _fresh_api(), *TARGET, download=download, cache=caches[-1])
+
+    new_cache = lambda: caches.append(FileCache(tempfile.mkdtemp(dir=CACHE_DIR)))
+    metrics[f"export.index.{PROJECT_MODS}"] = timed(lambda: export(False), repeat, setup=new_cache)
+    metrics[f"export.download.{PROJECT_MODS}"] = timed(lambda: export(True), repeat, setup=new_cache)
+
+
+def bench_startup(metrics: dict, runs: int):
+    from .startup import measure
+
+    metrics["startup.first_window"] = round(statistics.median(measure(runs)), 3)
+
+
+def compare(metrics: dict, baseline: dict, threshold: float, min_delta: float) -> list[dict]:
+    regressions = []
+    for name, value in metrics.items():
+        base = baseline.get(name)
+        # sub-millisecond differences are timer noise, not regressions
+        if not base or value - base < min_delta:
+            continue
+        change = value / base - 1
+        if change > threshold:
+            regressions.append({"metric": name, "baseline": base, "value": value, "change": round(change, 3)})
+    return regressions
+
+
+def run(args) -> dict:
+    from PySide6 import QtWidgets
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    fake = FakeModrinth(latency=args.latency / 1000, total_hits=args.total_hits)
+    fake.start()
+    metrics: dict[str, float] = {}
+    groups = set(args.only or GROUPS)
+    try:
+        if "api" in groups:
+            bench_api(metrics, args.repeat)
+        if "search_panel" in groups:
+            bench_search_panel(app, metrics, args.repeat)
+        if "board" in groups:
+            bench_board(app, metrics, args.repeat, args.sizes)
+        if "storage" in groups:
+            bench_storage(metrics, args.repeat, args.sizes)
+        if "drop" in groups:
+            bench_drop(app, metrics, args.repeat)
+        if "refine" in groups:
+            bench_refine(metrics, args.repeat)
+        if "resolve" in groups:
+            bench_resolve(metrics, args.repeat)
+        if "refresh" in groups:
+            bench_refresh(metrics, args.repeat)
+        if "compat" in groups:
+            bench_compat(metrics, args.repeat)
+        if "export" in groups:
+            bench_export(metrics, args.repeat)
+        if "startup" in groups:
+            bench_startup(metrics, args.repeat)
+    finally:
+        fake.stop()
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency_ms": args.latency,
+        "repeat": args.repeat,
+        "metrics": metrics,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.suite", description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the results here as well as to stdout")
+    parser.add_argument("--baseline", help="results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument(
+        "--min-delta", type=float, default=1.0, help="ignore slowdowns smaller than this many ms"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=20, help="fake server latency in ms")
+    parser.add_argument("--total-hits", type=int, default=10_000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--only", nargs="+", choices=GROUPS)
+    args = parser.parse_args(argv)
+    try:
+        results = run(args)
+    finally:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    status = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["metrics"]
+        results["threshold"] = args.threshold
+        results["regressions"] = compare(
+            results["metrics"], baseline, args.threshold, args.min_delta
+        )
+        status = 1 if results["regressions"] else 0
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
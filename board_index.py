@@ -0,0 +1,173 @@
+"""Lookups over the mods on a board without walking the scene.
+
+Kept up to date by the board as mods and categories come and go. Exact
+keys (slug, project id, author, category) are dict lookups; text search
+bisects a sorted list of (word, mod id) pairs, built on the first search
+and kept sorted by insertion from then on.
+"""
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Iterable
+
+from models import Category, Mod
+
+WORD = re.compile(r"\w+")
+
+
+def _words(mod: Mod) -> set[str]:
+    text = f"{mod.title} {mod.slug} {mod.author}".lower()
+    return set(WORD.findall(text)) | {mod.slug.lower(), mod.project_id.lower()} - {""}
+
+
+class BoardIndex:
+    def __init__(self):
+        self.categories: dict[str, Category] = {}
+        # mod id -> (mod, category id)
+        self.mods: dict[str, tuple[Mod, str]] = {}
+        # mod id -> (slug, project id, author) it is filed under, which stay
+        # behind when a refresh changes the mod until it is reindexed
+        self._keys: dict[str, tuple[str, str, str]] = {}
+        # key -> mod ids, dicts keep the insertion order of a set
+        self.by_slug: defaultdict[str, dict[str, None]] = defaultdict(dict)
+        self.by_project: defaultdict[str, dict[str, None]] = defaultdict(dict)
+        self.by_author: defaultdict[str, dict[str, None]] = defaultdict(dict)
+        self.by_category: defaultdict[str, dict[str, None]] = defaultdict(dict)
+        # sorted (word, mod id); None until the first search needs it
+        self._words: list[tuple[str, str]] | None = None
+        self._mod_words: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.mods)
+
+    def __contains__(self, mod_id: str) -> bool:
+        return mod_id in self.mods
+
+    def clear(self):
+        self.__init__()
+
+    def add_category(self, category: Category):
+        self.categories[category.id] = category
+        self.add_mods(category.mods, category.id)
+
+    def remove_category(self, category_id: str):
+        for mod_id in list(self.by_category.get(category_id, ())):
+            self._remove(mod_id)
+        self.by_category.pop(category_id, None)
+        self.categories.pop(category_id, None)
+
+    def add_mods(self, mods: Iterable[Mod], category_id: str):
+        for mod in mods:
+            if mod.id in self.mods:
+                self._remove(mod.id)
+            author = mod.author.lower()
+            self.mods[mod.id] = (mod, category_id)
+            self._keys[mod.id] = (mod.slug, mod.project_id, author)
+            self.by_slug[mod.slug][mod.id] = None
+            if mod.project_id:
+                self.by_project[mod.project_id][mod.id] = None
+            if author:
+                self.by_author[author][mod.id] = None
+            self.by_category[category_id][mod.id] = None
+            words = self._mod_words[mod.id] = _words(mod)
+            if self._words is not None:
+                for word in words:
+                    insort(self._words, (word, mod.id))
+
+    def remove_mods(self, mods: Iterable[Mod]):
+        for mod in mods:
+            self._remove(mod.id)
+
+    def reindex(self, mods: Iterable[Mod]):
+        """Pick up changed slugs, project ids, titles or authors."""
+        for mod in mods:
+            entry = self.mods.get(mod.id)
+            if entry is not None:
+                self.add_mods([mod], entry[1])
+
+    def _remove(self, mod_id: str):
+        entry = self.mods.pop(mod_id, None)
+        if entry is None:
+            return
+        slug, project_id, author = self._keys.pop(mod_id)
+        for table, key in (
+            (self.by_slug, slug),
+            (self.by_project, project_id),
+            (self.by_author, author),
+            (self.by_category, entry[1]),
+        ):
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.pop(mod_id, None)
+                if not bucket:
+                    del table[key]
+        words = self._mod_words.pop(mod_id)
+        if self._words is not None:
+            for word in words:
+                i = bisect_left(self._words, (word, mod_id))
+                if i < len(self._words) and self._words[i] == (word, mod_id):
+                    del self._words[i]
+
+    def _mods(self, ids: Iterable[str]) -> list[Mod]:
+        return [self.mods[mod_id][0] for mod_id in ids if mod_id in self.mods]
+
+    def category_of(self, mod: Mod) -> Category | None:
+        entry = self.mods.get(mod.id)
+        return self.categories.get(entry[1]) if entry else None
+
+    def with_slug(self, slug: str) -> list[Mod]:
+        return self._mods(self.by_slug.get(slug, ()))
+
+    def with_project(self, project_id: str) -> list[Mod]:
+        return self._mods(self.by_project.get(project_id, ()))
+
+    def with_author(self, author: str) -> list[Mod]:
+        return self._mods(self.by_author.get(author.lower(), ()))
+
+    def in_category(self, category_id: str) -> list[Mod]:
+        return self._mods(self.by_category.get(category_id, ()))
+
+    def has(self, project_id: str, slug: str) -> bool:
+        """Whether the board has a mod of this project, by id or, failing that, slug."""
+        return bool(project_id and project_id in self.by_project) or slug in self.by_slug
+
+    def existing(self, mod: Mod) -> list[Mod]:
+        """Mods already on the board that are the same Modrinth project as `mod`."""
+        found = self.with_project(mod.project_id) if mod.project_id else []
+        return found or [other for other in self.with_slug(mod.slug) if other.id != mod.id]
+
+    def duplicates(self, mods: Iterable[Mod]) -> tuple[list[Mod], list[Mod]]:
+        """Split `mods` into new ones and ones the board (or `mods` itself) already has."""
+        fresh, dup = [], []
+        seen: set[str] = set()
+        for mod in mods:
+            keys = {mod.slug, mod.project_id} - {""}
+            if keys & seen or self.existing(mod):
+                dup.append(mod)
+            else:
+                fresh.append(mod)
+            seen |= keys
+        return fresh, dup
+
+    def find(self, text: str, limit: int | None = None) -> list[Mod]:
+        """Mods with a word of their title, slug or author starting with each word of `text`."""
+        words = WORD.findall(text.lower())
+        if not words:
+            return []
+        if self._words is None:
+            self._words = sorted(
+                (word, mod_id) for mod_id, words in self._mod_words.items() for word in words
+            )
+        matches: set[str] | None = None
+        for word in words:
+            ids = set()
+            i = bisect_left(self._words, (word, ""))
+            while i < len(self._words) and self._words[i][0].startswith(word):
+                ids.add(self._words[i][1])
+                i += 1
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+        # a fixed order, so stepping through the matches is stable
+        found = sorted((self.mods[mod_id][0] for mod_id in matches), key=lambda m: (m.title.lower(), m.id))
+        return found[:limit] if limit else found
@@ -0,0 +1,236 @@
+"""Headless entry point: build, validate, refresh, convert and search schemas.
+
+Never imports PySide6, so it runs without a display:
+
+    python cli.py build slugs.txt -o pack.mpdb
+    python cli.py validate pack.mpdb --game-version 1.20.1 --loader fabric
+"""
+import sys
+import json
+import argparse
+
+import requests
+
+from http_scheduler import RequestScheduler
+from layout import auto_layout
+from models import Category, Mod
+from modrinth_api import ModrinthAPI
+from refresh import MetadataRefresher, apply_updates, refresh_schema
+from resolver import Resolver, mod_key
+from storage import convert_schema, load_schema, save_schema
+
+EXIT_OK = 0
+# validation found problems, or refresh found updates it did not apply
+EXIT_PROBLEMS = 1
+# bad arguments, as argparse reports them
+EXIT_USAGE = 2
+EXIT_IO = 3
+EXIT_NETWORK = 4
+
+
+def make_api(args) -> ModrinthAPI:
+    return ModrinthAPI(scheduler=RequestScheduler(workers=args.workers))
+
+
+def emit(args, data, text: str):
+    if args.json:
+        json.dump(data, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    elif text:
+        print(text)
+
+
+def shorten(value, limit: int = 3) -> str:
+    if not isinstance(value, list):
+        return str(value)
+    text = ", ".join(value[:limit])
+    return text + f" and {len(value) - limit} more" if len(value) > limit else text
+
+
+def read_slugs(path: str) -> list[str]:
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    with f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return list(dict.fromkeys(line for line in lines if line))
+
+
+def grid_category(name: str, mods: list[Mod]) -> Category:
+    """One category with `mods` laid out as the board's auto layout would."""
+    cat = Category(name=name, mods=mods)
+    auto_layout([cat])
+    return cat
+
+
+def cmd_build(args) -> int:
+    slugs = read_slugs(args.slugs)
+    # a bare slug is enough for the refresher to fill in everything else
+    mods = [Mod(slug, slug, "", "", "", "") for slug in slugs]
+    refresher = MetadataRefresher(
+        make_api(args), args.game_version, args.loader, workers=args.workers
+    )
+    report = refresher.check([Category(name=args.category, mods=mods)])
+    apply_updates([Category(name=args.category, mods=mods)], report.updates)
+    unknown = set(report.unknown)
+    category = grid_category(args.category, [mod for mod in mods if mod.project_id])
+    save_schema([category], args.output, args.format)
+    emit(
+        args,
+        {"output": args.output, "mods": len(category.mods), "unknown": sorted(unknown)},
+        f"{args.output}: {len(category.mods)} mods"
+        + (f", not found: {', '.join(sorted(unknown))}" if unknown else ""),
+    )
+    return EXIT_PROBLEMS if unknown and not args.allow_missing else EXIT_OK
+
+
+def cmd_validate(args) -> int:
+    categories = load_schema(args.schema)
+    problems = []
+    seen: dict[str, str] = {}
+    for cat in categories:
+        for mod in cat.mods:
+            key = mod_key(mod)
+            if not key:
+                problems.append({"kind": "no_id", "mod": mod.title, "category": cat.name})
+            elif key in seen:
+                problems.append(
+                    {"kind": "duplicate", "mod": mod.title, "category": cat.name, "first": seen[key]}
+                )
+            else:
+                seen[key] = cat.name
+    if args.game_version and args.loader:
+        resolver = Resolver(make_api(args), args.game_version, args.loader, workers=args.workers)
+        graph = resolver.resolve([mod for cat in categories for mod in cat.mods])
+        for key in graph.unknown:
+            problems.append({"kind": "unknown", "mod": key})
+        for project in graph.unavailable():
+            problems.append({"kind": "no_version", "mod": project.title})
+        for a, b in graph.conflicts():
+            problems.append(
+                {"kind": "conflict", "mod": graph.projects[a].title, "with": graph.projects[b].title}
+            )
+        for project in graph.missing():
+            required_by = sorted(graph.projects[pid].title for pid in project.required_by)
+            problems.append(
+                {"kind": "missing", "mod": project.title, "required_by": required_by}
+            )
+    lines = [
+        f"{p['kind']}: {p['mod']}"
+        + "".join(f", {k}: {shorten(v)}" for k, v in p.items() if k not in ("kind", "mod"))
+        for p in problems
+    ]
+    mods = sum(len(cat.mods) for cat in categories)
+    lines.append(f"{args.schema}: {mods} mods, {len(problems)} problems")
+    emit(args, {"schema": args.schema, "mods": mods, "problems": problems}, "\n".join(lines))
+    return EXIT_PROBLEMS if problems else EXIT_OK
+
+
+def cmd_refresh(args) -> int:
+    report = refresh_schema(
+        args.schema,
+        make_api(args),
+        apply=args.apply,
+        game_version=args.game_version,
+        loader=args.loader,
+        workers=args.workers,
+    )
+    emit(
+        args,
+        {
+            "schema": args.schema,
+            "checked": report.checked,
+            "applied": bool(args.apply),
+            "unknown": report.unknown,
+            "updates": [
+                {"mod": u.title, "id": u.mod_id, "changes": {k: list(v) for k, v in u.changes.items()}}
+                for u in report.updates
+            ],
+        },
+        "\n".join(
+            filter(
+                None,
+                [
+                    report.describe(),
+                    f"{args.schema}: {len(report.updates)} of {report.checked} mods changed"
+                    + (", applied" if args.apply and report.updates else ""),
+                ],
+            )
+        ),
+    )
+    return EXIT_PROBLEMS if report.updates and not args.apply else EXIT_OK
+
+
+def cmd_convert(args) -> int:
+    convert_schema(args.source, args.destination, args.format)
+    emit(args, {"source": args.source, "destination": args.destination}, "")
+    return EXIT_OK
+
+
+def cmd_search(args) -> int:
+    data = make_api(args).search(
+        args.query, args.limit, args.offset, args.versions or None, args.loaders or None
+    )
+    lines = [f"{hit.get('slug')}\t{hit.get('title')}\t{hit.get('downloads', 0)}" for hit in data["hits"]]
+    emit(args, data, "\n".join(lines))
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="modpack-designer", description=__doc__.splitlines()[0])
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent requests (default 8)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def target(p):
+        p.add_argument("--game-version")
+        p.add_argument("--loader", choices=["fabric", "forge", "quilt", "neoforge"])
+
+    p = sub.add_parser("build", help="build a schema from a list of slugs or project ids")
+    p.add_argument("slugs", help="file with one slug per line, - for stdin")
+    p.add_argument("-o", "--output", required=True)
+    p.add_argument("--category", default="Mods")
+    p.add_argument("--format", choices=["json", "binary"])
+    p.add_argument("--allow-missing", action="store_true", help="exit 0 even if slugs are unknown")
+    target(p)
+    p.set_defaults(func=cmd_build)
+
+    p = sub.add_parser("validate", help="check a schema, with a target also its dependencies")
+    p.add_argument("schema")
+    target(p)
+    p.set_defaults(func=cmd_validate)
+
+    p = sub.add_parser("refresh", help="compare a schema with current Modrinth data")
+    p.add_argument("schema")
+    p.add_argument("--apply", action="store_true", help="write the updates into the schema")
+    target(p)
+    p.set_defaults(func=cmd_refresh)
+
+    p = sub.add_parser("convert", help="convert a schema between JSON and binary")
+    p.add_argument("source")
+    p.add_argument("destination")
+    p.add_argument("--format", choices=["json", "binary"])
+    p.set_defaults(func=cmd_convert)
+
+    p = sub.add_parser("search", help="search Modrinth")
+    p.add_argument("query")
+    p.add_argument("--limit", type=int, default=20)
+    p.add_argument("--offset", type=int, default=0)
+    p.add_argument("--versions", nargs="*", default=[])
+    p.add_argument("--loaders", nargs="*", default=[])
+    p.set_defaults(func=cmd_search)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except requests.RequestException as exc:
+        print(f"network error: {exc}", file=sys.stderr)
+        return EXIT_NETWORK
+    except (OSError, ValueError, KeyError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return EXIT_IO
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import re
+from typing import Iterable
+
+import numpy as np
+
+from resolver import Resolver
+
+# game versions offered as migration targets; snapshots and pre-releases are left out
+RELEASE_VERSION = re.compile(r"^\d+\.\d+(\.\d+)?$")
+
+
+def version_key(version: str) -> tuple:
+    return tuple(int(part) for part in version.split("."))
+
+
+class CompatMatrix:
+    """Boolean support matrix of mods × game versions × loaders.
+
+    Rows are added and removed one mod at a time; a removed row is filled
+    with the last one so the live rows stay contiguous. Axes grow by
+    doubling as unseen versions or loaders show up. Every query is a
+    reduction over the live rows.
+    """
+
+    def __init__(self, versions: Iterable[str] = (), loaders: Iterable[str] = ()):
+        self.keys: list[str] = []
+        self.rows: dict[str, int] = {}
+        self.versions: list[str] = []
+        self.loaders: list[str] = []
+        self._version_index: dict[str, int] = {}
+        self._loader_index: dict[str, int] = {}
+        self.support = np.zeros((16, 16, 4), dtype=bool)
+        for version in versions:
+            self._axis_index(version, self.versions, self._version_index, 1)
+        for loader in loaders:
+            self._axis_index(loader, self.loaders, self._loader_index, 2)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.rows
+
+    def _grow(self, axis: int, needed: int):
+        size = self.support.shape[axis]
+        if needed <= size:
+            return
+        shape = list(self.support.shape)
+        shape[axis] = max(needed, size * 2)
+        grown = np.zeros(shape, dtype=bool)
+        a, b, c = self.support.shape
+        grown[:a, :b, :c] = self.support
+        self.support = grown
+
+    def _axis_index(self, name: str, names: list[str], index: dict[str, int], axis: int) -> int:
+        idx = index.get(name)
+        if idx is None:
+            idx = index[name] = len(names)
+            names.append(name)
+            self._grow(axis, len(names))
+        return idx
+
+    def set_mod(self, key: str, pairs: Iterable[tuple[str, str]]):
+        """Add `key` or replace its row with the (game version, loader) pairs it supports."""
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = len(self.keys)
+            self.keys.append(key)
+            self._grow(0, len(self.keys))
+        vi = []
+        li = []
+        for version, loader in pairs:
+            vi.append(self._axis_index(version, self.versions, self._version_index, 1))
+            li.append(self._axis_index(loader, self.loaders, self._loader_index, 2))
+        self.support[row] = False
+        if vi:
+            self.support[row, vi, li] = True
+
+    def remove_mod(self, key: str):
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        last = len(self.keys) - 1
+        if row != last:
+            moved = self.keys[last]
+            self.support[row] = self.support[last]
+            self.keys[row] = moved
+            self.rows[moved] = row
+        self.support[last] = False
+        self.keys.pop()
+
+    def clear(self):
+        self.support[: len(self.keys)] = False
+        self.keys.clear()
+        self.rows.clear()
+
+    def _live(self, loader: str | None) -> np.ndarray:
+        """(mods, versions) support for one loader, or for any loader."""
+        live = self.support[: len(self.keys), : len(self.versions), : len(self.loaders)]
+        if loader is None:
+            return live.any(axis=2)
+        li = self._loader_index.get(loader)
+        if li is None:
+            return np.zeros(live.shape[:2], dtype=bool)
+        return live[:, :, li]
+
+    def blocker_counts(self, loader: str | None = None) -> dict[str, int]:
+        """Game version -> number of mods that do not support it."""
+        counts = len(self.keys) - self._live(loader).sum(axis=0)
+        return dict(zip(self.versions, counts.tolist()))
+
+    def supported(self, loader: str | None = None) -> list[str]:
+        """Game versions every mod supports."""
+        everywhere = self._live(loader).all(axis=0)
+        return [self.versions[i] for i in np.flatnonzero(everywhere)]
+
+    def blocking(self, version: str, loader: str | None = None) -> list[str]:
+        """Mods that keep the board from moving to `version`."""
+        vi = self._version_index.get(version)
+        if vi is None:
+            return list(self.keys)
+        return [self.keys[i] for i in np.flatnonzero(~self._live(loader)[:, vi])]
+
+
+class CompatSource:
+    """(game version, loader) pairs supported by Modrinth projects.
+
+    Projects come in bulk through a Resolver, sharing what it already
+    fetched. A project with a single loader supports it on each of the
+    project's game versions; only projects with several loaders need their
+    versions to tell which loader goes with which game version, and those
+    come in bulk too.
+    """
+
+    def __init__(self, api, resolver: Resolver | None = None, workers: int = 8):
+        self.resolver = resolver or Resolver(api, "", "", workers=workers)
+        self._pairs: dict[str, frozenset] = {}
+
+    def cached(self, key: str) -> frozenset | None:
+        return self._pairs.get(key)
+
+    def fetch(self, keys: Iterable[str]) -> dict[str, frozenset]:
+        """Pairs for every key Modrinth knows; unknown keys are left out.
+
+        A failed request raises, so that the keys can be tried again.
+        """
+        keys = list(dict.fromkeys(keys))
+        result = {key: self._pairs[key] for key in keys if key in self._pairs}
+        missing = [key for key in keys if key not in result]
+        if not missing:
+            return result
+        projects = self.resolver.projects(missing)
+        mixed = [p for p in projects.values() if len(p.get("loaders") or ()) > 1]
+        versions = self.resolver.versions(vid for p in mixed for vid in p.get("versions", ()))
+        for key, project in projects.items():
+            loaders = project.get("loaders") or ()
+            if len(loaders) > 1:
+                pairs = frozenset(
+                    (game_version, loader)
+                    for vid in project.get("versions", ())
+                    if vid in versions
+                    for game_version in versions[vid].get("game_versions", ())
+                    for loader in versions[vid].get("loaders", ())
+                )
+            else:
+                pairs = frozenset(
+                    (game_version, loader)
+                    for game_version in project.get("game_versions", ())
+                    for loader in loaders
+                )
+            self._pairs[key] = result[key] = pairs
+        return result
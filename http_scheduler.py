@@ -0,0 +1,249 @@
+import time
+import heapq
+import random
+import weakref
+import itertools
+import threading
+from concurrent.futures import Future
+from urllib.parse import urlsplit
+
+INTERACTIVE = 0
+NORMAL = 1
+BACKGROUND = 2
+
+TIMEOUT = 15
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class TokenBucket:
+    """Paces requests to one host; refilled continuously at `rate` per second.
+
+    Modrinth reports the remaining budget of its rate-limit window in every
+    response, `update` clamps the bucket to it so we slow down before a 429.
+    """
+
+    def __init__(self, rate: float = 20.0, capacity: float = 40.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.blocked_until = 0.0
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def reserve(self) -> float:
+        """Take a token and return how long the caller has to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = max(0.0, -self.tokens / self.rate, self.blocked_until - now)
+            return wait
+
+    def update(self, headers):
+        remaining = headers.get("X-Ratelimit-Remaining")
+        reset = headers.get("X-Ratelimit-Reset")
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining = int(remaining)
+            reset = float(reset)
+        except ValueError:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = min(self.tokens, remaining)
+            if remaining <= 0:
+                self.blocked_until = now + reset
+            elif reset > 0:
+                # spread what is left of the window over the time until it resets
+                self.rate = max(0.5, min(self.capacity, remaining / reset))
+
+    def block(self, seconds: float):
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class _Job:
+    __slots__ = ("method", "url", "kwargs", "priority", "cancel", "owner", "alive", "future")
+
+    def __init__(self, method, url, kwargs, priority, cancel, owner, alive):
+        self.method = method
+        self.url = url
+        self.kwargs = kwargs
+        self.priority = priority
+        self.cancel = cancel
+        self.owner = weakref.ref(owner) if owner is not None else None
+        self.alive = alive
+        self.future: Future = Future()
+
+    def wanted(self) -> bool:
+        if self.cancel is not None and self.cancel.is_set():
+            return False
+        if self.owner is not None and self.owner() is None:
+            return False
+        return self.alive is None or self.alive()
+
+
+class RequestScheduler:
+    """Single queue for all outgoing HTTP.
+
+    Jobs are served by priority class. One worker is always kept free of
+    BACKGROUND jobs so an interactive request never waits behind icons.
+    Queued jobs whose `cancel` event is set, whose `owner` was garbage
+    collected or whose `alive()` returns False are dropped unsent.
+    """
+
+    def __init__(
+        self,
+        workers: int = 6,
+        pool_size: int = 8,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+    ):
+        self.workers = workers
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._sessions: dict = {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._queue: list = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._background_running = 0
+
+    def session(self, host: str) -> "requests.Session":
+        # requests is imported on first use, it is a large part of startup time
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        with self._cond:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._cond:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket()
+            return bucket
+
+    def submit(
+        self,
+        method: str,
+        url: str,
+        priority: int = NORMAL,
+        cancel: threading.Event | None = None,
+        owner=None,
+        alive=None,
+        **kwargs,
+    ) -> Future:
+        job = _Job(method, url, kwargs, priority, cancel, owner, alive)
+        with self._cond:
+            heapq.heappush(self._queue, (priority, next(self._seq), job))
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._cond.notify()
+        return job.future
+
+    def request(self, method: str, url: str, **kwargs) -> "requests.Response":
+        return self.submit(method, url, **kwargs).result()
+
+    def get(self, url: str, **kwargs) -> "requests.Response":
+        return self.request("GET", url, **kwargs)
+
+    def _next_job(self) -> _Job:
+        with self._cond:
+            while True:
+                if self._queue:
+                    priority, _seq, job = self._queue[0]
+                    background_full = self._background_running >= max(1, self.workers - 1)
+                    if priority < BACKGROUND or not background_full:
+                        heapq.heappop(self._queue)
+                        if priority == BACKGROUND:
+                            self._background_running += 1
+                        return job
+                self._cond.wait()
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            try:
+                if not job.wanted():
+                    job.future.set_exception(RequestCancelled(job.url))
+                else:
+                    job.future.set_result(self._perform(job))
+            except BaseException as exc:
+                job.future.set_exception(exc)
+            finally:
+                if job.priority == BACKGROUND:
+                    with self._cond:
+                        self._background_running -= 1
+                        self._cond.notify_all()
+
+    def _perform(self, job: _Job) -> "requests.Response":
+        import requests
+
+        host = urlsplit(job.url).netloc
+        session = self.session(host)
+        bucket = self.bucket(host)
+        kwargs = dict(job.kwargs)
+        kwargs.setdefault("timeout", TIMEOUT)
+        attempt = 0
+        while True:
+            wait = bucket.reserve()
+            if wait:
+                time.sleep(wait)
+            if not job.wanted():
+                raise RequestCancelled(job.url)
+            try:
+                response = session.request(job.method, job.url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                response = None
+            if response is not None:
+                bucket.update(response.headers)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                retry_after = response.headers.get("Retry-After") or response.headers.get(
+                    "X-Ratelimit-Reset"
+                )
+                response.close()
+                if response.status_code == 429 and retry_after:
+                    try:
+                        bucket.block(float(retry_after))
+                    except ValueError:
+                        pass
+            attempt += 1
+            # full jitter keeps retrying clients from synchronising
+            time.sleep(random.uniform(0, self.backoff * 2**attempt))
+
+
+_shared: RequestScheduler | None = None
+_shared_lock = threading.Lock()
+
+
+def get_scheduler() -> RequestScheduler:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RequestScheduler()
+        return _shared
@@ -0,0 +1,205 @@
+import os
+import json
+import threading
+from typing import Iterable, Iterator, List
+
+from models import MOD_FIELDS, Category, Mod
+from storage import load_schema, save_schema, schema_format
+
+JOURNAL_SUFFIX = ".journal"
+ROTATED_SUFFIX = ".journal.old"
+BATCH_SIZE = 64
+
+
+def read_records(path: str) -> Iterator[dict]:
+    try:
+        f = open(path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # the tail of a write interrupted by a crash
+                return
+
+
+def apply_records(categories: List[Category], records: Iterable[dict]) -> List[Category]:
+    """Replay journal records on top of `categories`.
+
+    Every record is idempotent, so replaying records that already made it
+    into the schema file leaves it unchanged.
+    """
+    cats = {cat.id: cat for cat in categories}
+    mods = {mod.id: (mod, cat) for cat in categories for mod in cat.mods}
+    for record in records:
+        op = record.get("op")
+        target = record.get("id")
+        if op == "add_category":
+            cat = Category.from_dict(record["category"])
+            if cat.id not in cats:
+                cats[cat.id] = cat
+                for mod in cat.mods:
+                    mods[mod.id] = (mod, cat)
+        elif op == "add_mod":
+            cat = cats.get(record["category"])
+            mod = Mod(**record["mod"])
+            if cat is not None and mod.id not in mods:
+                cat.mods.append(mod)
+                mods[mod.id] = (mod, cat)
+        elif op == "move":
+            if target in cats:
+                cat = cats[target]
+                dx, dy = record["x"] - cat.x, record["y"] - cat.y
+                for mod in cat.mods:
+                    mod.x += dx
+                    mod.y += dy
+                cat.x, cat.y = record["x"], record["y"]
+            elif target in mods:
+                mod = mods[target][0]
+                mod.x, mod.y = record["x"], record["y"]
+        elif op == "resize":
+            if target in cats:
+                cats[target].width = record["width"]
+                cats[target].height = record["height"]
+        elif op == "recolor":
+            if target in cats:
+                cats[target].color = record["color"]
+        elif op == "update":
+            if target in mods:
+                mod = mods[target][0]
+                for name, value in record["fields"].items():
+                    if name in MOD_FIELDS and name not in ("id", "x", "y"):
+                        setattr(mod, name, value)
+        elif op == "delete":
+            if target in cats:
+                for mod in cats.pop(target).mods:
+                    mods.pop(mod.id, None)
+            elif target in mods:
+                mod, cat = mods.pop(target)
+                cat.mods = [m for m in cat.mods if m.id != target]
+    return list(cats.values())
+
+
+class Journal:
+    """Append-only log of board edits kept next to a schema file.
+
+    Records are written as JSON lines and fsynced once per batch, so the
+    cost of an autosave follows the size of the edit, not of the board.
+    `rotate` hands the records written so far to `compact`, which folds
+    them into the schema file and may run on a worker thread while new
+    records keep being appended.
+    """
+
+    def __init__(self, path: str, batch_size: int = BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.rotated_path = path + ROTATED_SUFFIX
+        self.written = sum(1 for _ in read_records(self.journal_path))
+        self._pending: list[str] = []
+        self._file = None
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+
+    def has_changes(self) -> bool:
+        return self.written > 0 or bool(self._pending) or os.path.exists(self.rotated_path)
+
+    def append(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._pending.append(line)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+            self._file = open(self.journal_path, "a", encoding="utf-8")
+        self._file.write("\n".join(self._pending) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.written += len(self._pending)
+        self._pending.clear()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._close_file()
+
+    def load(self) -> List[Category]:
+        """The schema file with every journaled edit applied."""
+        self.flush()
+        categories = load_schema(self.path) if os.path.exists(self.path) else []
+        categories = apply_records(categories, read_records(self.rotated_path))
+        return apply_records(categories, read_records(self.journal_path))
+
+    def rotate(self) -> bool:
+        """Set the records written so far aside for `compact`.
+
+        Returns False when there is nothing to compact.
+        """
+        with self._lock:
+            if os.path.exists(self.rotated_path):
+                # a previous compaction did not finish
+                return True
+            self._flush()
+            if not self.written:
+                return False
+            self._close_file()
+            os.replace(self.journal_path, self.rotated_path)
+            self.written = 0
+            return True
+
+    def compact(self):
+        """Fold the rotated records into the schema file; needs no Qt."""
+        with self._compact_lock:
+            if not os.path.exists(self.rotated_path):
+                return
+            categories = load_schema(self.path) if os.path.exists(self.path) else []
+            categories = apply_records(categories, read_records(self.rotated_path))
+            self._replace(categories)
+            os.remove(self.rotated_path)
+
+    def save(self, categories: Iterable[Category]):
+        """Write the full schema and drop the records it supersedes."""
+        with self._compact_lock:
+            self._replace(categories)
+            with self._lock:
+                self._pending.clear()
+                self._close_file()
+                self.written = 0
+                for path in (self.journal_path, self.rotated_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def discard(self):
+        """Forget the journal and the schema file it belongs to."""
+        with self._compact_lock, self._lock:
+            self._pending.clear()
+            self._close_file()
+            self.written = 0
+            for path in (self.journal_path, self.rotated_path, self.path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _replace(self, categories: Iterable[Category]):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        save_schema(categories, tmp, schema_format(self.path))
+        os.replace(tmp, self.path)
@@ -0,0 +1,103 @@
+"""Automatic placement of mod nodes inside categories and of categories on the board.
+
+Pure geometry on the models, so the board, the CLI and tests can share it;
+the board applies the result to its items in one batch.
+"""
+import math
+from typing import Iterable, List
+
+from models import Category
+
+NODE_WIDTH = 120
+NODE_HEIGHT = 40
+# between nodes, as for dropped mods
+SPACING = 10
+# around the nodes inside a category; the top leaves room for the name
+PADDING = 10
+HEADER = 30
+# between categories
+CATEGORY_GAP = 40
+MIN_WIDTH = 200
+MIN_HEIGHT = 150
+
+GRID = "grid"
+SHELF = "shelf"
+
+
+def node_grid(count: int, columns: int) -> tuple[list[tuple[float, float]], float, float]:
+    """Node offsets inside a category for `columns` columns, with the category size."""
+    columns = max(1, columns)
+    positions = []
+    for i in range(count):
+        row, col = divmod(i, columns)
+        positions.append(
+            (PADDING + col * (NODE_WIDTH + SPACING), HEADER + row * (NODE_HEIGHT + SPACING))
+        )
+    rows = math.ceil(count / columns) if count else 0
+    used_columns = min(columns, count)
+    width = 2 * PADDING + used_columns * NODE_WIDTH + max(0, used_columns - 1) * SPACING
+    height = HEADER + PADDING + rows * NODE_HEIGHT + max(0, rows - 1) * SPACING
+    return positions, max(MIN_WIDTH, width), max(MIN_HEIGHT, height)
+
+
+def columns_for(count: int, mode: str = GRID, width: float = MIN_WIDTH) -> int:
+    """Columns of a near-square grid, or as many as fit in `width` for a shelf."""
+    if mode == SHELF:
+        return max(1, int((width - 2 * PADDING + SPACING) // (NODE_WIDTH + SPACING)))
+    # nodes are three times wider than tall, so fewer columns than rows look square
+    return max(1, math.ceil(math.sqrt(count * (NODE_HEIGHT + SPACING) / (NODE_WIDTH + SPACING))))
+
+
+def pack_rects(sizes: list[tuple[float, float]], gap: float = CATEGORY_GAP) -> list[tuple[float, float]]:
+    """Place rectangles without overlap; returns their top-left corners.
+
+    Shelf packing by decreasing height: rectangles are laid left to right
+    in rows no wider than a square of their total area would be, or than
+    the widest rectangle.
+    """
+    if not sizes:
+        return []
+    area = sum((w + gap) * (h + gap) for w, h in sizes)
+    row_width = max(math.sqrt(area), max(w for w, _ in sizes))
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    positions: list[tuple[float, float]] = [(0.0, 0.0)] * len(sizes)
+    x = y = shelf_height = 0.0
+    for i in order:
+        w, h = sizes[i]
+        if x > 0 and x + w > row_width:
+            x = 0.0
+            y += shelf_height + gap
+            shelf_height = 0.0
+        positions[i] = (x, y)
+        x += w + gap
+        shelf_height = max(shelf_height, h)
+    return positions
+
+
+def auto_layout(
+    categories: Iterable[Category],
+    mode: str = GRID,
+    origin: tuple[float, float] = (0.0, 0.0),
+) -> List[Category]:
+    """Lay out the mods of every category, then the categories; updates the models.
+
+    Mod coordinates stay in scene space, as everywhere else in the models.
+    """
+    categories = list(categories)
+    offsets = []
+    sizes = []
+    for cat in categories:
+        columns = columns_for(len(cat.mods), mode, cat.width)
+        positions, width, height = node_grid(len(cat.mods), columns)
+        if mode == SHELF:
+            width = max(width, cat.width)
+        offsets.append(positions)
+        sizes.append((width, height))
+    for cat, (x, y), positions, (width, height) in zip(
+        categories, pack_rects(sizes), offsets, sizes
+    ):
+        cat.x, cat.y = origin[0] + x, origin[1] + y
+        cat.width, cat.height = width, height
+        for mod, (dx, dy) in zip(cat.mods, positions):
+            mod.x, mod.y = cat.x + dx, cat.y + dy
+    return categories
@@ -0,0 +1,274 @@
+import os
+import json
+import sqlite3
+import threading
+
+from modrinth_api import CACHE_DIR
+
+SYNC_PAGE = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    rowid INTEGER PRIMARY KEY,
+    project_id TEXT UNIQUE NOT NULL,
+    slug TEXT,
+    title TEXT,
+    description TEXT,
+    author TEXT,
+    icon_url TEXT,
+    downloads INTEGER DEFAULT 0,
+    follows INTEGER DEFAULT 0,
+    date_modified TEXT,
+    hit TEXT
+);
+CREATE INDEX IF NOT EXISTS projects_slug ON projects (slug);
+CREATE TABLE IF NOT EXISTS project_versions (
+    project_id TEXT NOT NULL,
+    version TEXT NOT NULL,
+    PRIMARY KEY (version, project_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS project_categories (
+    project_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    PRIMARY KEY (category, project_id)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+    title, description, slug, content='projects', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS projects_ai AFTER INSERT ON projects BEGIN
+    INSERT INTO projects_fts (rowid, title, description, slug)
+    VALUES (new.rowid, new.title, new.description, new.slug);
+END;
+CREATE TRIGGER IF NOT EXISTS projects_ad AFTER DELETE ON projects BEGIN
+    INSERT INTO projects_fts (projects_fts, rowid, title, description, slug)
+    VALUES ('delete', old.rowid, old.title, old.description, old.slug);
+END;
+CREATE TRIGGER IF NOT EXISTS projects_au AFTER UPDATE ON projects BEGIN
+    INSERT INTO projects_fts (projects_fts, rowid, title, description, slug)
+    VALUES ('delete', old.rowid, old.title, old.description, old.slug);
+    INSERT INTO projects_fts (rowid, title, description, slug)
+    VALUES (new.rowid, new.title, new.description, new.slug);
+END;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def hit_from_project(project: dict) -> dict:
+    """Map a /v2/project(s) object onto the shape of a /v2/search hit."""
+    return {
+        "project_id": project.get("id"),
+        "slug": project.get("slug"),
+        "title": project.get("title", ""),
+        "description": project.get("description", ""),
+        # not part of project objects; upsert keeps the author a search hit stored
+        "author": project.get("author", ""),
+        "categories": list(project.get("categories", [])) + list(project.get("loaders", [])),
+        "versions": project.get("game_versions", []),
+        "downloads": project.get("downloads", 0),
+        "follows": project.get("followers", 0),
+        "icon_url": project.get("icon_url"),
+        "date_modified": project.get("updated"),
+    }
+
+
+class LocalIndex:
+    """Project metadata mirrored into SQLite, searchable with FTS5.
+
+    Answers the same queries as `ModrinthAPI.search` once a full `sync` has
+    completed; `ready()` tells whether that happened.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(CACHE_DIR, "index.sqlite")
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        # the file is opened and its schema created by the first query, on
+        # whichever thread makes it, so constructing an index costs nothing
+        self._schema_ready = False
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._schema_ready:
+                with self._write_lock:
+                    if not self._schema_ready:
+                        conn.executescript(SCHEMA)
+                        self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def _meta(self, key: str) -> str | None:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value: str):
+        conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def ready(self) -> bool:
+        return self._meta("synced_at") is not None
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+
+    def upsert(self, hits: list[dict]):
+        rows = []
+        for hit in hits:
+            if not hit.get("project_id"):
+                continue
+            rows.append(hit)
+        if not rows:
+            return
+        conn = self._conn()
+        with self._write_lock, conn:
+            unknown = [hit["project_id"] for hit in rows if not hit.get("author")]
+            authors = {}
+            # in chunks, under SQLite's limit on bound parameters
+            for start in range(0, len(unknown), 500):
+                chunk = unknown[start : start + 500]
+                marks = ",".join("?" * len(chunk))
+                authors.update(
+                    conn.execute(
+                        f"SELECT project_id, author FROM projects"
+                        f" WHERE project_id IN ({marks}) AND author != ''",
+                        chunk,
+                    )
+                )
+            for hit in rows:
+                pid = hit["project_id"]
+                if pid in authors:
+                    hit = dict(hit, author=authors[pid])
+                conn.execute(
+                    """INSERT INTO projects (project_id, slug, title, description, author,
+                           icon_url, downloads, follows, date_modified, hit)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (project_id) DO UPDATE SET
+                           slug = excluded.slug, title = excluded.title,
+                           description = excluded.description, author = excluded.author,
+                           icon_url = excluded.icon_url, downloads = excluded.downloads,
+                           follows = excluded.follows, date_modified = excluded.date_modified,
+                           hit = excluded.hit""",
+                    (
+                        pid,
+                        hit.get("slug"),
+                        hit.get("title", ""),
+                        hit.get("description", ""),
+                        hit.get("author", ""),
+                        hit.get("icon_url"),
+                        hit.get("downloads", 0),
+                        hit.get("follows", 0),
+                        hit.get("date_modified"),
+                        json.dumps(hit, ensure_ascii=False),
+                    ),
+                )
+                conn.execute("DELETE FROM project_versions WHERE project_id = ?", (pid,))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO project_versions VALUES (?, ?)",
+                    [(pid, v) for v in hit.get("versions", [])],
+                )
+                conn.execute("DELETE FROM project_categories WHERE project_id = ?", (pid,))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO project_categories VALUES (?, ?)",
+                    [(pid, c) for c in hit.get("categories", [])],
+                )
+
+    def sync(self, api, full: bool = False, progress=None) -> int:
+        """Pull projects from Modrinth, newest modifications first.
+
+        An incremental sync stops at the first project that is not newer than
+        the previous sync. Returns the number of projects written.
+        """
+        since = None if full else self._meta("last_modified")
+        newest = since
+        offset = 0
+        written = 0
+        total = None
+        while True:
+            data = api.list_projects(offset, SYNC_PAGE)
+            hits = data.get("hits", [])
+            total = data.get("total_hits", total)
+            if not hits:
+                break
+            fresh = [h for h in hits if since is None or (h.get("date_modified") or "") > since]
+            self.upsert(fresh)
+            written += len(fresh)
+            for hit in fresh:
+                if newest is None or (hit.get("date_modified") or "") > newest:
+                    newest = hit["date_modified"]
+            offset += len(hits)
+            if progress is not None:
+                progress(offset, total or offset)
+            if len(fresh) < len(hits) or (total is not None and offset >= total):
+                break
+        conn = self._conn()
+        with self._write_lock, conn:
+            if newest:
+                self._set_meta(conn, "last_modified", newest)
+            self._set_meta(conn, "synced_at", str(offset))
+        return written
+
+    def refresh(self, api, ids: list[str]) -> int:
+        projects = api.get_projects(ids)
+        self.upsert([hit_from_project(p) for p in projects])
+        return len(projects)
+
+    @staticmethod
+    def _match(query: str) -> str:
+        terms = []
+        for term in query.split():
+            term = term.replace('"', "")
+            if term:
+                terms.append(f'"{term}"*')
+        return " ".join(terms)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        versions: list[str] | None = None,
+        loaders: list[str] | None = None,
+    ) -> dict:
+        match = self._match(query)
+        if not match:
+            return {"hits": [], "offset": offset, "limit": limit, "total_hits": 0}
+        where = ["projects_fts MATCH ?"]
+        args: list = [match]
+        if versions:
+            marks = ",".join("?" * len(versions))
+            where.append(
+                f"EXISTS (SELECT 1 FROM project_versions v WHERE v.project_id = p.project_id"
+                f" AND v.version IN ({marks}))"
+            )
+            args.extend(versions)
+        if loaders:
+            marks = ",".join("?" * len(loaders))
+            where.append(
+                f"EXISTS (SELECT 1 FROM project_categories c WHERE c.project_id = p.project_id"
+                f" AND c.category IN ({marks}))"
+            )
+            args.extend(loaders)
+        clause = " AND ".join(where)
+        conn = self._conn()
+        total = conn.execute(
+            f"SELECT COUNT(*) FROM projects_fts JOIN projects p ON p.rowid = projects_fts.rowid"
+            f" WHERE {clause}",
+            args,
+        ).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT p.hit FROM projects_fts JOIN projects p ON p.rowid = projects_fts.rowid"
+            f" WHERE {clause}"
+            f" ORDER BY bm25(projects_fts, 10.0, 1.0, 5.0), p.downloads DESC"
+            f" LIMIT ? OFFSET ?",
+            args + [limit, offset],
+        ).fetchall()
+        return {
+            "hits": [json.loads(row[0]) for row in rows],
+            "offset": offset,
+            "limit": limit,
+            "total_hits": total,
+        }
@@ -1,14 +1,27 @@
+import time
+
+STARTED = time.perf_counter()
+
 import sys
-from PySide6 import QtWidgets
+from PySide6 import QtCore, QtWidgets
 from ui.main_window import MainWindow
 
 
+def report_startup():
+    """Print the time to the first shown window and quit; see bench/startup.py."""
+    print(f"startup_ms {(time.perf_counter() - STARTED) * 1000:.1f}", flush=True)
+    QtWidgets.QApplication.quit()
+
+
 def main():
     app = QtWidgets.QApplication(sys.argv)
     with open("resources/dark_theme.qss") as f:
         app.setStyleSheet(f.read())
     window = MainWindow()
     window.show()
+    if "--startup-time" in sys.argv:
+        # runs once the first frame has been painted
+        QtCore.QTimer.singleShot(0, report_startup)
     sys.exit(app.exec())
 
 
@@ -1,20 +1,215 @@
+import sys
+import uuid
+from array import array
 from dataclasses import dataclass, field
-from typing import List, Dict
+from typing import Dict, Iterator, List
+
+MOD_URL_PREFIX = "https://modrinth.com/mod/"
+MOD_FIELDS = (
+    "slug",
+    "title",
+    "description",
+    "author",
+    "version",
+    "url",
+    "x",
+    "y",
+    "id",
+    "project_id",
+)
+
+
+def new_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
 
 
-@dataclass
 class Mod:
-    slug: str
-    title: str
-    description: str
-    author: str
-    version: str
-    url: str
-    x: float = 0
-    y: float = 0
+    """A mod placed on the board.
+
+    Slotted, with author and version interned since the same few values
+    repeat across thousands of mods. The Modrinth page URL of a mod is not
+    stored when it is the default one for its slug.
+    """
+
+    __slots__ = (
+        "slug",
+        "title",
+        "description",
+        "author",
+        "version",
+        "_url",
+        "x",
+        "y",
+        "id",
+        "project_id",
+    )
+
+    def __init__(
+        self,
+        slug: str,
+        title: str,
+        description: str,
+        author: str,
+        version: str,
+        url: str,
+        x: float = 0,
+        y: float = 0,
+        id: str | None = None,
+        project_id: str = "",
+    ):
+        self.slug = slug
+        self.title = title
+        self.description = description
+        self.author = _intern(author)
+        self.version = _intern(version)
+        self.url = url
+        self.x = x
+        self.y = y
+        self.id = id or new_id()
+        # Modrinth project id; empty for mods saved before it was recorded
+        self.project_id = project_id
 
+    @property
+    def url(self) -> str:
+        return self._url if self._url is not None else MOD_URL_PREFIX + self.slug
+
+    @url.setter
+    def url(self, value: str):
+        self._url = None if value == MOD_URL_PREFIX + self.slug else value
+
+    def __eq__(self, other):
+        if not isinstance(other, Mod):
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in MOD_FIELDS)
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{f}={getattr(self, f)!r}" for f in MOD_FIELDS)
+        return f"Mod({fields})"
+
+    def to_dict(self) -> Dict:
+        return {
+            "slug": self.slug,
+            "title": self.title,
+            "description": self.description,
+            "author": self.author,
+            "version": self.version,
+            "url": self.url,
+            "x": self.x,
+            "y": self.y,
+            "id": self.id,
+            "project_id": self.project_id,
+        }
 
-@dataclass
+    @staticmethod
+    def from_dict(data: Dict) -> "Mod":
+        return Mod(**data)
+
+
+class ModTable:
+    """Column store for large read-mostly collections of mods.
+
+    Takes a fraction of the memory of the equivalent Mod objects: strings
+    live in per-column lists, coordinates in double arrays, and author and
+    version as indices into small tables of distinct values. Rows are
+    turned back into Mod objects on access.
+    """
+
+    __slots__ = (
+        "slugs",
+        "titles",
+        "descriptions",
+        "urls",
+        "ids",
+        "project_ids",
+        "xs",
+        "ys",
+        "author_ids",
+        "version_ids",
+        "_authors",
+        "_versions",
+        "_author_index",
+        "_version_index",
+    )
+
+    def __init__(self, mods=()):
+        self.slugs: list[str] = []
+        self.titles: list[str] = []
+        self.descriptions: list[str] = []
+        self.urls: list[str | None] = []
+        self.ids: list[str] = []
+        self.project_ids: list[str] = []
+        self.xs = array("d")
+        self.ys = array("d")
+        self.author_ids = array("I")
+        self.version_ids = array("I")
+        self._authors: list[str] = []
+        self._versions: list[str] = []
+        self._author_index: dict[str, int] = {}
+        self._version_index: dict[str, int] = {}
+        self.extend(mods)
+
+    @staticmethod
+    def _ref(table: list[str], index: dict[str, int], value: str) -> int:
+        idx = index.get(value)
+        if idx is None:
+            idx = index[value] = len(table)
+            table.append(value)
+        return idx
+
+    def append(self, mod: Mod):
+        self.slugs.append(mod.slug)
+        self.titles.append(mod.title)
+        self.descriptions.append(mod.description)
+        self.urls.append(mod._url)
+        self.ids.append(mod.id)
+        self.project_ids.append(mod.project_id)
+        self.xs.append(mod.x)
+        self.ys.append(mod.y)
+        self.author_ids.append(self._ref(self._authors, self._author_index, mod.author))
+        self.version_ids.append(self._ref(self._versions, self._version_index, mod.version))
+
+    def extend(self, mods):
+        for mod in mods:
+            self.append(mod)
+
+    def __len__(self) -> int:
+        return len(self.slugs)
+
+    def __getitem__(self, i: int) -> Mod:
+        slug = self.slugs[i]
+        url = self.urls[i]
+        return Mod(
+            slug,
+            self.titles[i],
+            self.descriptions[i],
+            self._authors[self.author_ids[i]],
+            self._versions[self.version_ids[i]],
+            url if url is not None else MOD_URL_PREFIX + slug,
+            self.xs[i],
+            self.ys[i],
+            self.ids[i],
+            self.project_ids[i],
+        )
+
+    def __iter__(self) -> Iterator[Mod]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def move(self, i: int, x: float, y: float):
+        self.xs[i] = x
+        self.ys[i] = y
+
+    def to_dicts(self) -> List[Dict]:
+        return [mod.to_dict() for mod in self]
+
+
+@dataclass(slots=True)
 class Category:
     name: str
     mods: List[Mod] = field(default_factory=list)
@@ -23,11 +218,16 @@ class Category:
     width: float = 200
     height: float = 150
     color: str = "#3c3c3c"
+    id: str = field(default_factory=new_id)
+
+    def __post_init__(self):
+        self.color = _intern(self.color)
 
     def to_dict(self) -> Dict:
         return {
+            "id": self.id,
             "name": self.name,
-            "mods": [mod.__dict__ for mod in self.mods],
+            "mods": [mod.to_dict() for mod in self.mods],
             "x": self.x,
             "y": self.y,
             "width": self.width,
@@ -37,13 +237,13 @@ class Category:
 
     @staticmethod
     def from_dict(data: Dict) -> "Category":
-        cat = Category(
+        return Category(
             name=data["name"],
+            mods=[Mod(**mod) for mod in data.get("mods", ())],
             x=data.get("x", 0),
             y=data.get("y", 0),
             width=data.get("width", 200),
             height=data.get("height", 150),
             color=data.get("color", "#3c3c3c"),
+            id=data.get("id") or new_id(),
         )
-        cat.mods = [Mod(**mod) for mod in data.get("mods", [])]
-        return cat
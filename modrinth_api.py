@@ -1,39 +1,411 @@
 import os
 import json
-import requests
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import tracing
+from http_scheduler import INTERACTIVE, NORMAL, RequestCancelled, get_scheduler
 
 MODRINTH_TOKEN = os.environ.get(
     "MODRINTH_TOKEN", "mrp_0nUiSOTSQ7Xar35PfRapMOIwXH5CA4QaV3BMOSGlwmsAaxfjTgPWmyM6CQFg"
 )
 BASE_URL = "https://api.modrinth.com/v2"
+CACHE_DIR = os.environ.get(
+    "MODPACK_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "modpack_designer"),
+)
+SEARCH_TTL = 10 * 60
+PROJECT_TTL = 60 * 60
+TAG_TTL = 24 * 60 * 60
+MAX_IDS = 100
+MAX_STALE = 7 * 24 * 60 * 60
+MAX_HITS = 4096
+
+
+class ResponseCache:
+    """LRU of decoded JSON responses in memory, backed by one file per key on disk.
+
+    Entries older than their TTL are not dropped but revalidated with the
+    stored ETag/Last-Modified, so an unchanged result costs a 304 at most.
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        max_entries: int = 256,
+        ttl: float = SEARCH_TTL,
+        max_stale: float = MAX_STALE,
+    ):
+        self.path = path or os.path.join(CACHE_DIR, "responses")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key + ".json")
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+        try:
+            with open(self._file(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("stored", 0) > self.max_stale:
+            return None
+        self._remember(key, entry)
+        return entry
+
+    def put(
+        self,
+        key: str,
+        data,
+        etag: str | None = None,
+        last_modified: str | None = None,
+    ) -> dict:
+        entry = {
+            "stored": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "data": data,
+        }
+        self._remember(key, entry)
+        self._write(key, entry)
+        return entry
+
+    def touch(self, key: str, entry: dict):
+        entry["stored"] = time.time()
+        self._remember(key, entry)
+        self._write(key, entry)
+
+    def is_fresh(self, entry: dict, ttl: float | None = None) -> bool:
+        ttl = self.ttl if ttl is None else ttl
+        return time.time() - entry.get("stored", 0) < ttl
+
+    def count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+        tracing.count(f"cache.{counter}")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.misses = self.revalidated = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "entries": len(self._memory),
+            }
+
+    def _remember(self, key: str, entry: dict):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _write(self, key: str, entry: dict):
+        path = self._file(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+
+class HitRegistry:
+    """Recently seen search hits by project id, shared within the process.
+
+    Lets drag-and-drop and the board carry just a project id and look the
+    full metadata up here.
+    """
+
+    def __init__(self, max_entries: int = MAX_HITS):
+        self.max_entries = max_entries
+        self._hits: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, hits: list[dict]):
+        with self._lock:
+            for hit in hits:
+                pid = hit.get("project_id")
+                if not pid:
+                    continue
+                self._hits[pid] = hit
+                self._hits.move_to_end(pid)
+            while len(self._hits) > self.max_entries:
+                self._hits.popitem(last=False)
+
+    def get(self, project_id: str) -> dict | None:
+        with self._lock:
+            hit = self._hits.get(project_id)
+            if hit is not None:
+                self._hits.move_to_end(project_id)
+            return hit
+
+
+_hit_registry = HitRegistry()
+
+
+def hit_registry() -> HitRegistry:
+    return _hit_registry
+
+
+def _complete_search(data: dict, offset: int) -> dict:
+    data.setdefault("hits", [])
+    data.setdefault("offset", offset)
+    data.setdefault("total_hits", offset + len(data["hits"]))
+    return data
 
 
 class ModrinthAPI:
-    def __init__(self, token: str | None = None):
+    def __init__(
+        self,
+        token: str | None = None,
+        cache: ResponseCache | None = None,
+        index=None,
+        scheduler=None,
+    ):
         self.token = token or MODRINTH_TOKEN
-        self.session = requests.Session()
-        if self.token:
-            self.session.headers.update({"Authorization": self.token})
+        self.headers = {"Authorization": self.token} if self.token else {}
+        self.scheduler = scheduler or get_scheduler()
+        self.cache = cache if cache is not None else ResponseCache()
+        # optional local_index.LocalIndex answering searches offline
+        self.index = index
+        self.hits = hit_registry()
 
-    def search_mods(
+    def _get_json(
+        self,
+        path: str,
+        params: dict | None = None,
+        ttl: float | None = None,
+        cancel: threading.Event | None = None,
+        priority: int = NORMAL,
+    ):
+        # one span name per endpoint, /project/{id}/version counts as "api project"
+        with tracing.span("api " + path.split("/")[1], path=path):
+            return self._fetch_json(path, params, ttl, cancel, priority)
+
+    def _fetch_json(
+        self,
+        path: str,
+        params: dict | None,
+        ttl: float | None,
+        cancel: threading.Event | None,
+        priority: int,
+    ):
+        key = self.cache.make_key(path, params)
+        entry = self.cache.get(key)
+        if entry is not None and self.cache.is_fresh(entry, ttl):
+            self.cache.count("hits")
+            return entry["data"]
+
+        headers = dict(self.headers)
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        if cancel is not None and cancel.is_set():
+            raise RequestCancelled(path)
+        r = self.scheduler.get(
+            f"{BASE_URL}{path}",
+            params=params,
+            headers=headers,
+            priority=priority,
+            cancel=cancel,
+            stream=cancel is not None,
+        )
+        with r:
+            if r.status_code == 304 and entry is not None:
+                self.cache.count("revalidated")
+                self.cache.touch(key, entry)
+                return entry["data"]
+            r.raise_for_status()
+            if cancel is None:
+                body = r.content
+            else:
+                chunks = []
+                for chunk in r.iter_content(16 * 1024):
+                    if cancel.is_set():
+                        raise RequestCancelled(path)
+                    chunks.append(chunk)
+                body = b"".join(chunks)
+        data = json.loads(body)
+        self.cache.count("misses")
+        self.cache.put(key, data, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+        return data
+
+    def search(
         self,
         query: str,
         limit: int = 20,
+        offset: int = 0,
         versions: list[str] | None = None,
         loaders: list[str] | None = None,
-    ):
+        ttl: float | None = None,
+        cancel: threading.Event | None = None,
+    ) -> dict:
+        query = " ".join(query.lower().split())
         if not query:
-            return []
-        url = f"{BASE_URL}/search"
+            return {"hits": [], "offset": offset, "limit": limit, "total_hits": 0}
+        local = self._search_local(query, limit, offset, versions, loaders)
+        if local is not None:
+            self.hits.add(local["hits"])
+            return local
+        params = self._search_params(query, limit, offset, versions, loaders)
+        data = _complete_search(self._get_json("/search", params, ttl, cancel, INTERACTIVE), offset)
+        self.hits.add(data["hits"])
+        if self.index is not None:
+            self.index.upsert(data["hits"])
+        return data
+
+    def cached_search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        versions: list[str] | None = None,
+        loaders: list[str] | None = None,
+    ) -> dict | None:
+        """What `search` would return from the local index or a fresh cached response, else None.
+
+        Never makes a request, so the GUI can tell which queries need no debounce.
+        """
+        query = " ".join(query.lower().split())
+        if not query:
+            return None
+        local = self._search_local(query, limit, offset, versions, loaders)
+        if local is not None:
+            return local
+        params = self._search_params(query, limit, offset, versions, loaders)
+        entry = self.cache.get(self.cache.make_key("/search", params))
+        if entry is None or not self.cache.is_fresh(entry):
+            return None
+        return _complete_search(entry["data"], offset)
+
+    def _search_local(
+        self,
+        query: str,
+        limit: int,
+        offset: int,
+        versions: list[str] | None,
+        loaders: list[str] | None,
+    ) -> dict | None:
+        if self.index is None or not self.index.ready():
+            return None
+        local = self.index.search(query, limit, offset, versions, loaders)
+        return local if local["total_hits"] else None
+
+    @staticmethod
+    def _search_params(
+        query: str,
+        limit: int,
+        offset: int,
+        versions: list[str] | None,
+        loaders: list[str] | None,
+    ) -> dict:
         params = {"query": query, "limit": limit}
+        if offset:
+            params["offset"] = offset
         facets = []
         if versions:
-            facets.append([f"versions:{v}" for v in versions])
+            facets.append([f"versions:{v}" for v in sorted(set(versions))])
         if loaders:
-            facets.append([f"categories:{l}" for l in loaders])
+            facets.append([f"categories:{l}" for l in sorted(set(loaders))])
         if facets:
             params["facets"] = json.dumps(facets)
-        r = self.session.get(url, params=params)
-        r.raise_for_status()
-        data = r.json()
-        return data.get("hits", [])
+        return params
+
+    def list_projects(self, offset: int = 0, limit: int = 100, index: str = "updated") -> dict:
+        params = {
+            "limit": limit,
+            "index": index,
+            "facets": json.dumps([["project_type:mod"]]),
+        }
+        if offset:
+            params["offset"] = offset
+        return self._get_json("/search", params, ttl=0)
+
+    def get_projects(self, ids: list[str], ttl: float = PROJECT_TTL) -> list[dict]:
+        projects = []
+        for start in range(0, len(ids), MAX_IDS):
+            chunk = ids[start : start + MAX_IDS]
+            params = {"ids": json.dumps(chunk)}
+            projects.extend(self._get_json("/projects", params, ttl))
+        return projects
+
+    def get_versions(self, ids: list[str], ttl: float = PROJECT_TTL) -> list[dict]:
+        versions = []
+        for start in range(0, len(ids), MAX_IDS):
+            chunk = ids[start : start + MAX_IDS]
+            params = {"ids": json.dumps(chunk)}
+            versions.extend(self._get_json("/versions", params, ttl))
+        return versions
+
+    def get_teams(self, ids: list[str], ttl: float = PROJECT_TTL) -> list[list[dict]]:
+        """Members of each team, in the order of `ids`."""
+        teams = []
+        for start in range(0, len(ids), MAX_IDS):
+            chunk = ids[start : start + MAX_IDS]
+            params = {"ids": json.dumps(chunk)}
+            teams.extend(self._get_json("/teams", params, ttl))
+        return teams
+
+    def get_game_versions(self, ttl: float = TAG_TTL) -> list[dict]:
+        """Every game version Modrinth knows, newest first."""
+        return self._get_json("/tag/game_version", None, ttl)
+
+    def cached_game_versions(self) -> list[dict] | None:
+        """The last /tag/game_version response whatever its age, without a request."""
+        entry = self.cache.get(self.cache.make_key("/tag/game_version", None))
+        return entry["data"] if entry is not None else None
+
+    def get_project_versions(
+        self,
+        project: str,
+        game_versions: list[str] | None = None,
+        loaders: list[str] | None = None,
+        ttl: float = PROJECT_TTL,
+    ) -> list[dict]:
+        """Versions of a project (id or slug), newest first."""
+        params = {}
+        if game_versions:
+            params["game_versions"] = json.dumps(sorted(set(game_versions)))
+        if loaders:
+            params["loaders"] = json.dumps(sorted(set(loaders)))
+        return self._get_json(f"/project/{project}/version", params or None, ttl)
+
+    def search_mods(
+        self,
+        query: str,
+        limit: int = 20,
+        versions: list[str] | None = None,
+        loaders: list[str] | None = None,
+        offset: int = 0,
+        ttl: float | None = None,
+    ):
+        return self.search(query, limit, offset, versions, loaders, ttl)["hits"]
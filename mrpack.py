@@ -0,0 +1,256 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from http_scheduler import NORMAL, get_scheduler
+from models import Category
+from modrinth_api import CACHE_DIR
+from resolver import Resolver, mod_key
+
+CHUNK_SIZE = 64 * 1024
+DOWNLOAD_WORKERS = 6
+LOADER_DEPENDENCIES = {
+    "fabric": "fabric-loader",
+    "quilt": "quilt-loader",
+    "forge": "forge",
+    "neoforge": "neoforge",
+}
+# client_side / server_side values the index env takes as they are; "unknown" counts as required
+SIDE_ENVS = ("required", "optional", "unsupported")
+
+
+class HashMismatch(Exception):
+    pass
+
+
+def primary_file(version: dict) -> dict | None:
+    files = version.get("files") or []
+    for f in files:
+        if f.get("primary"):
+            return f
+    return files[0] if files else None
+
+
+class FileCache:
+    """Mod files on disk addressed by their sha1.
+
+    Downloads are hashed while they stream to a `.part` file; an interrupted
+    download is resumed with a Range request, hashing the part already on
+    disk first.
+    """
+
+    def __init__(self, path: str | None = None, scheduler=None):
+        self.path = path or os.path.join(CACHE_DIR, "files")
+        self.scheduler = scheduler or get_scheduler()
+
+    def path_for(self, sha1: str) -> str:
+        return os.path.join(self.path, sha1[:2], sha1)
+
+    def has(self, sha1: str) -> bool:
+        return os.path.exists(self.path_for(sha1))
+
+    def fetch(self, url: str, sha1: str, sha512: str | None = None) -> int:
+        """Download `url` unless it is cached; returns the bytes transferred."""
+        target = self.path_for(sha1)
+        if os.path.exists(target):
+            return 0
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        part = target + ".part"
+        h1 = hashlib.sha1()
+        h512 = hashlib.sha512()
+        offset = 0
+        if os.path.exists(part):
+            with open(part, "rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    h1.update(chunk)
+                    h512.update(chunk)
+                    offset += len(chunk)
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        r = self.scheduler.get(url, headers=headers, stream=True, priority=NORMAL)
+        transferred = 0
+        with r:
+            if r.status_code == 416:
+                # the part is already complete
+                pass
+            else:
+                r.raise_for_status()
+                if offset and r.status_code != 206:
+                    # the server ignored the range, start over
+                    offset = 0
+                    h1 = hashlib.sha1()
+                    h512 = hashlib.sha512()
+                with open(part, "ab" if offset else "wb") as f:
+                    for chunk in r.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                        h1.update(chunk)
+                        h512.update(chunk)
+                        transferred += len(chunk)
+        if h1.hexdigest() != sha1 or (sha512 and h512.hexdigest() != sha512):
+            os.remove(part)
+            raise HashMismatch(url)
+        os.replace(part, target)
+        return transferred
+
+
+@dataclass
+class PackFile:
+    title: str
+    filename: str
+    url: str
+    sha1: str
+    sha512: str
+    size: int
+    # env of the file in the index, from the project's client_side / server_side
+    client: str = "required"
+    server: str = "required"
+
+
+@dataclass
+class ExportResult:
+    path: str
+    files: list[PackFile] = field(default_factory=list)
+    # titles of mods without a file for the target
+    missing: list[str] = field(default_factory=list)
+    downloaded: int = 0
+    cached: int = 0
+    bytes: int = 0
+
+
+def side_env(value: str | None) -> str:
+    """A project's client_side / server_side as an index env value."""
+    return value if value in SIDE_ENVS else "required"
+
+
+def pack_files(categories: Iterable[Category], resolver: Resolver) -> tuple[list[PackFile], list[str]]:
+    mods = list({mod_key(mod): mod for cat in categories for mod in cat.mods}.values())
+    versions = resolver.versions_for(mods)
+    files = []
+    missing = []
+    # the same project saved once by slug and once by id resolves to the same file
+    seen: set[str] = set()
+    for mod in mods:
+        version = versions.get(mod_key(mod))
+        f = primary_file(version) if version else None
+        if f is None:
+            missing.append(mod.title)
+            continue
+        hashes = f.get("hashes", {})
+        sha1 = hashes.get("sha1", "")
+        if (sha1 or f["url"]) in seen:
+            continue
+        seen.add(sha1 or f["url"])
+        project = resolver.project(mod_key(mod)) or {}
+        files.append(
+            PackFile(
+                mod.title,
+                f["filename"],
+                f["url"],
+                sha1,
+                hashes.get("sha512", ""),
+                f.get("size", 0),
+                side_env(project.get("client_side")),
+                side_env(project.get("server_side")),
+            )
+        )
+    return files, missing
+
+
+def build_index(
+    name: str,
+    version_id: str,
+    game_version: str,
+    loader: str,
+    loader_version: str,
+    files: list[PackFile],
+) -> dict:
+    dependencies = {"minecraft": game_version}
+    if loader_version and loader in LOADER_DEPENDENCIES:
+        dependencies[LOADER_DEPENDENCIES[loader]] = loader_version
+    return {
+        "formatVersion": 1,
+        "game": "minecraft",
+        "versionId": version_id,
+        "name": name,
+        "files": [
+            {
+                "path": f"mods/{f.filename}",
+                "hashes": {"sha1": f.sha1, "sha512": f.sha512},
+                "env": {"client": f.client, "server": f.server},
+                "downloads": [f.url],
+                "fileSize": f.size,
+            }
+            for f in files
+        ],
+        "dependencies": dependencies,
+    }
+
+
+def export_mrpack(
+    path: str,
+    categories: Iterable[Category],
+    api,
+    game_version: str,
+    loader: str,
+    loader_version: str = "",
+    name: str = "Modpack",
+    version_id: str = "1.0.0",
+    download: bool = False,
+    bundle: bool = False,
+    cache: FileCache | None = None,
+    workers: int = DOWNLOAD_WORKERS,
+    resolver: Resolver | None = None,
+    progress=None,
+) -> ExportResult:
+    """Write the board as a Modrinth modpack.
+
+    With `download` every file is fetched into the file cache, at most
+    `workers` at a time; `bundle` also copies the jars into the pack's
+    overrides instead of listing them for the launcher to download.
+    """
+    resolver = resolver or Resolver(api, game_version, loader)
+    files, missing = pack_files(categories, resolver)
+    result = ExportResult(path, files, missing)
+    if download or bundle:
+        cache = cache or FileCache()
+        lock = threading.Lock()
+        done = 0
+
+        def fetch(f: PackFile):
+            nonlocal done
+            transferred = cache.fetch(f.url, f.sha1, f.sha512)
+            with lock:
+                done += 1
+                if transferred:
+                    result.downloaded += 1
+                    result.bytes += transferred
+                else:
+                    result.cached += 1
+                if progress is not None:
+                    progress(done, len(files))
+
+        with ThreadPoolExecutor(workers) as pool:
+            # list() re-raises the first failed download
+            list(pool.map(fetch, files))
+
+    listed = [] if bundle else files
+    tmp = path + ".tmp"
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+        with zf.open("modrinth.index.json", "w") as out:
+            index = build_index(name, version_id, game_version, loader, loader_version, listed)
+            for chunk in json.JSONEncoder(indent=2, ensure_ascii=False).iterencode(index):
+                out.write(chunk.encode("utf-8"))
+        if bundle:
+            for f in files:
+                info = zipfile.ZipInfo(f"overrides/mods/{f.filename}")
+                # jars are already compressed
+                info.compress_type = zipfile.ZIP_STORED
+                with open(cache.path_for(f.sha1), "rb") as src, zf.open(info, "w", force_zip64=True) as dst:
+                    shutil.copyfileobj(src, dst, CHUNK_SIZE)
+    os.replace(tmp, path)
+    return result
@@ -0,0 +1,173 @@
+"""Narrowing down and re-ranking search hits that were already fetched.
+
+The hits of a search accumulate in a `RefineIndex` page by page; refining
+them by text, facets or sort order then needs no further requests. Text is
+matched through a trigram index over title and description (and their
+translations once known): a query word matches a hit holding most of its
+trigrams, so small typos still match, and hits with the exact substring
+rank first.
+"""
+import math
+from collections import Counter, defaultdict
+from itertools import chain
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Sequence
+
+# share of a query word's trigrams a hit must contain to match it
+FUZZY_SHARE = 0.7
+
+RELEVANCE = "relevance"
+DOWNLOADS = "downloads"
+FOLLOWS = "follows"
+UPDATED = "updated"
+SORT_KEYS = (RELEVANCE, DOWNLOADS, FOLLOWS, UPDATED)
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+@dataclass
+class RefineResult:
+    hits: list[dict]
+    # facet value -> matching hits, counted before the facet selection is applied
+    categories: dict[str, int] = field(default_factory=dict)
+    loaders: dict[str, int] = field(default_factory=dict)
+
+
+class RefineIndex:
+    def __init__(self, loaders: Iterable[str] = ()):
+        # Modrinth lists loaders among a hit's categories; these are split off
+        self.loader_names = frozenset(loaders)
+        self.hits: list[dict] = []
+        self._positions: dict[str, int] = {}
+        self._texts: list[str] = []
+        self._grams: defaultdict[str, list[int]] = defaultdict(list)
+        # description -> hits having it, to index translations as they arrive
+        self._by_description: defaultdict[str, list[int]] = defaultdict(list)
+        self._categories: list[tuple[str, ...]] = []
+        self._loaders: list[tuple[str, ...]] = []
+        self._values: dict[str, list] = {DOWNLOADS: [], FOLLOWS: [], UPDATED: []}
+        # facet counts over every hit, kept up to date by `add`
+        self.category_counts: Counter[str] = Counter()
+        self.loader_counts: Counter[str] = Counter()
+
+    def __len__(self) -> int:
+        return len(self.hits)
+
+    def clear(self):
+        self.__init__(self.loader_names)
+
+    def add(self, hits: Iterable[dict], translations: dict[str, str] | None = None):
+        """Index a page of hits; hits seen before (by project id) are skipped."""
+        for hit in hits:
+            key = hit.get("project_id") or hit.get("slug") or ""
+            if key in self._positions:
+                continue
+            pos = len(self.hits)
+            self._positions[key] = pos
+            self.hits.append(hit)
+            desc = hit.get("description") or ""
+            self._texts.append("")
+            self._index_text(pos, f"{hit.get('title') or ''}\n{desc}")
+            if desc:
+                self._by_description[desc].append(pos)
+                if translations and desc in translations:
+                    self._index_text(pos, translations[desc])
+            categories = hit.get("categories") or []
+            loaders = tuple(c for c in categories if c in self.loader_names)
+            categories = tuple(c for c in categories if c not in self.loader_names)
+            self._categories.append(categories)
+            self._loaders.append(loaders)
+            self.category_counts.update(categories)
+            self.loader_counts.update(loaders)
+            self._values[DOWNLOADS].append(hit.get("downloads") or 0)
+            self._values[FOLLOWS].append(hit.get("follows") or 0)
+            self._values[UPDATED].append(hit.get("date_modified") or "")
+
+    def add_translations(self, translations: dict[str, str]):
+        """Make translated descriptions searchable too."""
+        for desc, translated in translations.items():
+            for pos in self._by_description.get(desc, ()):
+                if translated.lower() not in self._texts[pos]:
+                    self._index_text(pos, translated)
+
+    def _index_text(self, pos: int, text: str):
+        text = text.lower()
+        old = self._texts[pos]
+        new_grams = _trigrams(text) - _trigrams(old) if old else _trigrams(text)
+        for gram in new_grams:
+            self._grams[gram].append(pos)
+        self._texts[pos] = f"{old}\n{text}" if old else text
+
+    def _match(self, words: list[str]) -> tuple[list[int], dict[int, int]]:
+        """Positions matching every word, with how many words each matched exactly."""
+        candidates: set[int] | None = None
+        exact: Counter[int] = Counter()
+        texts = self._texts
+        for word in words:
+            if len(word) < 3:
+                # too short for trigrams: plain substring over what is left
+                pool = candidates if candidates is not None else range(len(texts))
+                ids = {pos for pos in pool if word in texts[pos]}
+                exact.update(ids)
+            else:
+                grams = _trigrams(word)
+                counts: Counter[int] = Counter()
+                for gram in grams:
+                    counts.update(self._grams.get(gram, ()))
+                need = max(1, math.ceil(len(grams) * FUZZY_SHARE))
+                ids = {pos for pos, n in counts.items() if n >= need}
+                if candidates is not None:
+                    ids &= candidates
+                exact.update(pos for pos in ids if word in texts[pos])
+            candidates = ids
+            if not candidates:
+                return [], {}
+        return sorted(candidates), exact
+
+    def refine(
+        self,
+        text: str = "",
+        sort: Sequence[str] = (),
+        categories: Iterable[str] = (),
+        loaders: Iterable[str] = (),
+        exclude: Callable[[dict], bool] | None = None,
+    ) -> RefineResult:
+        """Hits matching `text`, having every one of `categories` and any of `loaders`.
+
+        `sort` lists keys from SORT_KEYS, most significant first; numbers
+        and dates sort descending. Relevance (exact matches first, then the
+        server's order) breaks the remaining ties. `exclude` drops hits it
+        returns True for, such as mods already on the board.
+        """
+        words = text.lower().split()
+        if words:
+            rows, exact = self._match(words)
+        else:
+            rows, exact = list(range(len(self.hits))), {}
+        if exclude is not None:
+            rows = [pos for pos in rows if not exclude(self.hits[pos])]
+        if len(rows) == len(self.hits):
+            category_counts, loader_counts = self.category_counts, self.loader_counts
+        else:
+            category_counts = Counter(chain.from_iterable(map(self._categories.__getitem__, rows)))
+            loader_counts = Counter(chain.from_iterable(map(self._loaders.__getitem__, rows)))
+        result = RefineResult([], dict(category_counts), dict(loader_counts))
+        wanted = set(categories)
+        if wanted:
+            rows = [pos for pos in rows if wanted.issubset(self._categories[pos])]
+        wanted = set(loaders)
+        if wanted:
+            rows = [pos for pos in rows if not wanted.isdisjoint(self._loaders[pos])]
+        # relevance orders every row (server position is unique), so keys
+        # after it never decide anything; it ends the list in any case
+        keys = list(sort)
+        keys = keys[: keys.index(RELEVANCE)] if RELEVANCE in keys else keys
+        # stable sorts from the least significant key; rows start in the server's order
+        if exact:
+            rows.sort(key=lambda pos: exact.get(pos, 0), reverse=True)
+        for key in reversed(keys):
+            rows.sort(key=self._values[key].__getitem__, reverse=True)
+        result.hits = [self.hits[pos] for pos in rows]
+        return result
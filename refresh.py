@@ -0,0 +1,159 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, List
+
+from models import MOD_URL_PREFIX, Category, Mod
+from modrinth_api import MAX_IDS
+from resolver import Resolver, mod_key
+from storage import load_schema, save_schema
+
+# Mod fields a refresh may change
+REFRESH_FIELDS = ("project_id", "slug", "title", "description", "author", "version", "url")
+
+
+@dataclass
+class ModUpdate:
+    mod_id: str
+    title: str
+    # field -> (stored value, current value)
+    changes: dict[str, tuple[str, str]]
+
+
+@dataclass
+class RefreshReport:
+    updates: list[ModUpdate] = field(default_factory=list)
+    # titles of mods Modrinth no longer knows
+    unknown: list[str] = field(default_factory=list)
+    checked: int = 0
+
+    def describe(self) -> str:
+        lines = []
+        for update in self.updates:
+            changes = ", ".join(
+                f"{name}: {old or '—'} → {new}" for name, (old, new) in update.changes.items()
+            )
+            lines.append(f"{update.title}: {changes}")
+        return "\n".join(lines)
+
+
+def _chunks(items: list, size: int = MAX_IDS) -> list[list]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+class MetadataRefresher:
+    """Compares stored mods with current Modrinth data using bulk endpoints only.
+
+    A refresh costs one request per hundred projects for each of /projects,
+    /teams and /versions, all served through the response cache. Without a
+    target the newest version of each project is taken, with one the newest
+    version for that game version and loader.
+    """
+
+    def __init__(
+        self,
+        api,
+        game_version: str | None = None,
+        loader: str | None = None,
+        workers: int = 8,
+    ):
+        self.api = api
+        self.game_version = game_version
+        self.loader = loader
+        self.workers = workers
+
+    def check(self, categories: Iterable[Category], progress=None) -> RefreshReport:
+        mods = [mod for cat in categories for mod in cat.mods]
+        keys = list(dict.fromkeys(mod_key(mod) for mod in mods if mod_key(mod)))
+        report = RefreshReport(checked=len(mods))
+
+        def step(done: int):
+            if progress is not None:
+                progress(done, 3)
+
+        with ThreadPoolExecutor(self.workers) as pool:
+            projects: dict[str, dict] = {}
+            for chunk in pool.map(self.api.get_projects, _chunks(keys)):
+                for project in chunk:
+                    projects[project["id"]] = project
+                    if project.get("slug"):
+                        projects[project["slug"]] = project
+            step(1)
+
+            team_ids = list(dict.fromkeys(p["team"] for p in projects.values() if p.get("team")))
+            owners: dict[str, str] = {}
+            for chunk in pool.map(self.api.get_teams, _chunks(team_ids)):
+                for members in chunk:
+                    owner = next(
+                        (m for m in members if m.get("is_owner") or m.get("role") == "Owner"),
+                        members[0] if members else None,
+                    )
+                    if owner is not None:
+                        owners[owner.get("team_id")] = owner.get("user", {}).get("username", "")
+            step(2)
+
+            if self.game_version and self.loader:
+                resolver = Resolver(self.api, self.game_version, self.loader, workers=self.workers)
+                versions = resolver.versions_for(mods)
+            else:
+                latest = {
+                    key: projects[key]["versions"][-1]
+                    for key in keys
+                    if key in projects and projects[key].get("versions")
+                }
+                by_id: dict[str, dict] = {}
+                ids = list(dict.fromkeys(latest.values()))
+                for chunk in pool.map(self.api.get_versions, _chunks(ids)):
+                    for version in chunk:
+                        by_id[version["id"]] = version
+                versions = {key: by_id.get(vid) for key, vid in latest.items()}
+            step(3)
+
+        for mod in mods:
+            key = mod_key(mod)
+            project = projects.get(key)
+            if project is None:
+                report.unknown.append(mod.title)
+                continue
+            current = {
+                "project_id": project["id"],
+                "slug": project.get("slug") or mod.slug,
+                "title": project.get("title") or mod.title,
+                "description": project.get("description") or mod.description,
+                "author": owners.get(project.get("team"), "") or mod.author,
+            }
+            version = versions.get(key)
+            if version is not None and version.get("version_number"):
+                current["version"] = version["version_number"]
+            current["url"] = MOD_URL_PREFIX + current["slug"]
+            changes = {
+                name: (getattr(mod, name), value)
+                for name, value in current.items()
+                if getattr(mod, name) != value
+            }
+            if changes:
+                report.updates.append(ModUpdate(mod.id, mod.title, changes))
+        return report
+
+
+def apply_updates(categories: Iterable[Category], updates: List[ModUpdate]) -> List[Mod]:
+    """Write the new values into the mods; returns the mods that changed."""
+    by_id = {update.mod_id: update for update in updates}
+    changed = []
+    for cat in categories:
+        for mod in cat.mods:
+            update = by_id.get(mod.id)
+            if update is None:
+                continue
+            for name, (_old, new) in update.changes.items():
+                setattr(mod, name, new)
+            changed.append(mod)
+    return changed
+
+
+def refresh_schema(path: str, api, apply: bool = False, **options) -> RefreshReport:
+    categories = load_schema(path)
+    report = MetadataRefresher(api, **options).check(categories)
+    if apply and report.updates:
+        apply_updates(categories, report.updates)
+        save_schema(categories, path)
+    return report
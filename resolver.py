@@ -0,0 +1,297 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable
+
+import requests
+
+from models import Mod
+from modrinth_api import MAX_IDS
+
+REQUIRED = "required"
+OPTIONAL = "optional"
+INCOMPATIBLE = "incompatible"
+# newest versions per project fetched in bulk before falling back to a per-project query
+VERSION_WINDOW = 8
+
+# board statuses, see DependencyGraph.status
+STATUS_MISSING = "missing"
+STATUS_INCOMPATIBLE = "incompatible"
+
+
+@dataclass
+class ResolvedProject:
+    project_id: str
+    slug: str
+    title: str
+    on_board: bool = False
+    # newest version for the target game version and loader, None if there is none
+    version: dict | None = None
+    required_by: set[str] = field(default_factory=set)
+
+
+@dataclass
+class DependencyGraph:
+    game_version: str
+    loader: str
+    projects: dict[str, ResolvedProject] = field(default_factory=dict)
+    # (dependent project id, dependency project id, dependency_type)
+    edges: list[tuple[str, str, str]] = field(default_factory=list)
+    # board keys (project id or slug) that Modrinth does not know
+    unknown: list[str] = field(default_factory=list)
+    # board key -> project id
+    board_keys: dict[str, str] = field(default_factory=dict)
+    requests: int = 0
+
+    def missing(self) -> list[ResolvedProject]:
+        """Required dependencies that are not on the board, transitively."""
+        return [p for p in self.projects.values() if not p.on_board and p.required_by]
+
+    def unavailable(self) -> list[ResolvedProject]:
+        """Mods on the board without a version for the target."""
+        return [p for p in self.projects.values() if p.on_board and p.version is None]
+
+    def conflicts(self) -> list[tuple[str, str]]:
+        """Pairs of board mods where the first declares the second incompatible."""
+        return [
+            (a, b)
+            for a, b, kind in self.edges
+            if kind == INCOMPATIBLE and self.projects[a].on_board and self.projects[b].on_board
+        ]
+
+    def status(self) -> dict[str, tuple[str, str]]:
+        """Board key -> (status, message) for every mod that needs attention."""
+        by_project: dict[str, tuple[str, str]] = {}
+        for project in self.unavailable():
+            by_project[project.project_id] = (
+                STATUS_INCOMPATIBLE,
+                f"Нет версии для {self.game_version} / {self.loader}",
+            )
+        for a, b in self.conflicts():
+            for this, other in ((a, b), (b, a)):
+                if this not in by_project:
+                    by_project[this] = (
+                        STATUS_INCOMPATIBLE,
+                        f"Несовместим с {self.projects[other].title}",
+                    )
+        missing: dict[str, list[str]] = {}
+        for a, b, kind in self.edges:
+            if kind == REQUIRED and self.projects[a].on_board and not self.projects[b].on_board:
+                missing.setdefault(a, []).append(self.projects[b].title)
+        for pid, titles in missing.items():
+            if pid not in by_project:
+                by_project[pid] = (STATUS_MISSING, "Не хватает зависимостей: " + ", ".join(titles))
+        return {key: by_project[pid] for key, pid in self.board_keys.items() if pid in by_project}
+
+
+def mod_key(mod: Mod) -> str:
+    return mod.project_id or mod.slug
+
+
+class Resolver:
+    """Breadth-first dependency resolution for a target game version and loader.
+
+    Every level of the graph costs a few batches of concurrent requests:
+    bulk /projects for the new projects, bulk /versions for their newest
+    versions and for dependencies pinned to a version. Only projects whose
+    match is older than VERSION_WINDOW versions are queried one by one. Everything
+    fetched is memoized, so resolving again after an edit only asks for
+    what is new.
+    """
+
+    def __init__(
+        self,
+        api,
+        game_version: str,
+        loader: str,
+        include_optional: bool = False,
+        workers: int = 8,
+        share: "Resolver | None" = None,
+    ):
+        self.api = api
+        self.game_version = game_version
+        self.loader = loader
+        self.include_optional = include_optional
+        self.workers = workers
+        # projects and versions do not depend on the target, so resolvers for
+        # other targets (and CompatSource) can fill and read the same ones
+        self._projects: dict[str, dict] = share._projects if share else {}
+        self._matching: dict[str, dict | None] = {}
+        self._versions: dict[str, dict] = share._versions if share else {}
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    def _count(self, n: int = 1):
+        with self._lock:
+            self._requests += n
+
+    def _fetch_projects(self, pool: ThreadPoolExecutor, keys: list[str]):
+        keys = [k for k in keys if k not in self._projects]
+        chunks = [keys[i : i + MAX_IDS] for i in range(0, len(keys), MAX_IDS)]
+        self._count(len(chunks))
+        for projects in pool.map(self.api.get_projects, chunks):
+            for project in projects:
+                self._projects[project["id"]] = project
+                if project.get("slug"):
+                    self._projects[project["slug"]] = project
+
+    def _supports(self, project: dict) -> bool:
+        game_versions = project.get("game_versions") or [self.game_version]
+        loaders = project.get("loaders") or [self.loader]
+        return self.game_version in game_versions and self.loader in loaders
+
+    def _matches(self, version: dict) -> bool:
+        return self.game_version in version.get("game_versions", ()) and self.loader in version.get(
+            "loaders", ()
+        )
+
+    @staticmethod
+    def _pick(versions: list[dict]) -> dict | None:
+        releases = [v for v in versions if v.get("version_type") == "release"]
+        candidates = releases or versions
+        if not candidates:
+            return None
+        return max(candidates, key=lambda v: v.get("date_published") or "")
+
+    def _matching_version(self, project_id: str) -> dict | None:
+        self._count()
+        try:
+            versions = self.api.get_project_versions(
+                project_id, [self.game_version], [self.loader]
+            )
+        except requests.HTTPError:
+            return None
+        return self._pick(versions)
+
+    def _fetch_matching(self, pool: ThreadPoolExecutor, project_ids: list[str]):
+        # the newest few versions of every project come in bulk; only projects
+        # whose match is older than that are asked for one by one
+        windows: dict[str, list[str]] = {}
+        for pid in project_ids:
+            if pid in self._matching:
+                continue
+            project = self._projects[pid]
+            if not self._supports(project):
+                self._matching[pid] = None
+            else:
+                windows[pid] = project.get("versions", [])[-VERSION_WINDOW:]
+        self._fetch_versions(pool, [vid for vids in windows.values() for vid in vids])
+        fallback = []
+        for pid, vids in windows.items():
+            matching = [
+                self._versions[vid]
+                for vid in vids
+                if vid in self._versions and self._matches(self._versions[vid])
+            ]
+            if matching:
+                self._matching[pid] = self._pick(matching)
+            else:
+                fallback.append(pid)
+        for pid, version in zip(fallback, pool.map(self._matching_version, fallback)):
+            self._matching[pid] = version
+            if version is not None:
+                self._versions[version["id"]] = version
+
+    def _fetch_versions(self, pool: ThreadPoolExecutor, ids: list[str]):
+        ids = list(dict.fromkeys(vid for vid in ids if vid not in self._versions))
+        chunks = [ids[i : i + MAX_IDS] for i in range(0, len(ids), MAX_IDS)]
+        self._count(len(chunks))
+        for versions in pool.map(self.api.get_versions, chunks):
+            for version in versions:
+                self._versions[version["id"]] = version
+
+    def project(self, key: str) -> dict | None:
+        """A project fetched earlier, by id or slug."""
+        return self._projects.get(key)
+
+    def projects(self, keys: Iterable[str]) -> dict[str, dict]:
+        """Projects by id or slug, fetched in bulk where not known yet; unknown keys are left out."""
+        keys = list(dict.fromkeys(keys))
+        with ThreadPoolExecutor(self.workers) as pool:
+            self._fetch_projects(pool, keys)
+        return {key: self._projects[key] for key in keys if key in self._projects}
+
+    def versions(self, ids: Iterable[str]) -> dict[str, dict]:
+        """Versions by id, fetched in bulk where not known yet."""
+        ids = list(dict.fromkeys(ids))
+        with ThreadPoolExecutor(self.workers) as pool:
+            self._fetch_versions(pool, ids)
+        return {vid: self._versions[vid] for vid in ids if vid in self._versions}
+
+    def versions_for(self, mods: Iterable[Mod]) -> dict[str, dict | None]:
+        """Matching version of every mod by mod_key, without following dependencies."""
+        keys = list(dict.fromkeys(mod_key(mod) for mod in mods if mod_key(mod)))
+        with ThreadPoolExecutor(self.workers) as pool:
+            self._fetch_projects(pool, keys)
+            pids = {key: self._projects[key]["id"] for key in keys if key in self._projects}
+            self._fetch_matching(pool, list(dict.fromkeys(pids.values())))
+        return {key: self._matching.get(pids[key]) if key in pids else None for key in keys}
+
+    def resolve(self, mods: Iterable[Mod], progress=None) -> DependencyGraph:
+        graph = DependencyGraph(self.game_version, self.loader)
+        self._requests = 0
+        frontier = list(dict.fromkeys(mod_key(mod) for mod in mods if mod_key(mod)))
+        board = set(frontier)
+        queued = set(frontier)
+        depth = 0
+        with ThreadPoolExecutor(self.workers) as pool:
+            while frontier:
+                self._fetch_projects(pool, frontier)
+                level = []
+                for key in frontier:
+                    project = self._projects.get(key)
+                    if project is None:
+                        if key in board:
+                            graph.unknown.append(key)
+                        continue
+                    pid = project["id"]
+                    node = graph.projects.get(pid)
+                    if node is None:
+                        node = graph.projects[pid] = ResolvedProject(
+                            pid, project.get("slug", ""), project.get("title", pid)
+                        )
+                        level.append(pid)
+                    if key in board:
+                        node.on_board = True
+                        graph.board_keys[key] = pid
+                self._fetch_matching(pool, level)
+                for pid in level:
+                    graph.projects[pid].version = self._matching.get(pid)
+
+                deps = [
+                    (pid, dep)
+                    for pid in level
+                    if graph.projects[pid].version is not None
+                    for dep in graph.projects[pid].version.get("dependencies", [])
+                ]
+                pinned = [
+                    dep["version_id"]
+                    for _pid, dep in deps
+                    if not dep.get("project_id") and dep.get("version_id")
+                ]
+                if pinned:
+                    self._fetch_versions(pool, pinned)
+
+                frontier = []
+                for pid, dep in deps:
+                    kind = dep.get("dependency_type")
+                    dep_pid = dep.get("project_id")
+                    if not dep_pid and dep.get("version_id") in self._versions:
+                        dep_pid = self._versions[dep["version_id"]]["project_id"]
+                    if not dep_pid or kind not in (REQUIRED, OPTIONAL, INCOMPATIBLE):
+                        continue
+                    graph.edges.append((pid, dep_pid, kind))
+                    follow = kind == REQUIRED or (kind == OPTIONAL and self.include_optional)
+                    if follow and dep_pid not in queued:
+                        queued.add(dep_pid)
+                        frontier.append(dep_pid)
+                depth += 1
+                if progress is not None:
+                    progress(depth, len(graph.projects))
+        # incompatibilities with projects outside the graph do not matter
+        graph.edges = [(a, b, kind) for a, b, kind in graph.edges if b in graph.projects]
+        for a, b, kind in graph.edges:
+            if kind == REQUIRED:
+                graph.projects[b].required_by.add(a)
+        graph.requests = self._requests
+        return graph
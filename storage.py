@@ -1,15 +1,318 @@
+import os
+import sys
 import json
-from typing import List
-from models import Category
+import struct
+from array import array
+from typing import Iterable, Iterator, List
+import tracing
+from models import Category, Mod
 
+BINARY_MAGIC = b"MPDB"
+BINARY_VERSION = 1
+BINARY_EXTENSIONS = (".mpdb",)
 
-def save_schema(categories: List[Category], path: str):
-    data = [cat.to_dict() for cat in categories]
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+CATEGORY_STR_FIELDS = ["id", "name", "color"]
+CATEGORY_FLOAT_FIELDS = ["x", "y", "width", "height"]
+MOD_STR_FIELDS = [
+    "slug",
+    "title",
+    "description",
+    "author",
+    "version",
+    "url",
+    "id",
+    "project_id",
+]
+# MOD_STR_FIELDS before this index precede the coordinates in Mod's constructor
+_MOD_LEADING_STRS = 6
+MOD_FLOAT_FIELDS = ["x", "y"]
 
+_U32 = struct.Struct("<I")
+_RECORD_HEADER = struct.Struct("<II")
 
+
+def _array(typecode: str, values=()) -> array:
+    return array(typecode, values)
+
+
+def _to_le(arr: array) -> bytes:
+    if sys.byteorder != "little":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _from_le(typecode: str, data) -> array:
+    arr = array(typecode)
+    arr.frombytes(data)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr
+
+
+class BinarySchemaWriter:
+    """Writes categories one at a time to the compact binary format.
+
+    File: magic, version byte, length-prefixed JSON header naming the fields,
+    then one length-prefixed record per category. Strings go into a table
+    shared by the whole file; a record carries only the strings it is the
+    first to use, followed by fixed-width columns of string ids and doubles.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.strings: dict[str, int] = {}
+        header = json.dumps(
+            {
+                "category": {"str": CATEGORY_STR_FIELDS, "float": CATEGORY_FLOAT_FIELDS},
+                "mod": {"str": MOD_STR_FIELDS, "float": MOD_FLOAT_FIELDS},
+            }
+        ).encode()
+        f.write(BINARY_MAGIC + bytes([BINARY_VERSION]) + _U32.pack(len(header)) + header)
+
+    def write(self, category: Category):
+        strings = self.strings
+        new: list[str] = []
+
+        def ref(value) -> int:
+            value = "" if value is None else str(value)
+            idx = strings.get(value)
+            if idx is None:
+                idx = strings[value] = len(strings)
+                new.append(value)
+            return idx
+
+        cat_refs = _array("I", (ref(getattr(category, f)) for f in CATEGORY_STR_FIELDS))
+        cat_floats = _array("d", (getattr(category, f) for f in CATEGORY_FLOAT_FIELDS))
+        mod_refs = _array("I")
+        mod_floats = _array("d")
+        for mod in category.mods:
+            mod_refs.extend(ref(getattr(mod, f)) for f in MOD_STR_FIELDS)
+            mod_floats.extend(getattr(mod, f) for f in MOD_FLOAT_FIELDS)
+
+        blob = "".join(new).encode("utf-8")
+        body = b"".join(
+            (
+                _RECORD_HEADER.pack(len(category.mods), len(new)),
+                _to_le(_array("I", (len(s) for s in new))),
+                _U32.pack(len(blob)),
+                blob,
+                _to_le(cat_refs),
+                _to_le(cat_floats),
+                _to_le(mod_refs),
+                _to_le(mod_floats),
+            )
+        )
+        self.f.write(_U32.pack(len(body)) + body)
+
+    def close(self):
+        self.f.close()
+
+    def abort(self):
+        self.f.discard()
+
+
+class JsonSchemaWriter:
+    def __init__(self, f):
+        self.f = f
+        self.data: list[dict] = []
+
+    def write(self, category: Category):
+        self.data.append(category.to_dict())
+
+    def close(self):
+        try:
+            json.dump(self.data, self.f, indent=2)
+        except BaseException:
+            self.f.discard()
+            raise
+        self.f.close()
+
+    def abort(self):
+        self.f.discard()
+
+
+class _ReplacingFile:
+    """Writes to `path`.tmp, which replaces `path` on close; `discard` drops it instead."""
+
+    def __init__(self, path: str, mode: str, **kwargs):
+        self.path = path
+        self.tmp = path + ".tmp"
+        self.f = open(self.tmp, mode, **kwargs)
+
+    def write(self, data):
+        return self.f.write(data)
+
+    def close(self):
+        self.f.close()
+        os.replace(self.tmp, self.path)
+
+    def discard(self):
+        self.f.close()
+        try:
+            os.remove(self.tmp)
+        except FileNotFoundError:
+            pass
+
+
+def schema_format(path: str) -> str:
+    """Format of an existing file by its magic bytes, else by extension."""
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(BINARY_MAGIC)) == BINARY_MAGIC:
+                return "binary"
+        return "json"
+    except FileNotFoundError:
+        return "binary" if path.lower().endswith(BINARY_EXTENSIONS) else "json"
+
+
+def open_writer(path: str, fmt: str | None = None):
+    """A schema writer for `path`; the file is only replaced by `close()`, `abort()` leaves it be."""
+    if fmt is None:
+        fmt = "binary" if path.lower().endswith(BINARY_EXTENSIONS) else "json"
+    if fmt == "binary":
+        return BinarySchemaWriter(_ReplacingFile(path, "wb"))
+    return JsonSchemaWriter(_ReplacingFile(path, "w", encoding="utf-8"))
+
+
+@tracing.traced("storage.save_schema")
+def save_schema(categories: Iterable[Category], path: str, fmt: str | None = None):
+    writer = open_writer(path, fmt)
+    try:
+        for cat in categories:
+            writer.write(cat)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+
+
+def _fill_ids(cat: Category, index: int, category: bool, mods: Iterable[int]):
+    # files from before ids existed get ids derived from their position, so a
+    # journal written against such a file still matches it when it is reopened;
+    # `mods` are the positions of the mods without an id, the others keep theirs
+    if category:
+        cat.id = f"c{index}"
+    for j in mods:
+        cat.mods[j].id = f"c{index}m{j}"
+
+
+def _iter_binary(f) -> Iterator[Category]:
+    # a cut-off or damaged file fails as unreadable like any other, not with struct's errors
+    try:
+        yield from _decode_binary(f)
+    except (struct.error, IndexError) as exc:
+        raise ValueError(f"truncated or corrupt binary schema file: {exc}") from exc
+
+
+def _decode_binary(f) -> Iterator[Category]:
+    if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise ValueError("not a binary schema file")
+    version = f.read(1)[0]
+    if version != BINARY_VERSION:
+        raise ValueError(f"unsupported binary schema version {version}")
+    (header_len,) = _U32.unpack(f.read(4))
+    header = json.loads(f.read(header_len))
+    cat_str, cat_float = header["category"]["str"], header["category"]["float"]
+    mod_str, mod_float = header["mod"]["str"], header["mod"]["float"]
+    # fields written by a newer version are skipped
+    known_cat = set(CATEGORY_STR_FIELDS + CATEGORY_FLOAT_FIELDS)
+    known_mod = set(MOD_STR_FIELDS + MOD_FLOAT_FIELDS)
+    n_ms, n_mf = len(mod_str), len(mod_float)
+    # files written by this version map positionally onto Mod's constructor
+    same_layout = mod_str == MOD_STR_FIELDS and mod_float == MOD_FLOAT_FIELDS
+    table: list[str] = []
+    legacy = "id" not in cat_str or "id" not in mod_str
+    index = 0
+
+    while True:
+        prefix = f.read(4)
+        if len(prefix) < 4:
+            return
+        (size,) = _U32.unpack(prefix)
+        body = memoryview(f.read(size))
+        if len(body) < size:
+            raise ValueError("truncated binary schema file")
+        n_mods, n_new = _RECORD_HEADER.unpack_from(body, 0)
+        pos = _RECORD_HEADER.size
+        lengths = _from_le("I", body[pos : pos + 4 * n_new])
+        pos += 4 * n_new
+        (blob_len,) = _U32.unpack_from(body, pos)
+        pos += 4
+        text = str(body[pos : pos + blob_len], "utf-8")
+        pos += blob_len
+        start = 0
+        for length in lengths:
+            table.append(text[start : start + length])
+            start += length
+
+        def take(typecode: str, count: int) -> array:
+            nonlocal pos
+            width = 4 if typecode == "I" else 8
+            arr = _from_le(typecode, body[pos : pos + width * count])
+            pos += width * count
+            return arr
+
+        c_refs = take("I", len(cat_str))
+        c_floats = take("d", len(cat_float))
+        m_refs = take("I", n_mods * n_ms)
+        m_floats = take("d", n_mods * n_mf)
+
+        kwargs = {f: table[i] for f, i in zip(cat_str, c_refs) if f in known_cat}
+        kwargs.update((f, v) for f, v in zip(cat_float, c_floats) if f in known_cat)
+        cat = Category(**kwargs)
+        strs = [table[i] for i in m_refs]
+        if same_layout:
+            lead = _MOD_LEADING_STRS
+            cat.mods = [
+                Mod(
+                    *strs[m * n_ms : m * n_ms + lead],
+                    *m_floats[m * n_mf : (m + 1) * n_mf],
+                    *strs[m * n_ms + lead : (m + 1) * n_ms],
+                )
+                for m in range(n_mods)
+            ]
+        else:
+            mods = []
+            for m in range(n_mods):
+                values = dict(zip(mod_str, strs[m * n_ms : (m + 1) * n_ms]))
+                values.update(zip(mod_float, m_floats[m * n_mf : (m + 1) * n_mf]))
+                mods.append(Mod(**{k: v for k, v in values.items() if k in known_mod}))
+            cat.mods = mods
+        if legacy:
+            _fill_ids(
+                cat, index, "id" not in cat_str, range(len(cat.mods)) if "id" not in mod_str else ()
+            )
+        index += 1
+        yield cat
+
+
+def iter_schema(path: str) -> Iterator[Category]:
+    """Yield the categories of a schema file one by one, in either format."""
+    if schema_format(path) == "binary":
+        with open(path, "rb", buffering=1 << 16) as f:
+            yield from _iter_binary(f)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for index, data_cat in enumerate(data):
+            cat = Category.from_dict(data_cat)
+            _fill_ids(
+                cat,
+                index,
+                not data_cat.get("id"),
+                [j for j, mod in enumerate(data_cat.get("mods", [])) if not mod.get("id")],
+            )
+            yield cat
+
+
+@tracing.traced("storage.load_schema")
 def load_schema(path: str) -> List[Category]:
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return [Category.from_dict(cat) for cat in data]
+    return list(iter_schema(path))
+
+
+def convert_schema(src: str, dst: str, fmt: str | None = None):
+    """Rewrite `src` as `dst`; the target format follows `fmt` or dst's extension."""
+    if os.path.abspath(src) == os.path.abspath(dst):
+        raise ValueError("source and destination must differ")
+    save_schema(iter_schema(src), dst, fmt)
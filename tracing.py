@@ -0,0 +1,246 @@
+"""Spans, counters and a stall detector for finding where time goes.
+
+Off unless MODPACK_TRACE is set or `enable()` is called; while off a traced
+call costs one attribute check. Spans are kept in a bounded ring and can be
+exported as Chrome trace-event JSON (chrome://tracing, Perfetto).
+"""
+import os
+import json
+import time
+import threading
+import functools
+from collections import defaultdict, deque
+
+MAX_EVENTS = 200_000
+# durations kept per span name for live statistics
+RECENT = 200
+STALL_MS = 100
+
+
+class SpanStats:
+    __slots__ = ("count", "total", "max", "recent")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: deque[float] = deque(maxlen=RECENT)
+
+    def add(self, ms: float):
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.recent.append(ms)
+
+    def percentile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Tracer:
+    def __init__(self, max_events: int = MAX_EVENTS):
+        self.enabled = False
+        self.events: deque[dict] = deque(maxlen=max_events)
+        self.stats: defaultdict[str, SpanStats] = defaultdict(SpanStats)
+        self.counters: defaultdict[str, float] = defaultdict(float)
+        self.stalls: deque[dict] = deque(maxlen=1000)
+        # thread id -> names of the spans open on it, innermost last
+        self.active: dict[int, list[str]] = {}
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self.stats.clear()
+            self.counters.clear()
+            self.stalls.clear()
+
+    def now_us(self, t: float | None = None) -> float:
+        """Microseconds since the tracer was created, of `t` or of now."""
+        return ((time.perf_counter() if t is None else t) - self._origin) * 1e6
+
+    def begin(self, name: str) -> float:
+        self.active.setdefault(threading.get_ident(), []).append(name)
+        return self.now_us()
+
+    def end(self, name: str, start_us: float, args: dict | None = None):
+        tid = threading.get_ident()
+        stack = self.active.get(tid)
+        if stack:
+            stack.pop()
+        dur = self.now_us() - start_us
+        event = {"name": name, "ph": "X", "ts": start_us, "dur": dur, "tid": tid}
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+            self.stats[name].add(dur / 1000)
+
+    def count(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] += value
+            total = self.counters[name]
+            self.events.append(
+                {"name": name, "ph": "C", "ts": self.now_us(), "tid": 0, "args": {name: total}}
+            )
+
+    def current_span(self, tid: int) -> str | None:
+        stack = self.active.get(tid)
+        return " > ".join(stack) if stack else None
+
+    def stall(self, tid: int, start_us: float, dur_us: float, spans: list[str]):
+        with self._lock:
+            record = {"ts": start_us, "dur": dur_us, "spans": spans}
+            self.stalls.append(record)
+            self.events.append(
+                {
+                    "name": "stall",
+                    "ph": "X",
+                    "ts": start_us,
+                    "dur": dur_us,
+                    "tid": tid,
+                    "args": {"spans": spans},
+                }
+            )
+            self.stats["stall"].add(dur_us / 1000)
+
+    def export_chrome(self, path: str):
+        pid = os.getpid()
+        with self._lock:
+            events = [dict(event, pid=pid) for event in self.events]
+        for tid, name in _thread_names().items():
+            events.append(
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            )
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        os.replace(tmp, path)
+
+
+def _thread_names() -> dict[int, str]:
+    return {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+
+
+_tracer = Tracer()
+_tracer.enabled = bool(os.environ.get("MODPACK_TRACE"))
+
+
+def tracer() -> Tracer:
+    return _tracer
+
+
+def enable(on: bool = True):
+    _tracer.enabled = on
+
+
+def enabled() -> bool:
+    return _tracer.enabled
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name: str, args: dict | None):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = _tracer.begin(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        _tracer.end(self.name, self.start, self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+def span(name: str, **args):
+    """Context manager timing its block as `name`."""
+    if not _tracer.enabled:
+        return _NULL
+    return _Span(name, args or None)
+
+
+def traced(name: str):
+    """Decorator timing every call of the function as `name`."""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return fn(*args, **kwargs)
+            start = _tracer.begin(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _tracer.end(name, start)
+
+        return wrapper
+
+    return decorate
+
+
+def count(name: str, value: float = 1):
+    if _tracer.enabled:
+        _tracer.count(name, value)
+
+
+class StallDetector:
+    """Records every block of a thread's event loop longer than `threshold_ms`.
+
+    The watched thread calls `beat()` from a timer on its event loop; a
+    watchdog thread notices when the beats stop and samples the spans open
+    on the watched thread meanwhile, so the stall is attributed to whatever
+    was running during it.
+    """
+
+    def __init__(self, threshold_ms: float = STALL_MS, thread_id: int | None = None):
+        self.threshold = threshold_ms / 1000
+        self.thread_id = thread_id or threading.get_ident()
+        self._last = time.perf_counter()
+        self._spans: list[str] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def beat(self):
+        now = time.perf_counter()
+        gap = now - self._last
+        if gap > self.threshold and _tracer.enabled:
+            _tracer.stall(self.thread_id, _tracer.now_us(self._last), gap * 1e6, self._spans or ["?"])
+        self._last = now
+        self._spans = []
+
+    def start(self):
+        if self._thread is None:
+            self._last = time.perf_counter()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _watch(self):
+        interval = max(0.005, self.threshold / 4)
+        while not self._stop.wait(interval):
+            if time.perf_counter() - self._last > self.threshold:
+                current = _tracer.current_span(self.thread_id)
+                if current and current not in self._spans:
+                    self._spans.append(current)
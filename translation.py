@@ -0,0 +1,137 @@
+import os
+import hashlib
+import sqlite3
+import threading
+
+import tracing
+from modrinth_api import CACHE_DIR
+
+BATCH_SEPARATOR = "\n\n"
+
+
+class GoogleBackend:
+    def __init__(self, max_chars: int = 4500):
+        self.max_chars = max_chars
+
+    def translate_batch(self, texts: list[str], source: str, target: str) -> list[str]:
+        from deep_translator import GoogleTranslator
+
+        translator = GoogleTranslator(source=source, target=target)
+        results: list[str] = []
+        for chunk in self._chunks(texts):
+            joined = BATCH_SEPARATOR.join(chunk)
+            translated = translator.translate(joined) or ""
+            parts = [p.strip() for p in translated.split(BATCH_SEPARATOR)]
+            if len(parts) != len(chunk):
+                # the separator did not survive translation, fall back to one call per text
+                parts = [translator.translate(text) or text for text in chunk]
+            results.extend(parts)
+        return results
+
+    def _chunks(self, texts: list[str]):
+        chunk: list[str] = []
+        size = 0
+        for text in texts:
+            text = " ".join(text.split())
+            if chunk and size + len(text) + len(BATCH_SEPARATOR) > self.max_chars:
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(text)
+            size += len(text) + len(BATCH_SEPARATOR)
+        if chunk:
+            yield chunk
+
+
+class OfflineBackend:
+    def translate_batch(self, texts: list[str], source: str, target: str) -> list[str]:
+        return list(texts)
+
+
+BACKENDS = {"google": GoogleBackend, "offline": OfflineBackend}
+
+
+class TranslationCache:
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(CACHE_DIR, "translations.sqlite")
+        self._memory: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+
+    @staticmethod
+    def key(text: str, target: str) -> str:
+        return hashlib.sha1(f"{target}\0{text}".encode()).hexdigest()
+
+    def _conn(self) -> sqlite3.Connection | None:
+        if self._db is None:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._db = sqlite3.connect(self.path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, text TEXT)"
+                )
+            except sqlite3.Error:
+                return None
+        return self._db
+
+    def get(self, text: str, target: str) -> str | None:
+        key = self.key(text, target)
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+            db = self._conn()
+            if db is None:
+                return None
+            row = db.execute("SELECT text FROM translations WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._memory[key] = row[0]
+                return row[0]
+        return None
+
+    def put_many(self, pairs: dict[str, str], target: str):
+        rows = [(self.key(text, target), translated) for text, translated in pairs.items()]
+        with self._lock:
+            self._memory.update(rows)
+            db = self._conn()
+            if db is None:
+                return
+            with db:
+                db.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?)", rows)
+
+
+class Translator:
+    def __init__(
+        self,
+        backend=None,
+        source: str = "en",
+        target: str = "ru",
+        cache: TranslationCache | None = None,
+    ):
+        if backend is None:
+            backend = BACKENDS[os.environ.get("MODPACK_TRANSLATOR", "google")]()
+        self.backend = backend
+        self.source = source
+        self.target = target
+        self.cache = cache if cache is not None else TranslationCache()
+
+    def cached(self, text: str) -> str | None:
+        return self.cache.get(text, self.target)
+
+    @tracing.traced("translate")
+    def translate_many(self, texts: list[str]) -> dict[str, str]:
+        result: dict[str, str] = {}
+        missing: list[str] = []
+        for text in dict.fromkeys(texts):
+            cached = self.cached(text)
+            if cached is None:
+                missing.append(text)
+            else:
+                result[text] = cached
+        if missing:
+            try:
+                translated = self.backend.translate_batch(missing, self.source, self.target)
+            except Exception:
+                return result
+            fresh = dict(zip(missing, translated))
+            self.cache.put_many(fresh, self.target)
+            result.update(fresh)
+        return result
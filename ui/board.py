@@ -1,23 +1,92 @@
 from PySide6 import QtCore, QtGui, QtWidgets
+import tracing
+from board_index import BoardIndex
+from layout import GRID, NODE_HEIGHT, NODE_WIDTH, auto_layout
 from models import Mod, Category
-import ast
+from .mime import MOD_MIME, decode_mods
+import math
+
+# boards with more nodes than this switch to the large-board render settings
+LARGE_BOARD_NODES = 300
+# below this level of detail nodes are drawn as plain rects without text
+TEXT_LOD = 0.45
+# below this level of detail nodes are not drawn at all, only their category
+CULL_LOD = 0.15
+# schemas with more mods than this create nodes only for visible categories
+LAZY_LOAD_MODS = 300
+# released nodes kept around for reuse
+NODE_POOL_SIZE = 2000
+# gap between nodes laid out by a multi-mod drop
+DROP_SPACING = 10
+# outline colors for the statuses set by the dependency resolver
+STATUS_COLORS = {"missing": "#e0a030", "incompatible": "#e05050"}
+# outline of nodes matched by the find bar, and opacity of the ones filtered out
+HIGHLIGHT_COLOR = "#4aa3ff"
+DIMMED_OPACITY = 0.25
 
 
 class NodeItem(QtWidgets.QGraphicsRectItem):
     def __init__(self, mod: Mod, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.mod = mod
-        self.setRect(0, 0, 120, 40)
+        self.setRect(0, 0, NODE_WIDTH, NODE_HEIGHT)
         self.setFlag(QtWidgets.QGraphicsItem.ItemIsMovable, True)
         self.setFlag(QtWidgets.QGraphicsItem.ItemIsSelectable, True)
-        self.text = QtWidgets.QGraphicsTextItem(mod.title, self)
-        self.text.setPos(5, 5)
 
-    def expand_to_fit(self, item: QtWidgets.QGraphicsItem):
-        rect = self.rect()
-        child_rect = item.mapRectToParent(item.boundingRect())
-        needed = rect.united(child_rect.adjusted(0, 0, 20, 20))
-        self.setRect(0, 0, needed.width(), needed.height())
+    def itemChange(self, change, value):
+        if change == QtWidgets.QGraphicsItem.ItemSceneChange:
+            old = self.scene()
+            if isinstance(old, BoardScene):
+                old.node_count -= 1
+                if old.node_items.get(self.mod.id) is self:
+                    del old.node_items[self.mod.id]
+        elif change == QtWidgets.QGraphicsItem.ItemSceneHasChanged:
+            if isinstance(value, BoardScene):
+                value.node_count += 1
+                value.node_items[self.mod.id] = self
+                self.setCacheMode(
+                    QtWidgets.QGraphicsItem.DeviceCoordinateCache
+                    if value.large_mode
+                    else QtWidgets.QGraphicsItem.NoCache
+                )
+        return super().itemChange(change, value)
+
+    def paint(self, painter: QtGui.QPainter, option, widget=None):
+        lod = option.levelOfDetailFromTransform(painter.worldTransform())
+        if lod < CULL_LOD:
+            return
+        scene = self.scene()
+        highlighted = isinstance(scene, BoardScene) and self.mod.id in scene.highlighted
+        if isinstance(scene, BoardScene) and scene.filter_ids is not None:
+            if self.mod.id not in scene.filter_ids:
+                painter.setOpacity(DIMMED_OPACITY)
+        if lod < TEXT_LOD:
+            painter.fillRect(self.rect(), QtGui.QColor(HIGHLIGHT_COLOR if highlighted else "#5a5a5a"))
+            return
+        super().paint(painter, option, widget)
+        text_rect = self.rect().adjusted(9, 5, -5, -5)
+        fm = painter.fontMetrics()
+        title = fm.elidedText(self.mod.title, QtCore.Qt.ElideRight, int(text_rect.width()))
+        painter.drawText(text_rect, QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop, title)
+        status = self.status()
+        if status is not None:
+            painter.setPen(QtGui.QPen(QtGui.QColor(STATUS_COLORS[status[0]]), 3))
+            painter.setBrush(QtCore.Qt.NoBrush)
+            painter.drawRect(self.rect().adjusted(1, 1, -1, -1))
+        if highlighted:
+            painter.setPen(QtGui.QPen(QtGui.QColor(HIGHLIGHT_COLOR), 2))
+            painter.setBrush(QtCore.Qt.NoBrush)
+            painter.drawRect(self.rect().adjusted(4, 4, -4, -4))
+
+    def status(self) -> tuple[str, str] | None:
+        scene = self.scene()
+        if not isinstance(scene, BoardScene) or not scene.mod_status:
+            return None
+        return scene.mod_status.get(self.mod.project_id or self.mod.slug)
+
+    def set_mod(self, mod: Mod):
+        self.mod = mod
+        self.update()
 
     def to_model(self) -> Mod:
         self.mod.x = self.scenePos().x()
@@ -38,69 +107,349 @@ class CategoryItem(QtWidgets.QGraphicsRectItem):
         self.text = QtWidgets.QGraphicsTextItem(category.name, self)
         self.text.setDefaultTextColor(QtGui.QColor("white"))
         self.text.setPos(5, 5)
+        # node rects drawn in one call while the nodes themselves are culled
+        self.culled_rects: list[QtCore.QRectF] | None = None
+        # lazy categories create their nodes only while near the viewport;
+        # `materialized` is False while the mods only exist in `category.mods`
+        self.lazy = False
+        self.materialized = True
+
+    def nodes(self) -> list[NodeItem]:
+        return [item for item in self.childItems() if isinstance(item, NodeItem)]
+
+    def _local(self, mod: Mod) -> QtCore.QPointF:
+        # mod coordinates are scene coordinates relative to the model's category position
+        return QtCore.QPointF(mod.x - self.category.x, mod.y - self.category.y)
+
+    def expand_to_fit(self, *items: QtWidgets.QGraphicsItem):
+        needed = self.rect()
+        for item in items:
+            child_rect = item.mapRectToParent(item.boundingRect())
+            needed = needed.united(child_rect.adjusted(0, 0, 20, 20))
+        self.setRect(0, 0, needed.width(), needed.height())
+
+    def fit_to_mods(self):
+        rect = self.rect()
+        for mod in self.category.mods:
+            pos = self._local(mod)
+            rect = rect.united(
+                QtCore.QRectF(pos.x(), pos.y(), NODE_WIDTH + 20, NODE_HEIGHT + 20)
+            )
+        self.setRect(0, 0, rect.width(), rect.height())
+
+    def materialize(self, pool: list[NodeItem] | None = None):
+        if self.materialized:
+            return
+        self.build_nodes(pool)
+        self.materialized = True
+        if isinstance(self.scene(), BoardScene):
+            self.scene().lazy_node_count -= len(self.category.mods)
+
+    def build_nodes(self, pool: list[NodeItem] | None = None):
+        culled = isinstance(self.scene(), BoardScene) and self.scene().nodes_culled
+        for mod in self.category.mods:
+            if pool:
+                node = pool.pop()
+                node.set_mod(mod)
+            else:
+                node = NodeItem(mod)
+            node.setVisible(not culled)
+            node.setParentItem(self)
+            node.setPos(self._local(mod))
+
+    def release(self, pool: list[NodeItem] | None = None):
+        if not self.materialized:
+            return
+        self.to_model()
+        scene = self.scene()
+        for node in self.nodes():
+            node.setParentItem(None)
+            if scene is not None:
+                scene.removeItem(node)
+            if pool is not None and len(pool) < NODE_POOL_SIZE:
+                node.setVisible(True)
+                pool.append(node)
+        self.materialized = False
+        if isinstance(scene, BoardScene):
+            scene.lazy_node_count += len(self.category.mods)
+
+    def set_color(self, color: str):
+        brush = QtGui.QColor(color)
+        brush.setAlpha(100)
+        self.setBrush(brush)
+        self.category.color = color
+
+    def set_nodes_culled(self, culled: bool):
+        nodes = self.nodes()
+        for node in nodes:
+            node.setVisible(not culled)
+        self.text.setVisible(not culled)
+        if not culled:
+            self.culled_rects = None
+        elif self.materialized:
+            self.culled_rects = [node.mapRectToParent(node.rect()) for node in nodes]
+        else:
+            self.culled_rects = [
+                QtCore.QRectF(self._local(mod), QtCore.QSizeF(NODE_WIDTH, NODE_HEIGHT))
+                for mod in self.category.mods
+            ]
+        self.update()
+
+    def paint(self, painter: QtGui.QPainter, option, widget=None):
+        super().paint(painter, option, widget)
+        if self.culled_rects:
+            painter.setPen(QtCore.Qt.NoPen)
+            painter.setBrush(QtGui.QColor("#5a5a5a"))
+            painter.drawRects(self.culled_rects)
 
     def to_model(self) -> Category:
-        self.category.x = self.scenePos().x()
-        self.category.y = self.scenePos().y()
+        pos = self.scenePos()
+        if self.materialized:
+            # collect mods inside
+            self.category.mods = [node.to_model() for node in self.nodes()]
+        else:
+            dx = pos.x() - self.category.x
+            dy = pos.y() - self.category.y
+            if dx or dy:
+                for mod in self.category.mods:
+                    mod.x += dx
+                    mod.y += dy
+        self.category.x = pos.x()
+        self.category.y = pos.y()
         self.category.width = self.rect().width()
         self.category.height = self.rect().height()
         self.category.color = self.brush().color().name()
-        # collect mods inside
-        self.category.mods = []
-        for item in self.childItems():
-            if isinstance(item, NodeItem):
-                self.category.mods.append(item.to_model())
         return self.category
 
 
 class BoardScene(QtWidgets.QGraphicsScene):
+    # one journal record per user edit, see journal.apply_records
+    edited = QtCore.Signal(dict)
+    # mods placed on or taken off the board; board_reset means all of them went
+    mods_added = QtCore.Signal(list)
+    mods_removed = QtCore.Signal(list)
+    board_reset = QtCore.Signal()
+    # mods already on the board that a drop tried to add again
+    duplicates_dropped = QtCore.Signal(list)
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.setBackgroundBrush(QtGui.QColor("#1e1e1e"))
+        self.node_count = 0
+        self.lazy_node_count = 0
+        self.large_mode = False
+        self.nodes_culled = False
+        # mod key (project id or slug) -> (status, message), see resolver.DependencyGraph
+        self.mod_status: dict[str, tuple[str, str]] = {}
+        # what is on the board, so lookups never walk the scene; nodes only
+        # exist for materialized categories, the index has every mod
+        self.index = BoardIndex()
+        self.category_items: dict[str, CategoryItem] = {}
+        self.node_items: dict[str, NodeItem] = {}
+        # mod ids outlined by the find bar; None shows every node undimmed
+        self.highlighted: set[str] = set()
+        self.filter_ids: set[str] | None = None
+        self._drag_start: dict[QtWidgets.QGraphicsItem, QtCore.QPointF] = {}
+
+    def set_mod_status(self, status: dict[str, tuple[str, str]]):
+        old = self.mod_status
+        self.mod_status = status
+        # statuses are keyed like NodeItem.status looks them up: project id, else slug
+        changed = {key for key in old.keys() | status.keys() if old.get(key) != status.get(key)}
+        self.update_nodes(
+            mod.id
+            for key in changed
+            for mod in self.index.with_project(key) + self.index.with_slug(key)
+            if (mod.project_id or mod.slug) == key
+        )
+
+    def set_highlighted(self, mod_ids):
+        mod_ids = set(mod_ids)
+        changed = self.highlighted ^ mod_ids
+        self.highlighted = mod_ids
+        self.update_nodes(changed)
+
+    def set_filter(self, mod_ids):
+        """Dim every node not in `mod_ids`; None shows all of them again."""
+        self.filter_ids = None if mod_ids is None else set(mod_ids)
+        self.update_nodes(self.node_items)
+
+    def update_nodes(self, mod_ids):
+        # cached nodes keep their old look until updated one by one
+        for mod_id in mod_ids:
+            node = self.node_items.get(mod_id)
+            if node is not None:
+                node.update()
+
+    def add_category_item(self, item: "CategoryItem"):
+        self.addItem(item)
+        self.category_items[item.category.id] = item
+        self.index.add_category(item.category)
+
+    def helpEvent(self, event: QtWidgets.QGraphicsSceneHelpEvent):
+        item = self.itemAt(event.scenePos(), QtGui.QTransform())
+        status = item.status() if isinstance(item, NodeItem) else None
+        if status is not None:
+            QtWidgets.QToolTip.showText(event.screenPos(), status[1])
+            event.accept()
+        else:
+            super().helpEvent(event)
+
+    def record(self, op: str, **fields):
+        fields["op"] = op
+        self.edited.emit(fields)
+
+    def record_move(self, item: QtWidgets.QGraphicsItem):
+        pos = item.scenePos()
+        if isinstance(item, CategoryItem):
+            self.record("move", id=item.category.id, x=pos.x(), y=pos.y())
+        elif isinstance(item, NodeItem) and isinstance(item.parentItem(), CategoryItem):
+            self.record("move", id=item.mod.id, x=pos.x(), y=pos.y())
+
+    def record_resize(self, item: "CategoryItem"):
+        rect = item.rect()
+        self.record("resize", id=item.category.id, width=rect.width(), height=rect.height())
+
+    def mousePressEvent(self, event: QtWidgets.QGraphicsSceneMouseEvent):
+        super().mousePressEvent(event)
+        self._drag_start = {item: item.scenePos() for item in self.selectedItems()}
+
+    def mouseReleaseEvent(self, event: QtWidgets.QGraphicsSceneMouseEvent):
+        super().mouseReleaseEvent(event)
+        moved = [
+            item
+            for item, start in self._drag_start.items()
+            if item.scene() is self and item.scenePos() != start
+        ]
+        self._drag_start = {}
+        # categories first: replaying their move shifts the mods inside
+        moved.sort(key=lambda item: not isinstance(item, CategoryItem))
+        for item in moved:
+            self.record_move(item)
+
+    def keyPressEvent(self, event: QtGui.QKeyEvent):
+        if event.key() in (QtCore.Qt.Key_Delete, QtCore.Qt.Key_Backspace) and self.selectedItems():
+            self.delete_items(self.selectedItems())
+            event.accept()
+        else:
+            super().keyPressEvent(event)
+
+    def delete_items(self, items: list[QtWidgets.QGraphicsItem]):
+        categories = [item for item in items if isinstance(item, CategoryItem)]
+        nodes = [
+            item
+            for item in items
+            if isinstance(item, NodeItem) and item.parentItem() not in categories
+        ]
+        views = [view for view in self.views() if isinstance(view, BoardView)]
+        removed = [node.mod for node in nodes if isinstance(node.parentItem(), CategoryItem)]
+        for item in categories:
+            removed.extend(item.to_model().mods)
+        for node in nodes:
+            if isinstance(node.parentItem(), CategoryItem):
+                self.record("delete", id=node.mod.id)
+            self.removeItem(node)
+        self.index.remove_mods(node.mod for node in nodes)
+        for item in categories:
+            self.record("delete", id=item.category.id)
+            self.category_items.pop(item.category.id, None)
+            self.index.remove_category(item.category.id)
+            if not item.materialized:
+                self.lazy_node_count -= len(item.category.mods)
+            for view in views:
+                if item in view.lazy_categories:
+                    view.lazy_categories.remove(item)
+            self.removeItem(item)
+        for view in views:
+            view.update_render_mode()
+        if removed:
+            self.mods_removed.emit(removed)
+
+    def clear(self):
+        super().clear()
+        self.node_count = 0
+        self.lazy_node_count = 0
+        self.nodes_culled = False
+        self.mod_status = {}
+        self.index.clear()
+        self.category_items = {}
+        self.node_items = {}
+        self.highlighted = set()
+        self.filter_ids = None
+        self.board_reset.emit()
 
     def dragEnterEvent(self, event: QtGui.QDragEnterEvent):
-        if event.mimeData().hasFormat("application/x-mod"):
+        if event.mimeData().hasFormat(MOD_MIME):
             event.acceptProposedAction()
         else:
             super().dragEnterEvent(event)
 
     def dragMoveEvent(self, event: QtGui.QDragMoveEvent):
-        if event.mimeData().hasFormat("application/x-mod"):
+        if event.mimeData().hasFormat(MOD_MIME):
             event.acceptProposedAction()
         else:
             super().dragMoveEvent(event)
 
+    @tracing.traced("board.drop")
     def dropEvent(self, event: QtGui.QDropEvent):
-        if event.mimeData().hasFormat("application/x-mod"):
-            data = event.mimeData().data("application/x-mod").data().decode()
-            mod_dict = ast.literal_eval(data)
-            mod = Mod(
-                slug=mod_dict.get("slug", ""),
-                title=mod_dict.get("title", ""),
-                description=mod_dict.get("description", ""),
-                author=mod_dict.get("author", ""),
-                version=mod_dict.get("versions", ["unknown"])[0],
-                url=f"https://modrinth.com/mod/{mod_dict.get('slug')}",
-            )
+        if not event.mimeData().hasFormat(MOD_MIME):
+            super().dropEvent(event)
+            return
+        try:
+            mods = decode_mods(event.mimeData().data(MOD_MIME).data())
+        except ValueError:
+            event.ignore()
+            return
+        event.acceptProposedAction()
+        # a mod already on the board is not added again, its node is pointed out instead
+        mods, duplicates = self.index.duplicates(mods)
+        existing = {}
+        for mod in duplicates:
+            existing.update((other.id, other) for other in self.index.existing(mod))
+        if mods:
             pos = event.scenePos()
-            item = NodeItem(mod)
             target = self.itemAt(pos, QtGui.QTransform())
-            parent_cat = None
             while target and not isinstance(target, CategoryItem):
                 target = target.parentItem()
-            if isinstance(target, CategoryItem):
-                parent_cat = target
-            if parent_cat:
-                item.setParentItem(parent_cat)
-                item.setPos(parent_cat.mapFromScene(pos))
-                parent_cat.expand_to_fit(item)
-                self.addItem(item)
+            self.add_mods(mods, pos, target)
+        if existing:
+            self.duplicates_dropped.emit(list(existing.values()))
+
+    def add_mods(self, mods: list[Mod], pos: QtCore.QPointF, category: "CategoryItem | None" = None):
+        """Place `mods` in a grid whose top-left corner is at scene `pos`."""
+        columns = max(1, math.ceil(math.sqrt(len(mods))))
+        items = []
+        if category is not None:
+            category.materialize()
+            origin = category.mapFromScene(pos)
+        for i, mod in enumerate(mods):
+            row, col = divmod(i, columns)
+            offset = QtCore.QPointF(
+                col * (NODE_WIDTH + DROP_SPACING), row * (NODE_HEIGHT + DROP_SPACING)
+            )
+            item = NodeItem(mod)
+            if category is not None:
+                item.setParentItem(category)
+                item.setPos(origin + offset)
             else:
-                item.setPos(pos)
+                item.setPos(pos + offset)
                 self.addItem(item)
-            event.acceptProposedAction()
-        else:
-            super().dropEvent(event)
+            items.append(item)
+        self.index.add_mods(mods, category.category.id if category is not None else "")
+        if category is not None:
+            old_rect = category.rect()
+            category.expand_to_fit(*items)
+            for item in items:
+                scene_pos = item.scenePos()
+                item.mod.x, item.mod.y = scene_pos.x(), scene_pos.y()
+                self.record("add_mod", category=category.category.id, mod=item.mod.to_dict())
+            if category.rect() != old_rect:
+                self.record_resize(category)
+            self.mods_added.emit(mods)
+        for view in self.views():
+            if isinstance(view, BoardView):
+                view.update_render_mode()
+        return items
 
 
 class BoardView(QtWidgets.QGraphicsView):
@@ -110,11 +459,123 @@ class BoardView(QtWidgets.QGraphicsView):
         self.setRenderHints(QtGui.QPainter.Antialiasing)
         self.setAcceptDrops(True)
         self.setDragMode(QtWidgets.QGraphicsView.RubberBandDrag)
+        self.setCacheMode(QtWidgets.QGraphicsView.CacheBackground)
+        self.setTransformationAnchor(QtWidgets.QGraphicsView.AnchorUnderMouse)
+        self.node_pool: list[NodeItem] = []
+        self.lazy_categories: list[CategoryItem] = []
+        # game version and loader the pack is built for, used by the resolver
+        self.target_version = ""
+        self.target_loader = ""
+        self._lazy_timer = QtCore.QTimer(self)
+        self._lazy_timer.setSingleShot(True)
+        self._lazy_timer.timeout.connect(self.update_lazy_nodes)
+
+    def set_large_mode(self, large: bool, nodes: int | None = None):
+        """Switch the render settings for boards of `nodes` nodes (by default the scene's count)."""
+        scene = self.scene()
+        if large:
+            if nodes is None:
+                nodes = scene.node_count + scene.lazy_node_count
+            # one level per ~16 nodes keeps leaves small without a deep tree
+            depth = max(6, min(14, int(math.log2(max(1, nodes) / 16)) + 1))
+            if scene.bspTreeDepth() != depth:
+                scene.setBspTreeDepth(depth)
+        if scene.large_mode == large:
+            return
+        scene.large_mode = large
+        self.setRenderHint(QtGui.QPainter.Antialiasing, not large)
+        self.setOptimizationFlag(QtWidgets.QGraphicsView.DontAdjustForAntialiasing, large)
+        if large:
+            self.setViewportUpdateMode(QtWidgets.QGraphicsView.SmartViewportUpdate)
+            QtGui.QPixmapCache.setCacheLimit(max(QtGui.QPixmapCache.cacheLimit(), 128 * 1024))
+        else:
+            self.setViewportUpdateMode(QtWidgets.QGraphicsView.MinimalViewportUpdate)
+            scene.setBspTreeDepth(0)
+        cache = (
+            QtWidgets.QGraphicsItem.DeviceCoordinateCache
+            if large
+            else QtWidgets.QGraphicsItem.NoCache
+        )
+        for item in scene.node_items.values():
+            item.setCacheMode(cache)
+        self.update_culling()
+
+    def update_render_mode(self):
+        scene = self.scene()
+        self.set_large_mode(scene.node_count + scene.lazy_node_count > LARGE_BOARD_NODES)
+
+    def schedule_lazy_update(self):
+        if self.lazy_categories:
+            self._lazy_timer.start(0)
+
+    def update_lazy_nodes(self):
+        """Create nodes for categories near the viewport, release far-away ones."""
+        scene = self.scene()
+        visible = self.mapToScene(self.viewport().rect()).boundingRect()
+        w, h = visible.width(), visible.height()
+        near = visible.adjusted(-w / 2, -h / 2, w / 2, h / 2)
+        far = visible.adjusted(-2 * w, -2 * h, 2 * w, 2 * h)
+        for item in self.lazy_categories:
+            if item.materialized:
+                if not item.sceneBoundingRect().intersects(far):
+                    item.release(self.node_pool)
+                    if scene.nodes_culled:
+                        item.set_nodes_culled(True)
+            elif not scene.nodes_culled and item.sceneBoundingRect().intersects(near):
+                item.materialize(self.node_pool)
+
+    def scrollContentsBy(self, dx: int, dy: int):
+        super().scrollContentsBy(dx, dy)
+        self.schedule_lazy_update()
+
+    def resizeEvent(self, event: QtGui.QResizeEvent):
+        super().resizeEvent(event)
+        self.schedule_lazy_update()
+
+    def update_culling(self):
+        scene = self.scene()
+        culled = scene.large_mode and self.transform().m11() < CULL_LOD
+        if culled == scene.nodes_culled:
+            return
+        scene.nodes_culled = culled
+        for item in scene.category_items.values():
+            item.set_nodes_culled(culled)
+
+    def zoom(self, factor: float):
+        scale = self.transform().m11() * factor
+        if 0.02 <= scale <= 8:
+            self.scale(factor, factor)
+            self.update_culling()
+            self.schedule_lazy_update()
+
+    def wheelEvent(self, event: QtGui.QWheelEvent):
+        if event.modifiers() & QtCore.Qt.ControlModifier:
+            self.zoom(1.15 ** (event.angleDelta().y() / 120))
+            event.accept()
+        else:
+            super().wheelEvent(event)
 
     def contextMenuEvent(self, event: QtGui.QContextMenuEvent):
         pos = self.mapToScene(event.pos())
         item = self.scene().itemAt(pos, QtGui.QTransform())
-        if item is None:
+        category = item
+        while category is not None and not isinstance(category, CategoryItem):
+            category = category.parentItem()
+        if isinstance(category, CategoryItem):
+            menu = QtWidgets.QMenu(self)
+            color_act = menu.addAction("Цвет…")
+            delete_act = menu.addAction("Удалить")
+            chosen = menu.exec(event.globalPos())
+            if chosen is color_act:
+                color = QtWidgets.QColorDialog.getColor(
+                    QtGui.QColor(category.category.color), self
+                )
+                if color.isValid():
+                    category.set_color(color.name())
+                    self.scene().record("recolor", id=category.category.id, color=color.name())
+            elif chosen is delete_act:
+                self.scene().delete_items([category])
+        elif item is None:
             menu = QtWidgets.QMenu(self)
             act = menu.addAction(
                 "\u0421\u043e\u0437\u0434\u0430\u0442\u044c \u043a\u0430\u0442\u0435\u0433\u043e\u0440\u0438\u044e"
@@ -166,25 +627,105 @@ class BoardView(QtWidgets.QGraphicsView):
             item.setPos(pos)
         else:
             item.setPos(0, 0)
-        self.scene().addItem(item)
+        self.scene().add_category_item(item)
+        cat.x, cat.y = item.pos().x(), item.pos().y()
+        self.scene().record("add_category", category=cat.to_dict())
         return item
 
+    def center_on_mod(self, mod: Mod):
+        """Scroll to `mod`, zooming in if its node would be too small to read."""
+        scene = self.scene()
+        node = scene.node_items.get(mod.id)
+        category = scene.index.category_of(mod)
+        item = scene.category_items.get(category.id) if category is not None else None
+        if node is not None:
+            center = node.sceneBoundingRect().center()
+        elif item is not None:
+            # not materialized: place it from the model, relative to where its category is now
+            center = item.mapToScene(item._local(mod)) + QtCore.QPointF(
+                NODE_WIDTH / 2, NODE_HEIGHT / 2
+            )
+        else:
+            return
+        if self.transform().m11() < TEXT_LOD:
+            self.resetTransform()
+            self.update_culling()
+        self.centerOn(center)
+        self.schedule_lazy_update()
+
+    @tracing.traced("board.auto_layout")
+    def auto_layout(self, mode: str = GRID):
+        """Pack the nodes of every category, then the categories, in one batch.
+
+        The geometry is computed on the models first; items are then moved
+        with the scene index and view updates switched off, so the index is
+        rebuilt and the view repainted once instead of per item.
+        """
+        scene = self.scene()
+        items = list(scene.category_items.values())
+        if not items:
+            return
+        origin = (
+            min(item.scenePos().x() for item in items),
+            min(item.scenePos().y() for item in items),
+        )
+        categories = auto_layout([item.to_model() for item in items], mode, origin)
+        depth = scene.bspTreeDepth()
+        self.setUpdatesEnabled(False)
+        scene.setItemIndexMethod(QtWidgets.QGraphicsScene.NoIndex)
+        try:
+            for item in items:
+                cat = item.category
+                item.setPos(cat.x, cat.y)
+                item.setRect(0, 0, cat.width, cat.height)
+                if item.materialized:
+                    for node in item.nodes():
+                        node.setPos(item._local(node.mod))
+                if scene.nodes_culled:
+                    item.set_nodes_culled(True)
+        finally:
+            scene.setItemIndexMethod(QtWidgets.QGraphicsScene.BspTreeIndex)
+            scene.setBspTreeDepth(depth)
+            self.setUpdatesEnabled(True)
+        # categories first: replaying their move shifts the mods inside
+        for cat in categories:
+            scene.record("move", id=cat.id, x=cat.x, y=cat.y)
+            scene.record("resize", id=cat.id, width=cat.width, height=cat.height)
+        for cat in categories:
+            for mod in cat.mods:
+                scene.record("move", id=mod.id, x=mod.x, y=mod.y)
+        self.schedule_lazy_update()
+        scene.update()
+
+    @tracing.traced("board.to_models")
     def to_models(self):
-        categories = []
-        for item in self.scene().items():
-            if isinstance(item, CategoryItem):
-                categories.append(item.to_model())
-        return categories
-
-    def load_from_models(self, categories):
-        self.scene().clear()
+        return [item.to_model() for item in self.scene().category_items.values()]
+
+    @tracing.traced("board.load_from_models")
+    def load_from_models(self, categories, lazy: bool | None = None):
+        scene = self.scene()
+        scene.clear()
+        self.node_pool = []
+        self.lazy_categories = []
+        total = sum(len(cat.mods) for cat in categories)
+        if lazy is None:
+            lazy = total > LAZY_LOAD_MODS
+        self.set_large_mode(total > LARGE_BOARD_NODES, total)
         for cat in categories:
             cat_item = CategoryItem(cat)
             cat_item.setPos(cat.x, cat.y)
-            self.scene().addItem(cat_item)
-
-            for mod in cat.mods:
-                node = NodeItem(mod)
-                node.setParentItem(cat_item)
-                node.setPos(mod.x, mod.y)
-                cat_item.expand_to_fit(node)
+            scene.add_category_item(cat_item)
+            if lazy:
+                # frames come from their stored geometry, nodes follow on demand
+                cat_item.lazy = True
+                cat_item.materialized = False
+                self.lazy_categories.append(cat_item)
+                scene.lazy_node_count += len(cat.mods)
+                if scene.nodes_culled:
+                    cat_item.set_nodes_culled(True)
+            else:
+                cat_item.fit_to_mods()
+                cat_item.build_nodes()
+        if lazy:
+            self.schedule_lazy_update()
+        scene.mods_added.emit([mod for cat in categories for mod in cat.mods])
@@ -0,0 +1,173 @@
+from collections import Counter
+
+from PySide6 import QtCore, QtGui, QtWidgets
+
+from compat import RELEASE_VERSION, CompatMatrix, CompatSource, version_key
+from models import Mod
+from resolver import mod_key
+from .search_panel import LOADERS, MAX_RETRY_DELAY, RETRY_DELAY
+from .workers import Worker
+
+# game versions listed, newest first
+MAX_ROWS = 40
+# blocking mods named per version, the rest are counted
+MAX_NAMES = 3
+
+
+class CompatPanel(QtWidgets.QWidget):
+    """Which game versions the whole board can move to, and what blocks the rest.
+
+    Follows the board through BoardScene.mods_added / mods_removed, so the
+    matrix only changes by the mods that were added or removed.
+    """
+
+    def __init__(self, api, resolver=None, parent=None):
+        super().__init__(parent)
+        self.matrix = CompatMatrix(loaders=LOADERS)
+        self.source = CompatSource(api, resolver)
+        self.counts: Counter[str] = Counter()
+        self.titles: dict[str, str] = {}
+        self.pending: set[str] = set()
+        self.unknown: set[str] = set()
+        self._fetching = False
+        # set after a failed fetch, until one succeeds
+        self._error = ""
+        self._retry_delay = 0.0
+
+        self.loader_box = QtWidgets.QComboBox()
+        self.loader_box.addItem("любой", None)
+        for loader in LOADERS:
+            self.loader_box.addItem(loader, loader)
+        self.loader_box.currentIndexChanged.connect(self.refresh)
+        self.table = QtWidgets.QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["Версия", "Блокируют", "Моды"])
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.status = QtWidgets.QLabel()
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self.loader_box)
+        layout.addWidget(self.table)
+        layout.addWidget(self.status)
+
+        self._refresh_timer = QtCore.QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(50)
+        self._refresh_timer.timeout.connect(self.refresh)
+        self._retry_timer = QtCore.QTimer(self)
+        self._retry_timer.setSingleShot(True)
+        self._retry_timer.timeout.connect(self._fetch)
+
+    def attach(self, scene):
+        scene.mods_added.connect(self.add_mods)
+        scene.mods_removed.connect(self.remove_mods)
+        scene.board_reset.connect(self.reset)
+
+    def add_mods(self, mods: list[Mod]):
+        for mod in mods:
+            key = mod_key(mod)
+            if not key:
+                continue
+            self.counts[key] += 1
+            self.titles[key] = mod.title
+            if self.counts[key] > 1:
+                continue
+            pairs = self.source.cached(key)
+            if pairs is not None:
+                self.matrix.set_mod(key, pairs)
+            elif key not in self.unknown:
+                self.pending.add(key)
+        self._fetch()
+        self._refresh_timer.start()
+
+    def remove_mods(self, mods: list[Mod]):
+        for mod in mods:
+            key = mod_key(mod)
+            if not self.counts.get(key):
+                continue
+            self.counts[key] -= 1
+            if not self.counts[key]:
+                del self.counts[key]
+                self.matrix.remove_mod(key)
+                self.pending.discard(key)
+        self._refresh_timer.start()
+
+    def reset(self):
+        self.matrix.clear()
+        self.counts.clear()
+        self.titles.clear()
+        self.pending.clear()
+        self.unknown.clear()
+        self._refresh_timer.start()
+
+    def _fetch(self):
+        if self._fetching or not self.pending or self._retry_timer.isActive():
+            return
+        self._fetching = True
+        keys = list(self.pending)
+        source = self.source
+
+        def run():
+            try:
+                return keys, source.fetch(keys)
+            except Exception as exc:
+                return keys, exc
+
+        QtCore.QThreadPool.globalInstance().start(Worker(run, callback=self._on_fetched))
+
+    def _on_fetched(self, result):
+        keys, pairs = result
+        self._fetching = False
+        if isinstance(pairs, Exception):
+            # the keys stay pending and are asked for again, later each time
+            self._retry_delay = min(MAX_RETRY_DELAY, 2 * self._retry_delay or RETRY_DELAY)
+            self._error = f"ошибка загрузки версий: {pairs}"
+            self._retry_timer.start(int(self._retry_delay * 1000))
+            self.refresh()
+            return
+        self._retry_delay = 0.0
+        self._error = ""
+        for key in keys:
+            if key not in self.pending:
+                # taken off the board while loading
+                continue
+            self.pending.discard(key)
+            if key in pairs:
+                self.matrix.set_mod(key, pairs[key])
+            else:
+                self.unknown.add(key)
+        self._fetch()
+        self.refresh()
+
+    def refresh(self):
+        loader = self.loader_box.currentData()
+        counts = self.matrix.blocker_counts(loader)
+        versions = sorted(
+            (v for v in counts if RELEASE_VERSION.match(v)), key=version_key, reverse=True
+        )[:MAX_ROWS]
+        self.table.setRowCount(len(versions))
+        for row, version in enumerate(versions):
+            blocked = counts[version]
+            names = ""
+            if blocked:
+                blocking = self.matrix.blocking(version, loader)
+                names = ", ".join(self.titles.get(key, key) for key in blocking[:MAX_NAMES])
+                if len(blocking) > MAX_NAMES:
+                    names += f" и ещё {len(blocking) - MAX_NAMES}"
+            cells = (version, str(blocked) if blocked else "✔", names)
+            color = QtGui.QColor("#e05050" if blocked else "#50c050")
+            for col, text in enumerate(cells):
+                item = QtWidgets.QTableWidgetItem(text)
+                if col == 1:
+                    item.setForeground(color)
+                self.table.setItem(row, col, item)
+        parts = [f"Модов: {len(self.matrix)}"]
+        if self.pending:
+            parts.append(f"загружается {len(self.pending)}")
+        unknown = sum(1 for key in self.counts if key in self.unknown)
+        if unknown:
+            parts.append(f"не найдено на Modrinth {unknown}")
+        if self._error and self.pending:
+            parts.append(f"{self._error}, повтор через {self._retry_delay:g} с")
+        self.status.setText(", ".join(parts))
@@ -0,0 +1,87 @@
+from PySide6 import QtCore, QtWidgets
+
+from .board import BoardView
+
+# matches are outlined; past this many the count is shown but not every node updated
+MAX_HIGHLIGHTED = 5000
+
+
+class FindBar(QtWidgets.QWidget):
+    """Find-as-you-type over the mods on the board.
+
+    Looks mods up in the scene's index, outlines the matches and centers
+    the first one; Enter steps to the next. With the filter on, the other
+    nodes are dimmed.
+    """
+
+    def __init__(self, board: BoardView, parent=None):
+        super().__init__(parent)
+        self.board = board
+        self.matches = []
+        self.current = -1
+        layout = QtWidgets.QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.edit = QtWidgets.QLineEdit()
+        self.edit.setPlaceholderText("Найти на доске…")
+        self.edit.setClearButtonEnabled(True)
+        self.edit.setMaximumWidth(220)
+        self.count_label = QtWidgets.QLabel()
+        self.count_label.setMinimumWidth(60)
+        self.dim_check = QtWidgets.QCheckBox("Только совпадения")
+        layout.addWidget(self.edit)
+        layout.addWidget(self.count_label)
+        layout.addWidget(self.dim_check)
+        self.edit.textChanged.connect(self.search)
+        self.edit.returnPressed.connect(self.next_match)
+        self.dim_check.toggled.connect(self._apply_filter)
+        scene = board.scene()
+        # the board changed under the query: look it up again, without moving the view
+        scene.mods_added.connect(self.refresh)
+        scene.mods_removed.connect(self.refresh)
+        scene.board_reset.connect(self.refresh)
+
+    def activate(self):
+        self.edit.setFocus()
+        self.edit.selectAll()
+
+    def keyPressEvent(self, event):
+        if event.key() == QtCore.Qt.Key_Escape:
+            self.edit.clear()
+            self.board.setFocus()
+        else:
+            super().keyPressEvent(event)
+
+    def search(self):
+        self.refresh()
+        if self.matches:
+            self.next_match()
+
+    def refresh(self):
+        text = self.edit.text().strip()
+        scene = self.board.scene()
+        self.matches = scene.index.find(text) if text else []
+        self.current = -1
+        scene.set_highlighted(mod.id for mod in self.matches[:MAX_HIGHLIGHTED])
+        self._apply_filter()
+        self._show_count()
+
+    def next_match(self):
+        if not self.matches:
+            return
+        self.current = (self.current + 1) % len(self.matches)
+        self.board.center_on_mod(self.matches[self.current])
+        self._show_count()
+
+    def _apply_filter(self):
+        on = self.dim_check.isChecked() and bool(self.edit.text().strip())
+        self.board.scene().set_filter({mod.id for mod in self.matches} if on else None)
+
+    def _show_count(self):
+        if not self.edit.text().strip():
+            self.count_label.clear()
+        elif not self.matches:
+            self.count_label.setText("нет")
+        elif self.current < 0:
+            self.count_label.setText(str(len(self.matches)))
+        else:
+            self.count_label.setText(f"{self.current + 1}/{len(self.matches)}")
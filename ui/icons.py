@@ -0,0 +1,201 @@
+import os
+import hashlib
+import weakref
+import threading
+from collections import OrderedDict
+
+from PySide6 import QtCore, QtGui
+
+import tracing
+from http_scheduler import BACKGROUND, get_scheduler
+from modrinth_api import CACHE_DIR
+from .workers import Worker
+
+ICON_SIZE = 64
+
+
+class IconCache(QtCore.QObject):
+    """Scaled icons in memory, raw icon bytes on disk addressed by their sha256.
+
+    `request` must be called from the GUI thread; callbacks are invoked there
+    with a ready-to-use QImage (or None if the icon could not be loaded).
+    A download still queued when every requesting `owner` is gone is dropped.
+    """
+
+    loaded = QtCore.Signal(object)
+
+    def __init__(
+        self,
+        path: str | None = None,
+        max_images: int = 512,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+        parent: QtCore.QObject | None = None,
+    ):
+        super().__init__(parent)
+        self.path = path or os.path.join(CACHE_DIR, "icons")
+        self.max_images = max_images
+        self.max_disk_bytes = max_disk_bytes
+        self.scheduler = get_scheduler()
+        self._images: OrderedDict[str, QtGui.QImage] = OrderedDict()
+        self._pending: dict[str, list] = {}
+        self._disk_lock = threading.Lock()
+        self._writes = 0
+        self.loaded.connect(self._on_loaded)
+
+    def get(self, url: str) -> QtGui.QImage | None:
+        image = self._images.get(url)
+        if image is not None:
+            self._images.move_to_end(url)
+        return image
+
+    def request(self, url: str, callback, owner=None):
+        image = self.get(url)
+        if image is not None:
+            callback(image)
+            return
+        waiter = (callback, weakref.ref(owner) if owner is not None else None)
+        waiters = self._pending.get(url)
+        if waiters is not None:
+            waiters.append(waiter)
+            return
+        self._pending[url] = [waiter]
+        QtCore.QThreadPool.globalInstance().start(Worker(self._load, url))
+
+    def _wanted(self, url: str) -> bool:
+        return any(
+            owner is None or owner() is not None for _cb, owner in self._pending.get(url, ())
+        )
+
+    # every path out of _load and _downloaded emits `loaded`, or the url would
+    # stay pending and never be requested again
+
+    def _load(self, url: str):
+        try:
+            data = self._read_disk(url)
+            if data is not None:
+                self.loaded.emit((url, self._decode(data)))
+                return
+            future = self.scheduler.submit(
+                "GET", url, priority=BACKGROUND, alive=lambda: self._wanted(url)
+            )
+        except Exception:
+            self.loaded.emit((url, None))
+            return
+        future.add_done_callback(lambda f: self._downloaded(url, f))
+
+    def _downloaded(self, url: str, future):
+        try:
+            r = future.result()
+            r.raise_for_status()
+            data = r.content
+        except Exception:
+            # cancelled by the scheduler, a failed request or an error status
+            self.loaded.emit((url, None))
+            return
+        try:
+            self._write_disk(url, data)
+        except Exception:
+            # a full or read-only disk only costs the disk copy
+            pass
+        try:
+            image = self._decode(data)
+        except Exception:
+            image = None
+        self.loaded.emit((url, image))
+
+    @staticmethod
+    @tracing.traced("icon.decode")
+    def _decode(data: bytes) -> QtGui.QImage | None:
+        image = QtGui.QImage()
+        if not image.loadFromData(data):
+            return None
+        return image.scaled(
+            ICON_SIZE,
+            ICON_SIZE,
+            QtCore.Qt.KeepAspectRatio,
+            QtCore.Qt.SmoothTransformation,
+        )
+
+    def _on_loaded(self, result):
+        url, image = result
+        if image is not None:
+            self._images[url] = image
+            while len(self._images) > self.max_images:
+                self._images.popitem(last=False)
+        for callback, owner in self._pending.pop(url, []):
+            if owner is not None and owner() is None:
+                continue
+            try:
+                callback(image)
+            except RuntimeError:
+                # the requesting widget was deleted while the icon was loading
+                pass
+
+    def _url_file(self, url: str) -> str:
+        return os.path.join(self.path, "urls", hashlib.sha1(url.encode()).hexdigest())
+
+    def _object_file(self, digest: str) -> str:
+        return os.path.join(self.path, "objects", digest[:2], digest)
+
+    def _read_disk(self, url: str) -> bytes | None:
+        try:
+            with open(self._url_file(url), "r") as f:
+                obj = self._object_file(f.read().strip())
+            with open(obj, "rb") as f:
+                data = f.read()
+            os.utime(obj)
+            return data
+        except OSError:
+            return None
+
+    def _write_disk(self, url: str, data: bytes):
+        digest = hashlib.sha256(data).hexdigest()
+        obj = self._object_file(digest)
+        url_file = self._url_file(url)
+        with self._disk_lock:
+            try:
+                if not os.path.exists(obj):
+                    os.makedirs(os.path.dirname(obj), exist_ok=True)
+                    with open(obj + ".tmp", "wb") as f:
+                        f.write(data)
+                    os.replace(obj + ".tmp", obj)
+                os.makedirs(os.path.dirname(url_file), exist_ok=True)
+                with open(url_file, "w") as f:
+                    f.write(digest)
+            except OSError:
+                return
+            self._writes += 1
+            if self._writes % 32 == 0:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        files = []
+        total = 0
+        for root, _dirs, names in os.walk(os.path.join(self.path, "objects")):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        files.sort()
+        for _mtime, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+_shared: IconCache | None = None
+
+
+def icon_cache() -> IconCache:
+    global _shared
+    if _shared is None:
+        _shared = IconCache(parent=QtCore.QCoreApplication.instance())
+    return _shared
@@ -1,10 +1,26 @@
+import os
+
 from PySide6 import QtCore, QtWidgets
 
-from PySide6.QtGui import QAction
+from PySide6.QtGui import QAction, QKeySequence
 
-from .search_panel import SearchPanel
+from .search_panel import LOADERS, SearchPanel
 from .board import BoardView
-from storage import save_schema, load_schema
+from .find_bar import FindBar
+from .trace_overlay import TraceOverlay
+from .workers import Worker
+import tracing
+from journal import Journal
+from layout import GRID, SHELF
+from modrinth_api import CACHE_DIR
+
+# the compatibility panel (numpy), the resolver, export and refresh (requests)
+# are imported when first used, they are not needed to show the window
+
+# unsaved boards are journaled here until they get a file of their own
+AUTOSAVE_PATH = os.path.join(CACHE_DIR, "autosave.mpdb")
+# journal records after which the journal is folded into its schema file
+COMPACT_RECORDS = 500
 
 
 class MainWindow(QtWidgets.QMainWindow):
@@ -22,34 +38,455 @@ class MainWindow(QtWidgets.QMainWindow):
         central.setStretchFactor(1, 1)
         self.setCentralWidget(central)
 
+        self.compat_panel = None
+        self.compat_dock = QtWidgets.QDockWidget("Совместимость", self)
+        self.compat_dock.setObjectName("compat_dock")
+        self.addDockWidget(QtCore.Qt.RightDockWidgetArea, self.compat_dock)
+        self.compat_dock.hide()
+        self.compat_dock.visibilityChanged.connect(self._ensure_compat_panel)
+
         toolbar = self.addToolBar("Main")
 
         add_cat = QAction("Add Category", self)
         save_act = QAction("Save", self)
         load_act = QAction("Load", self)
+        self.sync_act = QAction("Sync Index", self)
+        self.resolve_act = QAction("Resolve Dependencies", self)
+        self.export_act = QAction("Export .mrpack", self)
+        self.refresh_act = QAction("Refresh Metadata", self)
+        self.layout_act = QAction("Auto Layout", self)
+        layout_menu = QtWidgets.QMenu(self)
+        grid_act = layout_menu.addAction("Сеткой")
+        shelf_act = layout_menu.addAction("По ширине категорий")
+        self.layout_act.setMenu(layout_menu)
+        self.trace_act = QAction("Trace", self)
+        self.trace_act.setCheckable(True)
+        trace_export_act = QAction("Export Trace", self)
 
         toolbar.addAction(add_cat)
         toolbar.addAction(save_act)
         toolbar.addAction(load_act)
+        toolbar.addAction(self.sync_act)
+        toolbar.addAction(self.resolve_act)
+        toolbar.addAction(self.export_act)
+        toolbar.addAction(self.refresh_act)
+        toolbar.addAction(self.layout_act)
+        toolbar.widgetForAction(self.layout_act).setPopupMode(QtWidgets.QToolButton.MenuButtonPopup)
+        toolbar.addAction(self.compat_dock.toggleViewAction())
+        toolbar.addAction(self.trace_act)
+        toolbar.addAction(trace_export_act)
+        toolbar.addSeparator()
+        self.find_bar = FindBar(self.board)
+        toolbar.addWidget(self.find_bar)
+        find_act = QAction(self)
+        find_act.setShortcut(QKeySequence.Find)
+        find_act.triggered.connect(self.find_bar.activate)
+        self.addAction(find_act)
 
         add_cat.triggered.connect(self.add_category)
         save_act.triggered.connect(self.save)
         load_act.triggered.connect(self.load)
+        self.sync_act.triggered.connect(self.sync_index)
+        self.resolve_act.triggered.connect(self.resolve_dependencies)
+        self.export_act.triggered.connect(self.export_pack)
+        self.refresh_act.triggered.connect(self.refresh_metadata)
+        self.layout_act.triggered.connect(lambda: self.board.auto_layout(GRID))
+        grid_act.triggered.connect(lambda: self.board.auto_layout(GRID))
+        shelf_act.triggered.connect(lambda: self.board.auto_layout(SHELF))
+        self.trace_act.toggled.connect(self.trace_overlay_toggled)
+        trace_export_act.triggered.connect(self.export_trace)
+        self.trace_overlay = TraceOverlay(self)
+        if tracing.enabled():
+            # MODPACK_TRACE traces from startup, the overlay stays hidden until asked for
+            self.trace_overlay.set_tracing(True, show=False)
+        # export and refresh can run at once, each shows its own progress
+        self.export_progress = self._add_progress_bar("Экспорт")
+        self.refresh_progress = self._add_progress_bar("Проверка обновлений")
+        # resolver.Resolver kept for the current target
+        self.resolver = None
+
+        self.journal = Journal(AUTOSAVE_PATH)
+        self._compacting = False
+        self.board.scene().edited.connect(self._record_edit)
+        self.board.scene().duplicates_dropped.connect(self._on_duplicates_dropped)
+        self.search_panel.board_index = self.board.scene().index
+        for signal in (
+            self.board.scene().mods_added,
+            self.board.scene().mods_removed,
+            self.board.scene().board_reset,
+        ):
+            signal.connect(self.search_panel.board_changed)
+        # bumped whenever the board is replaced, so late worker results for the old one are dropped
+        self.board_generation = 0
+        self.board.scene().board_reset.connect(self._on_board_reset)
+        self.autosave_timer = QtCore.QTimer(self)
+        self.autosave_timer.setInterval(1000)
+        self.autosave_timer.timeout.connect(self.autosave)
+        self.autosave_timer.start()
+        # a compacted autosave leaves its edits in the schema file itself
+        if self.journal.has_changes() or os.path.exists(AUTOSAVE_PATH):
+            QtCore.QTimer.singleShot(0, self.restore_autosave)
+
+    def _record_edit(self, record: dict):
+        self.journal.append(record)
+
+    def autosave(self):
+        self.journal.flush()
+        if self._compacting or self.journal.written < COMPACT_RECORDS:
+            return
+        if not self.journal.rotate():
+            return
+        self._compacting = True
+        journal = self.journal
+
+        def run():
+            try:
+                journal.compact()
+            except Exception as exc:
+                return exc
+
+        worker = Worker(run, callback=self._on_compacted)
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def _on_compacted(self, result):
+        self._compacting = False
+        if isinstance(result, Exception):
+            self.statusBar().showMessage(f"Ошибка автосохранения: {result}", 5000)
+
+    def restore_autosave(self):
+        if self.journal.path != AUTOSAVE_PATH:
+            return
+        answer = QtWidgets.QMessageBox.question(
+            self, "Автосохранение", "Восстановить несохранённую схему?"
+        )
+        if answer == QtWidgets.QMessageBox.Yes:
+            self.board.load_from_models(self.journal.load())
+        else:
+            self.journal.discard()
+
+    def _switch_journal(self, path: str) -> Journal:
+        old = self.journal
+        if old.path == AUTOSAVE_PATH:
+            old.discard()
+        else:
+            old.close()
+        self.journal = Journal(path)
+        return self.journal
+
+    def closeEvent(self, event):
+        self.journal.close()
+        super().closeEvent(event)
+
+    def _on_board_reset(self):
+        self.board_generation += 1
+
+    def _on_duplicates_dropped(self, mods):
+        titles = ", ".join(mod.title for mod in mods[:5])
+        if len(mods) > 5:
+            titles += "…"
+        self.statusBar().showMessage(f"Уже на доске: {titles}", 5000)
+        self.board.scene().set_highlighted(mod.id for mod in mods)
+        self.board.center_on_mod(mods[0])
+
+    def trace_overlay_toggled(self, on: bool):
+        self.trace_overlay.set_tracing(on)
+
+    def export_trace(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export Trace", filter="Chrome Trace (*.json)"
+        )
+        if not path:
+            return
+        if not path.lower().endswith(".json"):
+            path += ".json"
+        try:
+            tracing.tracer().export_chrome(path)
+        except OSError as exc:
+            self.statusBar().showMessage(f"Ошибка сохранения трассировки: {exc}", 5000)
+            return
+        self.statusBar().showMessage(f"Трассировка сохранена: {path}", 5000)
 
     def add_category(self):
         self.board.create_category_dialog()
 
     def save(self):
-        path, _ = QtWidgets.QFileDialog.getSaveFileName(
-            self, "Save", filter="JSON Files (*.json)"
+        path, selected = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Save", filter="JSON Files (*.json);;Binary Schema (*.mpdb)"
         )
         if path:
-            save_schema(self.board.to_models(), path)
+            if selected.startswith("Binary") and not path.lower().endswith(".mpdb"):
+                path += ".mpdb"
+            categories = self.board.to_models()
+            journal = self.journal if self.journal.path == path else self._switch_journal(path)
+            journal.save(categories)
 
     def load(self):
         path, _ = QtWidgets.QFileDialog.getOpenFileName(
-            self, "Load", filter="JSON Files (*.json)"
+            self, "Load", filter="Schemas (*.json *.mpdb);;JSON Files (*.json);;Binary Schema (*.mpdb)"
         )
         if path:
-            cats = load_schema(path)
-            self.board.load_from_models(cats)
+            self.board.load_from_models(self._switch_journal(path).load())
+
+    def sync_index(self):
+        api = self.search_panel.api
+        self.sync_act.setEnabled(False)
+        self.statusBar().showMessage("Синхронизация индекса…")
+
+        def run():
+            try:
+                return api.index.sync(api)
+            except Exception as exc:
+                return exc
+
+        worker = Worker(run, callback=self._on_index_synced)
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def _on_index_synced(self, result):
+        self.sync_act.setEnabled(True)
+        if isinstance(result, Exception):
+            self.statusBar().showMessage(f"Ошибка синхронизации: {result}", 5000)
+        else:
+            total = self.search_panel.api.index.count()
+            self.statusBar().showMessage(
+                f"Индекс обновлён: {result} новых, всего {total}", 5000
+            )
+
+    def choose_target(self) -> bool:
+        """Ask for the board's target game version and loader."""
+        dialog = QtWidgets.QDialog(self)
+        dialog.setWindowTitle("Целевая версия")
+        layout = QtWidgets.QFormLayout(dialog)
+        version_box = QtWidgets.QComboBox()
+        version_box.setEditable(True)
+        version_box.addItems(self.search_panel.game_versions())
+        loader_box = QtWidgets.QComboBox()
+        loader_box.addItems(LOADERS)
+        version = self.board.target_version or next(
+            iter(self.search_panel.selected_versions()), ""
+        )
+        loader = self.board.target_loader or next(iter(self.search_panel.selected_loaders()), "")
+        if version:
+            version_box.setCurrentText(version)
+        if loader:
+            loader_box.setCurrentText(loader)
+        layout.addRow("Minecraft", version_box)
+        layout.addRow("Загрузчик", loader_box)
+        buttons = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel
+        )
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        layout.addRow(buttons)
+        if dialog.exec() != QtWidgets.QDialog.Accepted or not version_box.currentText().strip():
+            return False
+        self.board.target_version = version_box.currentText().strip()
+        self.board.target_loader = loader_box.currentText()
+        return True
+
+    def _ensure_compat_panel(self, visible: bool):
+        if not visible or self.compat_panel is not None:
+            return
+        from .compat_panel import CompatPanel
+
+        # shares the projects and versions the resolver fetched for export and checks
+        self.compat_panel = CompatPanel(self.search_panel.api, self.target_resolver())
+        self.compat_panel.attach(self.board.scene())
+        self.compat_panel.add_mods([mod for cat in self.board.to_models() for mod in cat.mods])
+        self.compat_dock.setWidget(self.compat_panel)
+
+    def target_resolver(self):
+        from resolver import Resolver
+
+        version, loader = self.board.target_version, self.board.target_loader
+        resolver = self.resolver
+        if resolver is None or (resolver.game_version, resolver.loader) != (version, loader):
+            # a resolver is kept per target so repeated runs reuse what it fetched
+            resolver = self.resolver = Resolver(
+                self.search_panel.api, version, loader, share=resolver
+            )
+        return resolver
+
+    def resolve_dependencies(self):
+        if not self.choose_target():
+            return
+        resolver = self.target_resolver()
+        mods = [mod for cat in self.board.to_models() for mod in cat.mods]
+        self.resolve_act.setEnabled(False)
+        self.statusBar().showMessage("Поиск зависимостей…")
+
+        def run():
+            try:
+                return resolver.resolve(mods)
+            except Exception as exc:
+                return exc
+
+        worker = Worker(run, callback=self._on_resolved)
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def _on_resolved(self, result):
+        self.resolve_act.setEnabled(True)
+        if isinstance(result, Exception):
+            self.statusBar().showMessage(f"Ошибка поиска зависимостей: {result}", 5000)
+            return
+        self.board.scene().set_mod_status(result.status())
+        missing = result.missing()
+        message = (
+            f"Зависимости: не хватает {len(missing)}, "
+            f"без версии {len(result.unavailable())}, конфликтов {len(result.conflicts())}"
+        )
+        if missing:
+            message += ": " + ", ".join(p.title for p in missing[:5])
+            if len(missing) > 5:
+                message += "…"
+        self.statusBar().showMessage(message)
+
+    def export_pack(self):
+        if not self.choose_target():
+            return
+        dialog = QtWidgets.QDialog(self)
+        dialog.setWindowTitle("Экспорт .mrpack")
+        layout = QtWidgets.QFormLayout(dialog)
+        name_edit = QtWidgets.QLineEdit("Modpack")
+        loader_version_edit = QtWidgets.QLineEdit()
+        loader_version_edit.setPlaceholderText("например 0.15.11")
+        download_check = QtWidgets.QCheckBox("Скачать файлы в кэш")
+        bundle_check = QtWidgets.QCheckBox("Включить файлы в архив")
+        layout.addRow("Название", name_edit)
+        layout.addRow("Версия загрузчика", loader_version_edit)
+        layout.addRow(download_check)
+        layout.addRow(bundle_check)
+        buttons = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel
+        )
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        layout.addRow(buttons)
+        if dialog.exec() != QtWidgets.QDialog.Accepted:
+            return
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export", filter="Modrinth Modpack (*.mrpack)"
+        )
+        if not path:
+            return
+        if not path.lower().endswith(".mrpack"):
+            path += ".mrpack"
+        categories = self.board.to_models()
+        api = self.search_panel.api
+        resolver = self.target_resolver()
+        options = dict(
+            game_version=self.board.target_version,
+            loader=self.board.target_loader,
+            loader_version=loader_version_edit.text().strip(),
+            name=name_edit.text().strip() or "Modpack",
+            download=download_check.isChecked(),
+            bundle=bundle_check.isChecked(),
+            resolver=resolver,
+        )
+
+        from mrpack import export_mrpack
+
+        def run(progress):
+            try:
+                return export_mrpack(path, categories, api, progress=progress, **options)
+            except Exception as exc:
+                return exc
+
+        self.export_act.setEnabled(False)
+        self.export_progress.setRange(0, 0)
+        self.export_progress.show()
+        self.statusBar().showMessage("Экспорт…")
+        worker = Worker(run, callback=self._on_exported, on_progress=self._on_export_progress)
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def _add_progress_bar(self, label: str) -> QtWidgets.QProgressBar:
+        bar = QtWidgets.QProgressBar()
+        bar.setMaximumWidth(200)
+        bar.setFormat(f"{label}: %v/%m")
+        bar.setToolTip(label)
+        bar.hide()
+        self.statusBar().addPermanentWidget(bar)
+        return bar
+
+    def _on_export_progress(self, values):
+        done, total = values
+        self.export_progress.setRange(0, total)
+        self.export_progress.setValue(done)
+
+    def _on_refresh_progress(self, values):
+        done, total = values
+        self.refresh_progress.setRange(0, total)
+        self.refresh_progress.setValue(done)
+
+    def _on_exported(self, result):
+        self.export_act.setEnabled(True)
+        self.export_progress.hide()
+        if isinstance(result, Exception):
+            self.statusBar().showMessage(f"Ошибка экспорта: {result}", 5000)
+            return
+        message = f"Экспортировано {len(result.files)} модов"
+        if result.downloaded or result.cached:
+            message += f", скачано {result.downloaded}, из кэша {result.cached}"
+        if result.missing:
+            message += f"; без файла: {', '.join(result.missing[:5])}"
+        self.statusBar().showMessage(message)
+
+    def refresh_metadata(self):
+        from refresh import MetadataRefresher
+
+        categories = self.board.to_models()
+        generation = self.board_generation
+        refresher = MetadataRefresher(
+            self.search_panel.api,
+            self.board.target_version or None,
+            self.board.target_loader or None,
+        )
+
+        def run(progress):
+            try:
+                return generation, categories, refresher.check(categories, progress)
+            except Exception as exc:
+                return generation, categories, exc
+
+        self.refresh_act.setEnabled(False)
+        self.refresh_progress.setRange(0, 0)
+        self.refresh_progress.show()
+        self.statusBar().showMessage("Проверка обновлений…")
+        worker = Worker(run, callback=self._on_refreshed, on_progress=self._on_refresh_progress)
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def _on_refreshed(self, result):
+        generation, categories, report = result
+        self.refresh_act.setEnabled(True)
+        self.refresh_progress.hide()
+        if generation != self.board_generation:
+            # another board was loaded meanwhile, the report is about models it no longer shows
+            self.statusBar().clearMessage()
+            return
+        if isinstance(report, Exception):
+            self.statusBar().showMessage(f"Ошибка проверки обновлений: {report}", 5000)
+            return
+        if not report.updates:
+            self.statusBar().showMessage(f"Все {report.checked} модов актуальны", 5000)
+            return
+        box = QtWidgets.QMessageBox(self)
+        box.setWindowTitle("Обновления")
+        box.setText(f"Изменились данные {len(report.updates)} модов. Применить?")
+        box.setDetailedText(report.describe())
+        box.setStandardButtons(QtWidgets.QMessageBox.Apply | QtWidgets.QMessageBox.Cancel)
+        if box.exec() != QtWidgets.QMessageBox.Apply or generation != self.board_generation:
+            self.statusBar().clearMessage()
+            return
+        from refresh import apply_updates
+
+        scene = self.board.scene()
+        # mods deleted since the check started are left alone
+        updates = [update for update in report.updates if update.mod_id in scene.index]
+        # the models are the ones the board shows, so nodes pick the values up on repaint
+        # slugs, project ids and titles may have changed under the board index
+        scene.index.reindex(apply_updates(categories, updates))
+        for update in updates:
+            fields = {name: new for name, (_old, new) in update.changes.items()}
+            scene.record("update", id=update.mod_id, fields=fields)
+        # cached nodes of large boards only repaint when updated themselves
+        scene.update_nodes(update.mod_id for update in updates)
+        self.statusBar().showMessage(f"Обновлено модов: {len(updates)}", 5000)
@@ -0,0 +1,88 @@
+import struct
+from array import array
+
+from PySide6 import QtCore
+
+from models import Mod
+from modrinth_api import hit_registry
+
+MOD_MIME = "application/x-mod"
+MIME_MAGIC = b"MPMD"
+MIME_VERSION = 1
+# string fields carried per mod; everything else is looked up by project id
+MIME_FIELDS = ("project_id", "slug", "title", "description", "author", "version")
+
+_HEADER = struct.Struct("<4sBIB")
+
+
+def _hit_fields(hit: dict) -> tuple:
+    versions = hit.get("versions") or ["unknown"]
+    return (
+        hit.get("project_id") or "",
+        hit.get("slug") or "",
+        hit.get("title") or "",
+        hit.get("description") or "",
+        hit.get("author") or "",
+        versions[0],
+    )
+
+
+def encode_hits(hits: list[dict]) -> QtCore.QByteArray:
+    """Pack search hits into the drag payload.
+
+    Layout: magic, version, mod count, field count, then the UTF-8 byte
+    length of every field of every mod and all the field bytes in one blob.
+    """
+    encoded = [value.encode("utf-8") for hit in hits for value in _hit_fields(hit)]
+    # native byte order: the payload never leaves this machine
+    lengths = array("I", (len(value) for value in encoded))
+    data = b"".join(
+        (
+            _HEADER.pack(MIME_MAGIC, MIME_VERSION, len(hits), len(MIME_FIELDS)),
+            lengths.tobytes(),
+            *encoded,
+        )
+    )
+    return QtCore.QByteArray(data)
+
+
+def decode_mods(data: bytes) -> list[Mod]:
+    """Mods from a drag payload; raises ValueError if it is not one."""
+    if len(data) < _HEADER.size:
+        raise ValueError("truncated mod payload")
+    magic, version, count, n_fields = _HEADER.unpack_from(data, 0)
+    if magic != MIME_MAGIC or version != MIME_VERSION:
+        raise ValueError("unsupported mod payload")
+    pos = _HEADER.size
+    lengths = array("I")
+    lengths.frombytes(data[pos : pos + 4 * count * n_fields])
+    pos += 4 * count * n_fields
+    values = []
+    for length in lengths:
+        values.append(data[pos : pos + length].decode("utf-8"))
+        pos += length
+    registry = hit_registry()
+    mods = []
+    for i in range(count):
+        fields = dict(zip(MIME_FIELDS, values[i * n_fields : (i + 1) * n_fields]))
+        # prefer the full hit when this process has seen it
+        hit = registry.get(fields.get("project_id", "")) or {}
+        slug = hit.get("slug") or fields.get("slug", "")
+        mods.append(
+            Mod(
+                slug=slug,
+                title=hit.get("title") or fields.get("title", ""),
+                description=hit.get("description") or fields.get("description", ""),
+                author=hit.get("author") or fields.get("author", ""),
+                version=fields.get("version", "unknown"),
+                url=f"https://modrinth.com/mod/{slug}",
+                project_id=fields.get("project_id", ""),
+            )
+        )
+    return mods
+
+
+def mods_mime(hits: list[dict]) -> QtCore.QMimeData:
+    mime = QtCore.QMimeData()
+    mime.setData(MOD_MIME, encode_hits(hits))
+    return mime
@@ -1,201 +1,311 @@
 import math
+import time
+import threading
+from collections import OrderedDict
 
-import requests
-from deep_translator import GoogleTranslator
 from PySide6 import QtCore, QtGui, QtWidgets
 
+import tracing
+from local_index import LocalIndex
 from modrinth_api import ModrinthAPI
+from refine import DOWNLOADS, FOLLOWS, RELEVANCE, UPDATED, RefineIndex
+from translation import Translator
+from .icons import ICON_SIZE, icon_cache
+from .mime import mods_mime
+from .workers import Worker
+
+LOADERS = ["fabric", "forge", "quilt", "neoforge"]
+# a page that failed to load is retried after this many seconds, doubling up to the max
+RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 60.0
+# pause in typing before a query goes to the network; queries the local index
+# or the response cache can answer are searched without waiting
+SEARCH_DEBOUNCE_MS = 150
+
+SORT_LABELS = [
+    ("По релевантности", RELEVANCE),
+    ("По загрузкам", DOWNLOADS),
+    ("По подпискам", FOLLOWS),
+    ("По обновлению", UPDATED),
+]
+# an edit of the refinement fetches one more page when it leaves fewer rows
+# than a page and fewer hits than this are loaded; past that only on scrolling down
+REFINE_AUTOLOAD_HITS = 1000
+
+DescriptionRole = QtCore.Qt.UserRole + 1
+IconRole = QtCore.Qt.UserRole + 2
+
+
+class _Epoch:
+    """Owner token for icon requests; replaced when the results are reset."""
+
+
+class ModResultsModel(QtCore.QAbstractListModel):
+    """All `total_hits` rows of a search, with hits loaded page by page.
+
+    Only `max_pages` pages are held at once; rows of a page that is not
+    loaded show a placeholder until the panel fetches the pages in view.
+    While a refinement is shown the rows are its hits instead, see
+    `set_refined`.
+    """
+
+    def __init__(self, page_size: int, max_pages: int, parent=None):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.pages: OrderedDict[int, list[dict]] = OrderedDict()
+        self.total = 0
+        self.translations: dict[str, str] = {}
+        self.focus_page = 0
+        # hits of the current refinement, None while the pages are shown
+        self.refined: list[dict] | None = None
+        self._icons_requested: set[str] = set()
+        self._epoch = _Epoch()
+
+    def reset(self):
+        self.beginResetModel()
+        self.pages.clear()
+        self.total = 0
+        self.refined = None
+        self.focus_page = 0
+        self._icons_requested.clear()
+        self._epoch = _Epoch()
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self.total if self.refined is None else len(self.refined)
+
+    def set_refined(self, hits: list[dict] | None):
+        self.beginResetModel()
+        self.refined = hits
+        self.endResetModel()
+
+    def hit(self, row: int) -> dict | None:
+        if self.refined is not None:
+            return self.refined[row] if row < len(self.refined) else None
+        page, pos = divmod(row, self.page_size)
+        hits = self.pages.get(page)
+        if hits is None:
+            return None
+        return hits[pos] if pos < len(hits) else None
 
-
-class ModListWidget(QtWidgets.QListWidget):
-    def startDrag(self, supportedActions):
-        item = self.currentItem()
-        if not item:
+    def data(self, index: QtCore.QModelIndex, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        mod = self.hit(index.row())
+        if mod is None:
+            return "Загрузка…" if role == QtCore.Qt.DisplayRole else None
+        if role == QtCore.Qt.DisplayRole:
+            return mod.get("title", "")
+        if role == QtCore.Qt.UserRole:
+            return mod
+        if role == DescriptionRole:
+            desc = mod.get("description", "")
+            return self.translations.get(desc, desc)
+        if role == IconRole:
+            return self._icon(mod.get("icon_url"))
+        if role == QtCore.Qt.ToolTipRole:
+            desc = self.data(index, DescriptionRole)
+            return f"<h3>{mod.get('title', '')}</h3><p style=\"white-space:pre-wrap\">{desc}</p>"
+        return None
+
+    def flags(self, index: QtCore.QModelIndex):
+        flags = super().flags(index)
+        if index.isValid() and self.hit(index.row()) is not None:
+            flags |= QtCore.Qt.ItemIsDragEnabled
+        return flags
+
+    @tracing.traced("search.set_page")
+    def set_page(self, page: int, hits: list[dict], total: int):
+        if self.refined is not None:
+            # the rows are the refinement's; the panel refines again with these hits
+            self.total = total
+            self.pages[page] = hits
+        elif total != self.total:
+            self.beginResetModel()
+            self.total = total
+            self.pages[page] = hits
+            self.endResetModel()
+        else:
+            self.pages[page] = hits
+            self._page_changed(page)
+        while len(self.pages) > self.max_pages:
+            farthest = max(self.pages, key=lambda p: abs(p - self.focus_page))
+            del self.pages[farthest]
+
+    def set_translations(self, translations: dict[str, str]):
+        self.translations.update(translations)
+        if self.refined is not None:
+            if self.refined:
+                self.dataChanged.emit(self.index(0), self.index(len(self.refined) - 1))
             return
-        mod = item.data(QtCore.Qt.UserRole)
-        mime = QtCore.QMimeData()
-        mime.setData("application/x-mod", QtCore.QByteArray(str(mod).encode()))
-        drag = QtGui.QDrag(self)
-        drag.setMimeData(mime)
-        drag.exec(QtCore.Qt.CopyAction)
-
+        for page in self.pages:
+            self._page_changed(page)
 
-class ModCard(QtWidgets.QFrame):
-    def __init__(self, mod: dict, parent: QtWidgets.QWidget | None = None):
-        self._size_hint = None
-        super().__init__(parent)
-        self.mod = mod
-        self.setFrameShape(QtWidgets.QFrame.StyledPanel)
-        self.setFixedHeight(80)
-        self.setStyleSheet(
-            "QFrame { background-color: #2a2a2a; border-radius: 4px; padding: 6px; margin-bottom: 6px; }"
-            "QFrame:hover { background-color: #333; }"
-        )
+    def _page_changed(self, page: int):
+        first = page * self.page_size
+        last = min(self.total, first + self.page_size) - 1
+        if last >= first:
+            self.dataChanged.emit(self.index(first), self.index(last))
 
-        layout = QtWidgets.QHBoxLayout(self)
-        layout.setContentsMargins(8, 8, 8, 8)
-        layout.setSpacing(10)
-        layout.setAlignment(QtCore.Qt.AlignVCenter)
-
-        self.icon_label = QtWidgets.QLabel()
-        self.icon_label.setFixedSize(64, 64)
-        self.icon_label.setAlignment(QtCore.Qt.AlignCenter)
-        self.icon_label.setStyleSheet("border-radius:4px;")
-        layout.addWidget(self.icon_label)
+    def _icon(self, url: str | None) -> QtGui.QImage | None:
+        if not url:
+            return None
+        image = icon_cache().get(url)
+        if image is None and url not in self._icons_requested:
+            self._icons_requested.add(url)
+            icon_cache().request(
+                url, lambda _image, url=url: self._icon_ready(url), owner=self._epoch
+            )
+        return image
+
+    def _icon_ready(self, url: str):
+        self._icons_requested.discard(url)
+        if self.refined is not None:
+            for row, mod in enumerate(self.refined):
+                if mod.get("icon_url") == url:
+                    index = self.index(row)
+                    self.dataChanged.emit(index, index, [IconRole])
+            return
+        for page, hits in self.pages.items():
+            for pos, mod in enumerate(hits):
+                if mod.get("icon_url") == url:
+                    index = self.index(page * self.page_size + pos)
+                    self.dataChanged.emit(index, index, [IconRole])
+
+
+class ModCardDelegate(QtWidgets.QStyledItemDelegate):
+    HEIGHT = 80
+    SPACING = 6
+
+    def sizeHint(self, option, index) -> QtCore.QSize:
+        return QtCore.QSize(option.rect.width(), self.HEIGHT + self.SPACING)
+
+    @tracing.traced("search.paint_card")
+    def paint(self, painter: QtGui.QPainter, option, index: QtCore.QModelIndex):
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        rect = QtCore.QRectF(option.rect).adjusted(0, 0, 0, -self.SPACING)
+        if option.state & QtWidgets.QStyle.State_Selected:
+            bg = QtGui.QColor("#555")
+        elif option.state & QtWidgets.QStyle.State_MouseOver:
+            bg = QtGui.QColor("#333")
+        else:
+            bg = QtGui.QColor("#2a2a2a")
+        painter.setPen(QtCore.Qt.NoPen)
+        painter.setBrush(bg)
+        painter.drawRoundedRect(rect, 4, 4)
 
-        text_layout = QtWidgets.QVBoxLayout()
-        text_layout.setContentsMargins(0, 0, 0, 0)
+        icon_rect = QtCore.QRectF(
+            rect.left() + 8, rect.center().y() - ICON_SIZE / 2, ICON_SIZE, ICON_SIZE
+        )
+        image = index.data(IconRole)
+        if image is not None:
+            target = QtCore.QRectF(QtCore.QPointF(), QtCore.QSizeF(image.size()))
+            target.moveCenter(icon_rect.center())
+            painter.drawImage(target, image)
 
-        text_layout = QtWidgets.QVBoxLayout()
-        text_layout.setContentsMargins(0, 0, 0, 0)
+        text_left = icon_rect.right() + 10
+        text_width = max(0, int(rect.right() - 8 - text_left))
 
-        self.title_label = QtWidgets.QLabel(mod.get("title", ""))
-        title_font = self.title_label.font()
+        title_font = QtGui.QFont(option.font)
         title_font.setBold(True)
         title_font.setPointSize(15)
-        self.title_label.setFont(title_font)
-        self.title_label.setAlignment(QtCore.Qt.AlignCenter)
-        self.title_label.setStyleSheet("color: #f0f0f0; margin-bottom: 2px;")
-        self.title_label.setSizePolicy(
-            QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed
-        )
-        fm_title = self.title_label.fontMetrics()
-        elided_title = fm_title.elidedText(
-            self.title_label.text(), QtCore.Qt.ElideRight, 300
+        title_fm = QtGui.QFontMetrics(title_font)
+        title = title_fm.elidedText(
+            index.data(QtCore.Qt.DisplayRole) or "", QtCore.Qt.ElideRight, min(300, text_width)
         )
-        self.title_label.setText(elided_title)
-
-        desc = mod.get("description", "")
-        self.full_description = desc
-        self.desc_label = QtWidgets.QLabel()
-        self.desc_label.setWordWrap(True)
-        self.desc_label.setStyleSheet("color: #cccccc;")
-        self.desc_label.setMaximumWidth(400)
-        self.desc_label.setSizePolicy(
-            QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed
+        title_rect = QtCore.QRectF(text_left, rect.top() + 8, text_width, title_fm.height())
+        painter.setFont(title_font)
+        painter.setPen(QtGui.QColor("#f0f0f0"))
+        painter.drawText(title_rect, QtCore.Qt.AlignCenter, title)
+
+        fm = QtGui.QFontMetrics(option.font)
+        desc_width = min(400, text_width)
+        desc = fm.elidedText(
+            index.data(DescriptionRole) or "", QtCore.Qt.ElideRight, desc_width * 2
         )
-        fm = self.desc_label.fontMetrics()
-        self.desc_label.setFixedHeight(fm.lineSpacing() * 2)
-        elided = fm.elidedText(
-            desc, QtCore.Qt.ElideRight, self.desc_label.maximumWidth() * 2
+        desc_rect = QtCore.QRectF(
+            text_left, title_rect.bottom() + 2, desc_width, fm.lineSpacing() * 2
         )
-        self.desc_label.setText(elided)
+        painter.setFont(option.font)
+        painter.setPen(QtGui.QColor("#cccccc"))
+        painter.drawText(desc_rect, QtCore.Qt.TextWordWrap, desc)
+        painter.restore()
 
-        text_layout.addWidget(self.title_label)
-        text_layout.addWidget(self.desc_label)
-        text_layout.addStretch()
-        layout.addLayout(text_layout)
 
-        icon_url = mod.get("icon_url")
-        if icon_url:
-            worker = Worker(self._download_icon, icon_url, callback=self._set_icon)
-            QtCore.QThreadPool.globalInstance().start(worker)
-
-        self.adjustSize()
-        self._size_hint = super().sizeHint()
-
-    def _download_icon(self, url: str):
-        try:
-            r = requests.get(url)
-            r.raise_for_status()
-            return r.content
-        except Exception:
-            return None
-
-    def _set_icon(self, data: bytes | None):
-        if not data:
+class ModListView(QtWidgets.QListView):
+    def startDrag(self, supportedActions):
+        indexes = sorted(self.selectedIndexes(), key=lambda index: index.row())
+        if not indexes and self.currentIndex().isValid():
+            indexes = [self.currentIndex()]
+        hits = [index.data(QtCore.Qt.UserRole) for index in indexes]
+        hits = [hit for hit in hits if hit]
+        if not hits:
             return
-        pix = QtGui.QPixmap()
-        pix.loadFromData(data)
-        pix = pix.scaled(
-            64, 64, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation
-        )
-        self.icon_label.setPixmap(pix)
-
-    def enterEvent(self, event: QtCore.QEvent):
-        QtWidgets.QToolTip.showText(
-            QtGui.QCursor.pos(),
-            f"<h3>{self.mod.get('title', '')}</h3><p style=\"white-space:pre-wrap\">{self.full_description}</p>",
-            self,
-        )
-        super().enterEvent(event)
-
-    def leaveEvent(self, event: QtCore.QEvent):
-        QtWidgets.QToolTip.hideText()
-        super().leaveEvent(event)
-
-    def sizeHint(self) -> QtCore.QSize:
-        return self._size_hint or super().sizeHint()
-
-
-class Worker(QtCore.QObject, QtCore.QRunnable):
-    finished = QtCore.Signal(object)
+        drag = QtGui.QDrag(self)
+        drag.setMimeData(mods_mime(hits))
+        drag.exec(QtCore.Qt.CopyAction)
 
-    def __init__(self, fn, *args, callback=None):
-        QtCore.QObject.__init__(self)
-        QtCore.QRunnable.__init__(self)
-        self.fn = fn
-        self.args = args
-        if callback:
-            self.finished.connect(callback)
 
-    @QtCore.Slot()
-    def run(self):
-        result = self.fn(*self.args)
-        self.finished.emit(result)
+def release_versions(tags: list[dict]) -> list[str]:
+    return [tag["version"] for tag in tags if tag.get("version_type") == "release"]
 
 
 class SearchPanel(QtWidgets.QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.api = ModrinthAPI()
+        self.api = ModrinthAPI(index=LocalIndex())
+        self.translator = Translator()
         self.search_edit = QtWidgets.QLineEdit()
         self.search_button = QtWidgets.QPushButton("Поиск")
-        self.results_list = ModListWidget()
-        self.version_checks: list[QtWidgets.QCheckBox] = []
+        self.results_list = ModListView()
+        self.version_list: QtWidgets.QListWidget | None = None
         self.loader_checks: list[QtWidgets.QCheckBox] = []
         self.page = 0
-        self.page_size = 10
-        self.mods: list[dict] = []
-        self.progress = QtWidgets.QProgressDialog(
-            "\u0417\u0430\u0433\u0440\u0443\u0437\u043a\u0430\u2026", None, 0, 0, self
-        )
-        self.progress.setCancelButton(None)
-        self.progress.setWindowModality(QtCore.Qt.ApplicationModal)
-
-        self.results_list.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.page_size = 20
+        self.max_loaded_pages = 8
+        self.model = ModResultsModel(self.page_size, self.max_loaded_pages, self)
+        self.query_params: tuple | None = None
+        self.generation = 0
+        self._cancel = threading.Event()
+        self._loading: set[int] = set()
+        # page -> (monotonic time it may be retried at, delay that was used)
+        self._failed: dict[int, tuple[float, float]] = {}
+        # every hit fetched for the query, for refining without new requests
+        self.refine_index = RefineIndex(LOADERS)
+        self._refine_pages: set[int] = set()
+        self.facet_categories: set[str] = set()
+        self.facet_loaders: set[str] = set()
+        self._facet_counts: tuple[dict[str, int], dict[str, int]] = ({}, {})
+        # board_index.BoardIndex of the board, set by the main window, to hide mods already on it
+        self.board_index = None
+        self.progress = QtWidgets.QProgressBar()
+        self.progress.setRange(0, 0)
+        self.progress.setTextVisible(False)
+        self.progress.setFixedHeight(4)
+        self.progress.hide()
+        self.debounce = QtCore.QTimer(self)
+        self.debounce.setSingleShot(True)
+        self.debounce.setInterval(SEARCH_DEBOUNCE_MS)
+        # bumped on every edit of the query, so only the newest probe counts
+        self._probe = 0
+
+        self.results_list.setModel(self.model)
+        self.results_list.setItemDelegate(ModCardDelegate(self.results_list))
+        self.results_list.setUniformItemSizes(True)
+        self.results_list.setMouseTracking(True)
+        self.results_list.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
+        self.results_list.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.results_list.setDragEnabled(True)
 
         layout = QtWidgets.QVBoxLayout(self)
 
         self.filter_box = QtWidgets.QGroupBox("Фильтры")
-        self.filter_inner = QtWidgets.QWidget()
-        filter_layout = QtWidgets.QHBoxLayout(self.filter_inner)
-
-        version_group = QtWidgets.QGroupBox("Версии Minecraft")
-        vg_layout = QtWidgets.QVBoxLayout(version_group)
-        ver_scroll = QtWidgets.QScrollArea()
-        ver_scroll.setWidgetResizable(True)
-        ver_widget = QtWidgets.QWidget()
-        ver_layout = QtWidgets.QVBoxLayout(ver_widget)
-        for ver in self.generate_versions():
-            cb = QtWidgets.QCheckBox(ver)
-            ver_layout.addWidget(cb)
-            self.version_checks.append(cb)
-        ver_layout.addStretch()
-        ver_scroll.setWidget(ver_widget)
-        vg_layout.addWidget(ver_scroll)
-
-        loader_group = QtWidgets.QGroupBox("Загрузчики")
-        lg_layout = QtWidgets.QVBoxLayout(loader_group)
-        for loader in ["fabric", "forge", "quilt", "neoforge"]:
-            cb = QtWidgets.QCheckBox(loader)
-            lg_layout.addWidget(cb)
-            self.loader_checks.append(cb)
-        lg_layout.addStretch()
-
-        filter_layout.addWidget(version_group)
-        filter_layout.addWidget(loader_group)
+        # built on first expand, most sessions never open the filters
+        self.filter_inner: QtWidgets.QWidget | None = None
 
         toggle_row = QtWidgets.QHBoxLayout()
         self.filter_toggle = QtWidgets.QToolButton()
@@ -207,14 +317,7 @@ class SearchPanel(QtWidgets.QWidget):
 
         box_layout = QtWidgets.QVBoxLayout(self.filter_box)
         box_layout.addLayout(toggle_row)
-        box_layout.addWidget(self.filter_inner)
-        self.filter_inner.setVisible(False)
-        self.filter_toggle.toggled.connect(self.filter_inner.setVisible)
-        self.filter_toggle.toggled.connect(
-            lambda ch: self.filter_toggle.setArrowType(
-                QtCore.Qt.DownArrow if ch else QtCore.Qt.RightArrow
-            )
-        )
+        self.filter_toggle.toggled.connect(self._toggle_filters)
 
         layout.addWidget(self.filter_box)
 
@@ -222,6 +325,31 @@ class SearchPanel(QtWidgets.QWidget):
         search_row.addWidget(self.search_edit)
         search_row.addWidget(self.search_button)
         layout.addLayout(search_row)
+
+        self.refine_edit = QtWidgets.QLineEdit()
+        self.refine_edit.setPlaceholderText("Уточнить среди найденных…")
+        self.refine_edit.setClearButtonEnabled(True)
+        self.sort_box = QtWidgets.QComboBox()
+        self.then_box = QtWidgets.QComboBox()
+        for label, key in SORT_LABELS:
+            self.sort_box.addItem(label, key)
+            self.then_box.addItem(f"затем {label.lower()}", key)
+        self.facet_button = QtWidgets.QToolButton()
+        self.facet_button.setText("Категории")
+        self.facet_button.setPopupMode(QtWidgets.QToolButton.InstantPopup)
+        self.facet_menu = QtWidgets.QMenu(self.facet_button)
+        self.facet_button.setMenu(self.facet_menu)
+        self.hide_on_board = QtWidgets.QCheckBox("Скрыть добавленные")
+        refine_row = QtWidgets.QHBoxLayout()
+        refine_row.addWidget(self.refine_edit)
+        refine_row.addWidget(self.facet_button)
+        sort_row = QtWidgets.QHBoxLayout()
+        sort_row.addWidget(self.sort_box)
+        sort_row.addWidget(self.then_box)
+        sort_row.addWidget(self.hide_on_board)
+        layout.addLayout(refine_row)
+        layout.addLayout(sort_row)
+        layout.addWidget(self.progress)
         layout.addWidget(self.results_list)
 
         pag_row = QtWidgets.QHBoxLayout()
@@ -237,8 +365,80 @@ class SearchPanel(QtWidgets.QWidget):
 
         self.prev_btn.clicked.connect(self.prev_page)
         self.next_btn.clicked.connect(self.next_page)
+        self.results_list.verticalScrollBar().valueChanged.connect(self._on_scrolled)
 
         self.search_button.clicked.connect(self.on_search)
+        self.search_edit.returnPressed.connect(self.on_search)
+        self.search_edit.textChanged.connect(self._on_query_edited)
+        self.debounce.timeout.connect(self.on_search)
+        # refining is local and fast enough to follow every keystroke
+        self.refine_edit.textChanged.connect(self.refine)
+        self.sort_box.currentIndexChanged.connect(self.refine)
+        self.then_box.currentIndexChanged.connect(self.refine)
+        self.hide_on_board.toggled.connect(self.refine)
+        self.facet_menu.aboutToShow.connect(self._fill_facet_menu)
+
+    def _toggle_filters(self, checked: bool):
+        if checked and self.filter_inner is None:
+            self._build_filters()
+        if self.filter_inner is not None:
+            self.filter_inner.setVisible(checked)
+        self.filter_toggle.setArrowType(QtCore.Qt.DownArrow if checked else QtCore.Qt.RightArrow)
+
+    def _build_filters(self):
+        self.filter_inner = QtWidgets.QWidget()
+        filter_layout = QtWidgets.QHBoxLayout(self.filter_inner)
+
+        version_group = QtWidgets.QGroupBox("Версии Minecraft")
+        vg_layout = QtWidgets.QVBoxLayout(version_group)
+        self.version_list = QtWidgets.QListWidget()
+        self.version_list.setUniformItemSizes(True)
+        self.version_list.itemChanged.connect(self.debounce.start)
+        vg_layout.addWidget(self.version_list)
+        self._set_versions(self.game_versions())
+
+        loader_group = QtWidgets.QGroupBox("Загрузчики")
+        lg_layout = QtWidgets.QVBoxLayout(loader_group)
+        for loader in LOADERS:
+            cb = QtWidgets.QCheckBox(loader)
+            cb.toggled.connect(self.debounce.start)
+            lg_layout.addWidget(cb)
+            self.loader_checks.append(cb)
+        lg_layout.addStretch()
+
+        filter_layout.addWidget(version_group)
+        filter_layout.addWidget(loader_group)
+        self.filter_box.layout().addWidget(self.filter_inner)
+
+        api = self.api
+
+        def run():
+            try:
+                return api.get_game_versions()
+            except Exception as exc:
+                return exc
+
+        QtCore.QThreadPool.globalInstance().start(Worker(run, callback=self._on_game_versions))
+
+    def _on_game_versions(self, result):
+        if not isinstance(result, Exception):
+            self._set_versions(release_versions(result))
+
+    def _set_versions(self, versions: list[str]):
+        checked = set(self.selected_versions())
+        self.version_list.blockSignals(True)
+        self.version_list.clear()
+        for version in versions:
+            item = QtWidgets.QListWidgetItem(version)
+            item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
+            item.setCheckState(QtCore.Qt.Checked if version in checked else QtCore.Qt.Unchecked)
+            self.version_list.addItem(item)
+        self.version_list.blockSignals(False)
+
+    def game_versions(self) -> list[str]:
+        """Release versions from the cached Modrinth tag list, generated ones before the first fetch."""
+        tags = self.api.cached_game_versions()
+        return release_versions(tags) if tags else self.generate_versions()
 
     @staticmethod
     def generate_versions() -> list[str]:
@@ -255,68 +455,322 @@ class SearchPanel(QtWidgets.QWidget):
         versions.append("1.0")
         return versions
 
-    def on_search(self):
+    def selected_versions(self) -> list[str]:
+        if self.version_list is None:
+            return []
+        items = (self.version_list.item(row) for row in range(self.version_list.count()))
+        return [item.text() for item in items if item.checkState() == QtCore.Qt.Checked]
+
+    def selected_loaders(self) -> list[str]:
+        return [cb.text() for cb in self.loader_checks if cb.isChecked()]
+
+    def _on_query_edited(self):
+        self.debounce.start()
         query = self.search_edit.text().strip()
-        self.page = 0
         if not query:
-            self.mods = []
-            self.display_page()
             return
-        versions = [cb.text() for cb in self.version_checks if cb.isChecked()]
-        loaders = [cb.text() for cb in self.loader_checks if cb.isChecked()]
+        self._probe += 1
+        params = (query, tuple(self.selected_versions()), tuple(self.selected_loaders()))
+        worker = Worker(self._probe_search, self._probe, params, callback=self._on_probed)
+        QtCore.QThreadPool.globalInstance().start(worker, 1)
+
+    def _probe_search(self, probe: int, params: tuple):
+        query, versions, loaders = params
+        try:
+            result = self.api.cached_search(query, self.page_size, 0, list(versions), list(loaders))
+        except Exception:
+            result = None
+        return probe, result
+
+    def _on_probed(self, result):
+        probe, data = result
+        # the first page is at hand, so there is nothing to debounce
+        if probe == self._probe and data is not None and self.debounce.isActive():
+            self.on_search()
 
+    def on_search(self):
+        self.debounce.stop()
+        query = self.search_edit.text().strip()
+        versions = self.selected_versions()
+        loaders = self.selected_loaders()
+        params = (query, tuple(versions), tuple(loaders)) if query else None
+        if params is not None and params == self.query_params and (
+            self.model.pages or self._loading
+        ):
+            return
+        # supersede whatever the previous query still has in flight
+        self._cancel.set()
+        self._cancel = threading.Event()
+        self.generation += 1
+        self.page = 0
+        self._loading.clear()
+        self._failed.clear()
+        self.model.reset()
+        self.refine_index.clear()
+        self._refine_pages.clear()
+        self.query_params = params
+        self.display_page()
+
+    def _fetch_page(self, page: int):
+        if (
+            self.query_params is None
+            or page in self.model.pages
+            or page in self._loading
+            or (self.model.total and page * self.page_size >= self.model.total)
+            or time.monotonic() < self._failed.get(page, (0.0, 0.0))[0]
+        ):
+            return
+        self._loading.add(page)
         worker = Worker(
-            self.api.search_mods,
-            query,
-            100,
-            versions,
-            loaders,
-            callback=self._on_search_finished,
+            self._load_page,
+            self.generation,
+            self.query_params,
+            page,
+            self._cancel,
+            callback=self._on_page_loaded,
         )
-        QtCore.QThreadPool.globalInstance().start(worker)
-        self.search_button.setEnabled(False)
-        self.progress.show()
+        # search pages jump ahead of queued icon and translation jobs
+        QtCore.QThreadPool.globalInstance().start(worker, 1)
 
-    def _on_search_finished(self, result):
-        self.progress.hide()
-        self.search_button.setEnabled(True)
-        if isinstance(result, list):
-            self.mods = result
+    def _load_page(self, generation: int, params: tuple, page: int, cancel: threading.Event):
+        query, versions, loaders = params
+        try:
+            data = self.api.search(
+                query,
+                self.page_size,
+                page * self.page_size,
+                list(versions),
+                list(loaders),
+                cancel=cancel,
+            )
+        except Exception:
+            data = None
+        return generation, page, data
+
+    def _on_page_loaded(self, result):
+        generation, page, data = result
+        if generation != self.generation:
+            return
+        self._loading.discard(page)
+        if not self._loading:
+            self.progress.hide()
+        if data is None:
+            delay = min(MAX_RETRY_DELAY, 2 * self._failed.get(page, (0.0, RETRY_DELAY / 2))[1])
+            self._failed[page] = (time.monotonic() + delay, delay)
+            QtCore.QTimer.singleShot(int(delay * 1000), lambda: self._retry(generation, page))
+            return
+        self._failed.pop(page, None)
+        hits = data["hits"]
+        self.model.set_page(page, hits, data["total_hits"])
+        self._translate(hits)
+        self.refine_index.add(hits, self.model.translations)
+        self._refine_pages.add(page)
+        if self.refining():
+            # no further fetch from here, or a narrow refinement would page through everything
+            self._apply_refine()
+            return
+        self.update_page_label()
+        if page == self.page and (page + 1) * self.page_size < self.model.total:
+            self._fetch_page(page + 1)
+
+    def _translate(self, hits: list[dict]):
+        untranslated = []
+        for mod in hits:
+            desc = mod.get("description", "")
+            if not desc or desc in self.model.translations:
+                continue
+            translated = self.translator.cached(desc)
+            if translated is None:
+                untranslated.append(desc)
+            else:
+                self.model.translations[desc] = translated
+        if untranslated:
+            worker = Worker(
+                self.translator.translate_many,
+                untranslated,
+                callback=self._on_translated,
+            )
+            QtCore.QThreadPool.globalInstance().start(worker)
+
+    def _on_translated(self, translations: dict[str, str]):
+        self.model.set_translations(translations)
+        self.refine_index.add_translations(translations)
+        if self.refine_edit.text().strip():
+            self._apply_refine()
+
+    def refining(self) -> bool:
+        return bool(
+            self.refine_edit.text().strip()
+            or self.facet_categories
+            or self.facet_loaders
+            or self.hide_on_board.isChecked()
+            or self.sort_box.currentData() != RELEVANCE
+            or self.then_box.currentData() != RELEVANCE
+        )
+
+    def refine(self):
+        """Show the fetched hits narrowed down and sorted by the refine row.
+
+        Called on every edit of the refine row; an edit leaving few rows
+        fetches one more page, further ones come from scrolling down.
+        """
+        shown = self._apply_refine()
+        if (
+            shown is not None
+            and shown < self.page_size
+            and len(self.refine_index) < REFINE_AUTOLOAD_HITS
+        ):
+            self._fetch_more()
+
+    def _apply_refine(self) -> int | None:
+        """Refine the fetched hits again; the number of rows shown, None when not refining."""
+        if not self.refining():
+            if self.model.refined is not None:
+                self.model.set_refined(None)
+                self.display_page()
+            return None
+        exclude = None
+        if self.hide_on_board.isChecked() and self.board_index is not None:
+            index = self.board_index
+
+            def exclude(hit: dict) -> bool:
+                return index.has(hit.get("project_id") or "", hit.get("slug") or "")
+
+        with tracing.span("search.refine"):
+            result = self.refine_index.refine(
+                self.refine_edit.text(),
+                sort=(self.sort_box.currentData(), self.then_box.currentData()),
+                categories=self.facet_categories,
+                loaders=self.facet_loaders,
+                exclude=exclude,
+            )
+        self._facet_counts = (result.categories, result.loaders)
+        scroll = self.results_list.verticalScrollBar()
+        position = scroll.value() if self.model.refined is not None else 0
+        self.model.set_refined(result.hits)
+        scroll.setValue(position)
+        self.update_page_label()
+        return len(result.hits)
+
+    def board_changed(self):
+        if self.hide_on_board.isChecked():
+            self._apply_refine()
+
+    def _next_refine_page(self) -> int | None:
+        """The next page the refinement has not seen yet, None when all are loaded."""
+        page = 0
+        while page in self._refine_pages:
+            page += 1
+        return page if page == 0 or page < self.page_count() else None
+
+    def _fetch_more(self):
+        page = self._next_refine_page()
+        if page is not None:
+            self._fetch_page(page)
+
+    def _fill_facet_menu(self):
+        self.facet_menu.clear()
+        if self.refining():
+            categories, loaders = self._facet_counts
         else:
-            self.mods = []
-        self.display_page()
+            categories, loaders = self.refine_index.category_counts, self.refine_index.loader_counts
+        for title, counts, selected in (
+            ("Загрузчики", loaders, self.facet_loaders),
+            ("Категории", categories, self.facet_categories),
+        ):
+            if not counts and not selected:
+                continue
+            self.facet_menu.addSection(title)
+            for name in sorted(counts.keys() | selected, key=lambda n: (-counts.get(n, 0), n)):
+                action = self.facet_menu.addAction(f"{name} ({counts.get(name, 0)})")
+                action.setCheckable(True)
+                action.setChecked(name in selected)
+                action.toggled.connect(
+                    lambda on, name=name, selected=selected: self._toggle_facet(selected, name, on)
+                )
+        if self.facet_menu.isEmpty():
+            self.facet_menu.addAction("Нет результатов").setEnabled(False)
+
+    def _toggle_facet(self, selected: set[str], name: str, on: bool):
+        if on:
+            selected.add(name)
+        else:
+            selected.discard(name)
+        chosen = len(self.facet_categories) + len(self.facet_loaders)
+        self.facet_button.setText(f"Категории ({chosen})" if chosen else "Категории")
+        self.refine()
 
+    @tracing.traced("search.display_page")
     def display_page(self):
-        self.results_list.clear()
-        start = self.page * self.page_size
-        end = start + self.page_size
-        subset = self.mods[start:end]
-        for mod in subset:
-            desc = mod.get("description", "")
-            if desc:
-                try:
-                    desc = GoogleTranslator(source="en", target="ru").translate(desc)
-                except Exception:
-                    pass
-            card_mod = mod.copy()
-            card_mod["description"] = desc
-            item = QtWidgets.QListWidgetItem()
-            widget = ModCard(card_mod)
-            item.setSizeHint(widget.sizeHint())
-            item.setData(QtCore.Qt.UserRole, mod)
-            self.results_list.addItem(item)
-            self.results_list.setItemWidget(item, widget)
+        if self.model.refined is not None:
+            self.update_page_label()
+            return
+        if self.query_params is None:
+            self.progress.hide()
+        elif self.page not in self.model.pages:
+            self._fetch_page(self.page)
+            self.progress.show()
+        if self.page * self.page_size < self.model.total:
+            self.results_list.scrollTo(
+                self.model.index(self.page * self.page_size),
+                QtWidgets.QAbstractItemView.PositionAtTop,
+            )
         self.update_page_label()
 
+    def _on_scrolled(self):
+        if self.model.refined is not None:
+            scroll = self.results_list.verticalScrollBar()
+            if scroll.value() >= scroll.maximum() - ModCardDelegate.HEIGHT:
+                self._fetch_more()
+            return
+        top = self.results_list.indexAt(QtCore.QPoint(0, 0))
+        if top.isValid():
+            self.page = top.row() // self.page_size
+            self.model.focus_page = self.page
+            self.update_page_label()
+            self._fetch_visible()
+            if self.page in self.model.pages:
+                self._fetch_page(self.page + 1)
+
+    def _retry(self, generation: int, page: int):
+        if generation != self.generation or page not in self._failed:
+            return
+        # the timer may fire a little early, so the wait is lifted here
+        self._failed[page] = (0.0, self._failed[page][1])
+        self._fetch_visible()
+
+    def _fetch_visible(self):
+        """Fetch the pages of the rows in view; painting only shows placeholders."""
+        if self.model.refined is not None or not self.model.total:
+            return
+        rect = self.results_list.viewport().rect()
+        top = self.results_list.indexAt(rect.topLeft())
+        if not top.isValid():
+            return
+        bottom = self.results_list.indexAt(rect.bottomLeft())
+        last = bottom.row() if bottom.isValid() else self.model.total - 1
+        for page in range(top.row() // self.page_size, last // self.page_size + 1):
+            self._fetch_page(page)
+
+    def page_count(self) -> int:
+        return math.ceil(self.model.total / self.page_size)
+
     def update_page_label(self):
-        total = max(1, math.ceil(len(self.mods) / self.page_size))
+        if self.model.refined is not None:
+            self.page_label.setText(f"{len(self.model.refined)} из {len(self.refine_index)}")
+            self.prev_btn.setEnabled(False)
+            # loads the next page into the refinement, for lists too short to scroll
+            self.next_btn.setEnabled(self._next_refine_page() is not None)
+            return
+        total = max(1, self.page_count())
         self.page_label.setText(f"{self.page + 1}/{total}")
         self.prev_btn.setEnabled(self.page > 0)
         self.next_btn.setEnabled(self.page < total - 1)
 
     def next_page(self):
-        total = math.ceil(len(self.mods) / self.page_size)
-        if self.page < total - 1:
+        if self.model.refined is not None:
+            self._fetch_more()
+        elif self.page < self.page_count() - 1:
             self.page += 1
             self.display_page()
 
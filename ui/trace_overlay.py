@@ -0,0 +1,79 @@
+from PySide6 import QtCore, QtGui, QtWidgets
+
+import tracing
+
+# span names listed, by total time
+MAX_ROWS = 12
+REFRESH_MS = 500
+BEAT_MS = 20
+
+
+class TraceOverlay(QtWidgets.QLabel):
+    """Live span latencies drawn over the top-right corner of its parent.
+
+    Switching it on also enables tracing and watches the GUI thread for
+    event-loop stalls; switching it off stops both again.
+    """
+
+    def __init__(self, parent: QtWidgets.QWidget, stall_ms: float = tracing.STALL_MS):
+        super().__init__(parent)
+        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self.setTextFormat(QtCore.Qt.PlainText)
+        self.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        self.setStyleSheet(
+            "background: rgba(20, 20, 20, 210); color: #d0d0d0; padding: 6px; border-radius: 4px;"
+        )
+        self.detector = tracing.StallDetector(stall_ms)
+        self.beat = QtCore.QTimer(self)
+        self.beat.setInterval(BEAT_MS)
+        self.beat.timeout.connect(self.detector.beat)
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+        parent.installEventFilter(self)
+        self.hide()
+
+    def set_tracing(self, on: bool, show: bool = True):
+        tracing.enable(on)
+        if on:
+            self.detector.start()
+            self.beat.start()
+        else:
+            self.detector.stop()
+            self.beat.stop()
+        self.setVisible(on and show)
+        if self.isVisible():
+            self.timer.start()
+            self.refresh()
+        else:
+            self.timer.stop()
+
+    def refresh(self):
+        tracer = tracing.tracer()
+        rows = sorted(tracer.stats.items(), key=lambda item: item[1].total, reverse=True)
+        width = max((len(name) for name, _ in rows[:MAX_ROWS]), default=4)
+        lines = [f"{'span':<{width}} {'n':>6} {'p50':>7} {'p95':>7} {'max':>7}"]
+        for name, stats in rows[:MAX_ROWS]:
+            lines.append(
+                f"{name:<{width}} {stats.count:>6} {stats.percentile(0.5):>7.1f}"
+                f" {stats.percentile(0.95):>7.1f} {stats.max:>7.1f}"
+            )
+        if tracer.stalls:
+            last = tracer.stalls[-1]
+            lines.append(
+                f"зависаний: {len(tracer.stalls)}, последнее {last['dur'] / 1000:.0f} мс"
+                f" в {', '.join(last['spans'])}"
+            )
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self._place()
+
+    def _place(self):
+        parent = self.parentWidget()
+        self.move(parent.width() - self.width() - 12, 40)
+        self.raise_()
+
+    def eventFilter(self, watched, event):
+        if event.type() == QtCore.QEvent.Resize and self.isVisible():
+            self._place()
+        return False
@@ -0,0 +1,27 @@
+from PySide6 import QtCore
+
+import tracing
+
+
+class Worker(QtCore.QObject, QtCore.QRunnable):
+    finished = QtCore.Signal(object)
+    progress = QtCore.Signal(object)
+
+    def __init__(self, fn, *args, callback=None, on_progress=None):
+        QtCore.QObject.__init__(self)
+        QtCore.QRunnable.__init__(self)
+        self.fn = fn
+        self.args = args
+        self.kwargs = {}
+        if callback:
+            self.finished.connect(callback)
+        if on_progress:
+            # fn reports through progress(*values), delivered on the GUI thread
+            self.progress.connect(on_progress)
+            self.kwargs["progress"] = lambda *values: self.progress.emit(values)
+
+    @QtCore.Slot()
+    def run(self):
+        with tracing.span("worker " + getattr(self.fn, "__name__", "?")):
+            result = self.fn(*self.args, **self.kwargs)
+        self.finished.emit(result)